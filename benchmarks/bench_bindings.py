@@ -0,0 +1,154 @@
+"""GUI load of many labels updated by worker threads: raw queued signals versus `bff.app.Bindings`.
+
+Two worker threads update 300 status labels (150 each) at 100 Hz. For every approach the benchmark runs the GUI
+(offscreen if no display is set) and reports the latency of its event loop with a 1 ms `QTimer`, the number of label
+updates the GUI executed and the backlog: updates still queued when the workers stopped, and the time the GUI needed
+to work them off.
+
+* signals: one `TextUpdater` per label, like `tests/test_app.py`, `update_text.emit(...)` per update
+* bindings: `app.bindings.set(...)` per update, labels bound with `app.bindings.bind(...)`, pushed every 50 ms
+
+Run with `python benchmarks/bench_bindings.py [seconds] [labels]`.
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
+from bff.app import BFF, Config
+
+WORKERS = 2
+RATE = 100
+
+
+class TextUpdater(QObject):
+    update_text = pyqtSignal(str)
+
+
+def workers(seconds:float, labels:int, update) -> threading.Thread:
+    """Starts the worker threads, each updates its share of the labels at `RATE`. Returns a thread joining them."""
+    def work(first:int, count:int) -> None:
+        stop = time.perf_counter() + seconds
+        due = time.perf_counter()
+        while due < stop:
+            for index in range(first, first + count):
+                update(index, f"{time.perf_counter():.6f}")
+            due += 1 / RATE
+            time.sleep(max(0.0, due - time.perf_counter()))
+
+    share = labels // WORKERS
+    threads = [threading.Thread(target=work, args=(i * share, share)) for i in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    joiner = threading.Thread(target=lambda: [thread.join() for thread in threads])
+    joiner.start()
+    return joiner
+
+
+def run_loop(seconds:float) -> np.ndarray:
+    """Runs the GUI event loop and returns the lateness of a 1 ms timer in ms."""
+    lateness:list[float] = []
+    expected = [time.perf_counter() + 0.001]
+    timer = QTimer()
+    timer.setInterval(1)
+
+    def tick() -> None:
+        now = time.perf_counter()
+        lateness.append((now - expected[0]) * 1000)
+        expected[0] = now + 0.001
+
+    timer.timeout.connect(tick)
+    timer.start()
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    timer.stop()
+    return np.array(lateness)
+
+
+def counting(labels:list[QLabel]) -> list[int]:
+    """Counts the `setText` calls of the labels."""
+    counts = [0]
+    for label in labels:
+        set_text = label.setText
+
+        def counted(text:str, set_text=set_text) -> None:
+            counts[0] += 1
+            set_text(text)
+        label.setText = counted # type:ignore
+    return counts
+
+
+def drain(executed:list[int], emitted:int) -> float:
+    """Processes events until all `emitted` updates have been executed, returns the time it took."""
+    start = time.perf_counter()
+    while executed[0] < emitted and time.perf_counter() - start < 60:
+        QCoreApplication.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+    return time.perf_counter() - start
+
+
+def report(label:str, lateness:np.ndarray, updates:int, executed:int, backlog:int, drain_time:float) -> None:
+    print(f"{label:<9} loop p50 {np.percentile(lateness, 50):6.2f} ms p99 {np.percentile(lateness, 99):7.2f} ms   "
+          f"{updates:>7} updates, {executed:>7} setText   backlog {backlog:>6}, drained in {drain_time * 1000:7.1f} ms")
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    Config.server_enabled = False
+    Config.defer_theme = False
+    bff = BFF()
+    view = QWidget()
+    layout = QVBoxLayout(view)
+    labels = [QLabel("-") for _ in range(count)]
+    for label in labels:
+        layout.addWidget(label)
+    bff.window.register_view("labels", view)
+    bff.window.show()
+    bff.window.show_view("labels")
+    executed = counting(labels)
+    print(f"{count} labels, {WORKERS} workers at {RATE} Hz, {seconds:g} s each")
+
+    updaters = [TextUpdater() for _ in labels]
+    for updater, label in zip(updaters, labels):
+        updater.update_text.connect(label.setText)
+    emitted = [0]
+
+    def emit(index:int, text:str) -> None:
+        updaters[index].update_text.emit(text)
+        emitted[0] += 1
+
+    joiner = workers(seconds, count, emit)
+    lateness = run_loop(seconds)
+    joiner.join()
+    backlog = emitted[0] - executed[0]
+    report("signals", lateness, emitted[0], executed[0], backlog, drain(executed, emitted[0]))
+
+    for updater in updaters:
+        updater.update_text.disconnect()
+    executed[0] = 0
+    for index, label in enumerate(labels):
+        bff.bindings.bind(f"status{index}", label)
+    sets = [0]
+
+    def bind_set(index:int, text:str) -> None:
+        bff.bindings.set(f"status{index}", text)
+        sets[0] += 1
+
+    joiner = workers(seconds, count, bind_set)
+    lateness = run_loop(seconds)
+    joiner.join()
+    # a binding has no queue: whatever the workers set last is shown with the next tick
+    start = time.perf_counter()
+    bff.bindings.push()
+    report("bindings", lateness, sets[0], executed[0], 0, time.perf_counter() - start)
+    bff.window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measures the frame time of `GraphWidget` against the length of the series.
+
+For each length the series is plotted once, then the view is zoomed to a range of random width and position
+and the canvas is drawn synchronously. Reported are the time to add the series (building the decimation pyramid)
+and the median/worst frame time. With `--raw` the same frames are drawn with the complete series handed
+over to Matplotlib, for comparison.
+
+Run with `python benchmarks/bench_graph_decimation.py [--raw]`.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+from bff.components.graph import GraphWidget
+
+LENGTHS = [10_000, 100_000, 1_000_000, 10_000_000]
+FRAMES = 20
+
+
+def frame_times(widget:GraphWidget, length:int) -> list[float]:
+    times: list[float] = []
+    for _ in range(FRAMES):
+        width = length * random.choice([1.0, 0.1, 0.01, 0.001])
+        start = random.uniform(0, length - width)
+        begin = time.perf_counter()
+        widget.canvas.axes.set_xlim(start, start + width)
+        widget.canvas.draw()
+        times.append(time.perf_counter() - begin)
+    return times
+
+
+def bench(length:int, raw:bool) -> None:
+    widget = GraphWidget()
+    widget.resize(1200, 800)
+    widget.show()
+    QApplication.processEvents()
+    for line, _ in widget.series:
+        line.remove()
+    widget.series.clear()
+    x = np.arange(length, dtype=np.float64)
+    y = np.sin(x / 1000) + np.random.normal(scale=0.1, size=length)
+    begin = time.perf_counter()
+    if raw:
+        widget.canvas.axes.plot(x, y)
+    else:
+        widget.plot_data(x, y)
+    widget.canvas.draw()
+    setup = time.perf_counter() - begin
+    times = frame_times(widget, length)
+    mode = "raw" if raw else "decimated"
+    print(f"{mode:<10} {length:>11,} points  setup {setup * 1e3:8.1f} ms  "
+          f"frame median {statistics.median(times) * 1e3:8.1f} ms  max {max(times) * 1e3:8.1f} ms")
+    widget.close()
+
+
+def main() -> None:
+    app = QApplication(sys.argv)
+    raw = "--raw" in sys.argv
+    for length in LENGTHS:
+        bench(length, raw=False)
+        if raw:
+            bench(length, raw=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Load test of the embedded HTTP server of `bff.app.http_server`.
+
+Starts a `BFF` application (offscreen if no display is set) and measures the latency of its GUI event loop with a
+1 ms `QTimer`: the delay between the due time and the actual timeout. The measurement runs once idle and once while
+a client process hammers `/api/status` over several keep-alive connections and reads a live stream.
+The server runs on the asyncio loop thread, so the GUI latency should hardly change under load.
+
+Run with `python benchmarks/bench_http_server.py [seconds] [connections]`.
+"""
+import http.client
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+from PyQt6.QtCore import QEventLoop, QTimer
+from bff.app import BFF, Config
+
+
+def hammer(port:int, seconds:float, connections:int, result) -> None:
+    """Client process: `connections` threads request `/api/status` back to back, one more reads a stream."""
+    counts = [0] * connections
+    stop = time.perf_counter() + seconds
+
+    def requests(index:int) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        while time.perf_counter() < stop:
+            connection.request("GET", "/api/status")
+            connection.getresponse().read()
+            counts[index] += 1
+        connection.close()
+
+    def stream() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=seconds)
+        connection.request("GET", "/api/streams/bench")
+        response = connection.getresponse()
+        lines = 0
+        while time.perf_counter() < stop and response.readline():
+            lines += 1
+        result["stream_lines"] = lines
+        connection.close()
+
+    threads = [threading.Thread(target=requests, args=(i,)) for i in range(connections)]
+    threads.append(threading.Thread(target=stream))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result["requests"] = sum(counts)
+
+
+def measure_latency(seconds:float) -> np.ndarray:
+    """Runs the GUI event loop for `seconds` and returns the lateness of a 1 ms timer in ms."""
+    lateness:list[float] = []
+    expected = [time.perf_counter() + 0.001]
+    timer = QTimer()
+    timer.setInterval(1)
+
+    def tick() -> None:
+        now = time.perf_counter()
+        lateness.append((now - expected[0]) * 1000)
+        expected[0] = now + 0.001
+
+    timer.timeout.connect(tick)
+    timer.start()
+    # a local loop: `QApplication.quit` would close the main window and shut the application down
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    timer.stop()
+    return np.array(lateness)
+
+
+def report(label:str, lateness:np.ndarray) -> None:
+    print(f"{label:<10} ticks {len(lateness):>6}   p50 {np.percentile(lateness, 50):6.2f} ms   "
+          f"p99 {np.percentile(lateness, 99):6.2f} ms   max {lateness.max():6.2f} ms")
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    Config.server_port = 0xBFF + 1
+    Config.server_enabled = True
+    Config.defer_theme = False
+    bff = BFF()
+    stream = bff.create_stream("bench", 4096, shape=(8,))
+    feeder = QTimer()
+    feeder.timeout.connect(lambda: stream.push(np.random.rand(32, 8)))
+    feeder.start(10)
+    bff.window.show()
+
+    report("idle", measure_latency(seconds))
+
+    result = mp.Manager().dict()
+    client = mp.Process(target=hammer, args=(Config.server_port, seconds, connections, result))
+    client.start()
+    time.sleep(0.2) # client startup
+    lateness = measure_latency(seconds)
+    client.join()
+    report("loaded", lateness)
+    print(f"server: {result['requests'] / seconds:,.0f} req/s over {connections} connections, "
+          f"{result.get('stream_lines', 0)} stream batches")
+    feeder.stop()
+    bff.window.close()
+
+
+if __name__ == "__main__":
+    main()
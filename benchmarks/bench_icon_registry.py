@@ -0,0 +1,91 @@
+"""Stress test of the widget/icon registry in `bff.app.theming`.
+
+A list widget like the `NavBar` gets thousands of icon bearing items, then the benchmark measures:
+
+* register: `set_widget_icon` for every item (initial registration)
+* toggle:   switching the icon of a single widget back and forth, like the start/stop button does per measurement
+* theme:    `update_widgets`, re-applying the icons to all registered widgets after a theme switch
+* cleanup:  deleting the list and checking that its items left the registry
+
+`--legacy` runs the former list based registry (linear scan of all widgets per call) for comparison.
+
+Run with `python benchmarks/bench_icon_registry.py [items] [--legacy]`.
+"""
+import gc
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QPushButton
+from bff.app.startup import get_qapp
+from bff.app import theming
+
+
+class LegacyRegistry:
+    """The list based registry that has been replaced, kept here for comparison."""
+
+    def __init__(self) -> None:
+        self.map:dict[str, list] = {}
+
+    def set_widget_icon(self, icon_name:str, widget) -> None:
+        for lst in self.map.values():
+            if widget in lst:
+                lst.remove(widget)
+        widget.setIcon(theming.get_icon(name=icon_name))
+        self.map.setdefault(icon_name, []).append(widget)
+
+    def update_widgets(self) -> None:
+        for icon_name, icon in theming.__icons__.items():
+            for widget in self.map.get(icon_name, []):
+                widget.setIcon(icon)
+
+    def registered(self) -> int:
+        return sum(len(lst) for lst in self.map.values())
+
+
+def main() -> None:
+    items = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 5000
+    legacy = "--legacy" in sys.argv
+    get_qapp()
+    registry = LegacyRegistry() if legacy else None
+    set_icon = registry.set_widget_icon if registry else theming.set_widget_icon
+    update = registry.update_widgets if registry else theming.update_widgets
+    registered = registry.registered if registry else theming.registered_icon_widgets
+    names = ["home", "settings", "person", "info", "coffee"]
+    for name in names + ["play", "stop"]:
+        theming.get_icon(name)
+
+    nav = QListWidget()
+    start = time.perf_counter()
+    for i in range(items):
+        item = QListWidgetItem(f"view {i}")
+        set_icon(names[i % len(names)], item)
+        nav.addItem(item)
+    register = time.perf_counter() - start
+
+    button = QPushButton()
+    toggles = 1000
+    start = time.perf_counter()
+    for i in range(toggles):
+        set_icon("stop" if i % 2 else "play", button)
+    toggle = (time.perf_counter() - start) / toggles
+
+    start = time.perf_counter()
+    update()
+    theme = time.perf_counter() - start
+
+    before = registered()
+    nav.clear()
+    del item
+    gc.collect()
+    after = registered()
+
+    print(f"{'legacy' if legacy else 'weak'} registry, {items} items")
+    print(f"  register  {register * 1000:9.1f} ms total, {register / items * 1e6:.1f} us per item")
+    print(f"  toggle    {toggle * 1e6:9.1f} us per call")
+    print(f"  theme     {theme * 1000:9.1f} ms")
+    print(f"  cleanup   {before} -> {after} registered widgets after clearing the list")
+
+
+if __name__ == "__main__":
+    main()
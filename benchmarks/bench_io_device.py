@@ -0,0 +1,72 @@
+"""Overhead of the `bff.io` device layer, measured on `SimulatedDevice` without real time pacing.
+
+* digital output: a new task per write and closed afterwards (like `DO.send` in `tests/test_app.py`) versus the
+  pooled task of `device.digital_output`. With NI-DAQmx every new task additionally costs the driver's task setup,
+  typically milliseconds, which the simulation does not have.
+* analog input: reads of one sample versus blocks of 1000 samples into the preallocated buffer, per sample.
+* digital input: one bool per line, as `task.read()` returns them with `CHAN_PER_LINE`, versus one port word per
+  read applied to an `IOImage`.
+
+Run with `python benchmarks/bench_io_device.py [reads]`.
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+from bff.io import IOImage, SimulatedDevice
+
+
+class DI(IOImage):
+    GripperLeftUnlocked:bool
+    GripperLeftLocked:bool
+    GripperRightUnlocked:bool
+    GripperRightLocked:bool
+    GripperClosed:bool
+    GripperOpen:bool
+    HomeSwitchGripper:bool
+    Reserve_7:bool
+
+
+def timed(label:str, calls:int, function, per:str = "call", count:int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    duration = (time.perf_counter() - start) / (calls * count) * 1e6
+    print(f"{label:<36} {duration:9.3f} us/{per}")
+    return duration
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    device = SimulatedDevice("Dev2", realtime=False, seed=1)
+
+    def write_new_task() -> None:
+        with SimulatedDevice("Dev2", realtime=False) as fresh:
+            fresh.digital_output("port1/line0:3").write(0b0101)
+
+    new = timed("digital output, new task per write", calls, write_new_task)
+    output = device.digital_output("port1/line0:3")
+    pooled = timed("digital output, pooled task", calls, lambda: output.write(0b0101))
+    print(f"{'':<36} {new / pooled:9.1f} x")
+
+    single = device.analog_input("ai0:3", rate=10_000, samples=1)
+    per_sample = timed("analog input, 1 sample per read", calls, single.read, "sample")
+    block = device.analog_input("ai0:3", rate=10_000, samples=1000)
+    per_block = timed("analog input, blocks of 1000", calls // 100, block.read, "sample", 1000)
+    print(f"{'':<36} {per_sample / per_block:9.1f} x")
+
+    port = device.digital_input("port0/line0:7")
+    image = DI()
+
+    def read_lines() -> list[bool]:
+        value = port.read()
+        return [value >> i & 1 == 1 for i in range(8)]
+
+    per_line = timed("digital input, one bool per line", calls, read_lines)
+    per_word = timed("digital input, one word + IOImage", calls, lambda: image.update(port.read()))
+    print(f"{'':<36} {per_line / per_word:9.1f} x")
+    device.close()
+
+
+if __name__ == "__main__":
+    main()
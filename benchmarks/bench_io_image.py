@@ -0,0 +1,132 @@
+"""Compares the bit-packed `bff.io.IOImage` with the dataclass I/O images of `tests/test_app.py`.
+
+A 16 line input port is scanned at 10 kHz, one line flips in about 1 % of the scans. For every approach the benchmark
+reports the time per scan and the share of the 100 us scan period it uses:
+
+* dataclass: `from_array` with one bool per line, edges found by comparing every field with the previous scan
+* IOImage.from_array: the same list of bools, packed into the image
+* IOImage.update: the port read as one word (`CHAN_FOR_ALL_LINES`)
+* IOImage.scan: the port read in blocks of 1000 words, changes found with NumPy
+
+All approaches call a listener for every flipped line.
+
+Run with `python benchmarks/bench_io_image.py [scans]`.
+"""
+import dataclasses
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+import numpy as np
+from bff.io import IOImage
+
+
+@dataclasses.dataclass
+class DataclassDI:
+    GripperLeftUnlocked:bool = False
+    GripperLeftLocked:bool = False
+    GripperRightUnlocked:bool = False
+    GripperRightLocked:bool = False
+    GripperClosed:bool = False
+    GripperOpen:bool = False
+    HomeSwitchGripper:bool = False
+    Reserve_7:bool = False
+    AirPressure:bool = False
+    OpenGripperSwitch:bool = False
+    EmergencyStop:bool = False
+    Reserve_11:bool = False
+    Reserve_12:bool = False
+    Reserve_13:bool = False
+    Reserve_14:bool = False
+    Reserve_15:bool = False
+
+    def from_array(self, values:list[bool]):
+        fields: list[str] = [f.name for f in dataclasses.fields(self)]
+        for name, value in zip(fields, values):
+            setattr(self, name, value)
+
+
+class PackedDI(IOImage):
+    GripperLeftUnlocked:bool
+    GripperLeftLocked:bool
+    GripperRightUnlocked:bool
+    GripperRightLocked:bool
+    GripperClosed:bool
+    GripperOpen:bool
+    HomeSwitchGripper:bool
+    Reserve_7:bool
+    AirPressure:bool
+    OpenGripperSwitch:bool
+    EmergencyStop:bool
+    Reserve_11:bool
+    Reserve_12:bool
+    Reserve_13:bool
+    Reserve_14:bool
+    Reserve_15:bool
+
+
+def port_words(scans:int) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    flips = np.where(rng.random(scans) < 0.01, 1 << rng.integers(0, 16, scans), 0).astype(np.uint16)
+    return np.bitwise_xor.accumulate(flips)
+
+
+def bench_dataclass(words:np.ndarray, lines:list[list[bool]], on_change) -> float:
+    image = DataclassDI()
+    names = [f.name for f in dataclasses.fields(image)]
+    previous = [False] * len(names)
+    start = time.perf_counter()
+    for values in lines:
+        image.from_array(values)
+        current = [getattr(image, name) for name in names]
+        for name, old, new in zip(names, previous, current):
+            if old != new:
+                on_change(name, new)
+        previous = current
+    return time.perf_counter() - start
+
+
+def bench_from_array(words:np.ndarray, lines:list[list[bool]], on_change) -> float:
+    image = PackedDI()
+    image.on_change(None, on_change)
+    start = time.perf_counter()
+    for values in lines:
+        image.from_array(values)
+    return time.perf_counter() - start
+
+
+def bench_update(words:np.ndarray, lines:list[list[bool]], on_change) -> float:
+    image = PackedDI()
+    image.on_change(None, on_change)
+    words_list = words.tolist() # nidaqmx returns a Python int per read
+    start = time.perf_counter()
+    for word in words_list:
+        image.update(word)
+    return time.perf_counter() - start
+
+
+def bench_scan(words:np.ndarray, lines:list[list[bool]], on_change) -> float:
+    image = PackedDI()
+    image.on_change(None, on_change)
+    start = time.perf_counter()
+    for block in range(0, len(words), 1000):
+        image.scan(words[block:block + 1000])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    scans = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    words = port_words(scans)
+    bits = np.unpackbits(words.astype("<u2").view(np.uint8).reshape(-1, 2), axis=1, bitorder="little").astype(bool)
+    lines = bits.tolist()
+    print(f"{scans} scans of 16 lines, {int(np.count_nonzero(np.diff(words, prepend=0)))} changes")
+    for label, bench in [("dataclass", bench_dataclass), ("IOImage.from_array", bench_from_array),
+                         ("IOImage.update", bench_update), ("IOImage.scan", bench_scan)]:
+        events:list[tuple[str, bool]] = []
+        duration = bench(words, lines, lambda name, value: events.append((name, value)))
+        per_scan = duration / scans * 1e6
+        print(f"{label:<20} {per_scan:8.3f} us/scan   {per_scan / 100:7.2%} of a 10 kHz period   {len(events)} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compares the per-iteration overhead of the `KillableThread` modes.
+
+Each mode runs the same loop body for a fixed number of iterations:
+
+* plain:       `threading.Thread`, no cancellation at all (baseline)
+* trace:       `KillableThread` default mode, every line passes the trace function
+* cooperative: `KillableThread(cooperative=True)`, the loop checks `token.should_stop()`
+
+Run with `python benchmarks/bench_killable_thread.py [iterations]`.
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+from bff.app.killable_thread import KillableThread, CancelToken
+
+
+def process(sample:float) -> float:
+    # stands in for a little bit of per-sample processing
+    scaled = sample * 0.5
+    return scaled + 1.0
+
+
+def plain_loop(iterations:int, result:list[float]) -> None:
+    start = time.perf_counter()
+    acc = 0.0
+    for i in range(iterations):
+        acc += process(float(i))
+    result.append(time.perf_counter() - start)
+
+
+def trace_loop(iterations:int, result:list[float]) -> None:
+    plain_loop(iterations, result)
+
+
+def cooperative_loop(token:CancelToken, iterations:int, result:list[float]) -> None:
+    start = time.perf_counter()
+    acc = 0.0
+    for i in range(iterations):
+        if token.should_stop():
+            break
+        acc += process(float(i))
+    result.append(time.perf_counter() - start)
+
+
+def run(name:str, thread:threading.Thread, result:list[float], iterations:int) -> float:
+    thread.start()
+    thread.join()
+    per_iteration = result[0] / iterations * 1e9
+    print(f"{name:<12} {result[0] * 1e3:10.1f} ms {per_iteration:10.1f} ns/iteration")
+    return per_iteration
+
+
+def main(iterations:int = 1_000_000) -> None:
+    print(f"{iterations} iterations")
+    result: list[float] = []
+    plain = run("plain", threading.Thread(target=plain_loop, args=(iterations, result)), result, iterations)
+    result = []
+    trace = run("trace", KillableThread(target=trace_loop, args=(iterations, result)), result, iterations)
+    result = []
+    cooperative = run("cooperative", KillableThread(target=cooperative_loop, args=(iterations, result), cooperative=True), result, iterations)
+    print(f"trace mode:       {trace / plain:5.2f}x plain")
+    print(f"cooperative mode: {cooperative / plain:5.2f}x plain")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,78 @@
+"""Compares the direct `QueueHandler` with the `BatchingQueueHandler` of `bff.app.mp_logging`.
+
+For both modes a number of threads log a fixed number of records each and the benchmark reports:
+
+* call site: mean time a `logger.debug` call blocks the logging thread, compared to a logger with a `NullHandler`
+* throughput: records per second until the last record has been written by the listener process
+
+Run with `python benchmarks/bench_mp_logging.py [records_per_thread] [threads]`.
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+from bff.app.mp_logging import get_logger, start_logging_subprocess, stop_logging_subprocess
+
+
+def log_loop(logger:logging.Logger, records:int, result:list[float]) -> None:
+    start = time.perf_counter()
+    for i in range(records):
+        logger.debug("sample %d: %.3f", i, i * 0.5)
+    result.append(time.perf_counter() - start)
+
+
+def run(batching:bool, records:int, threads:int, log_file:str) -> tuple[float, float]:
+    log_queue, proc = start_logging_subprocess(log_file=log_file)
+    logger = get_logger(log_queue, name=f"bench.{'batching' if batching else 'direct'}", batching=batching, buffer_size=records)
+    logger.propagate = False
+    result: list[float] = []
+    workers = [threading.Thread(target=log_loop, args=(logger, records, result)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop_logging_subprocess(log_queue, proc)
+    total = time.perf_counter() - start
+    call_site = sum(result) / (records * threads)
+    return call_site, records * threads / total
+
+
+def baseline(records:int, threads:int) -> float:
+    """Call site time of creating the records only."""
+    logger = logging.getLogger("bench.null")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    result: list[float] = []
+    workers = [threading.Thread(target=log_loop, args=(logger, records, result)) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(result) / (records * threads)
+
+
+def main() -> None:
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{records} records x {threads} threads")
+        print(f"{'mode':<10} {'call site':>12} {'throughput':>16}")
+        print(f"{'null':<10} {baseline(records, threads) * 1e6:>9.2f} us")
+        for batching in (False, True):
+            log_file = os.path.join(directory, f"{'batching' if batching else 'direct'}.log")
+            call_site, throughput = run(batching, records, threads, log_file)
+            written = 0
+            for name in os.listdir(directory):
+                if name.startswith(os.path.basename(log_file)):
+                    with open(os.path.join(directory, name), encoding="utf-8") as file:
+                        written += sum(1 for _ in file)
+            print(f"{'batching' if batching else 'direct':<10} {call_site * 1e6:>9.2f} us {throughput:>10.0f} rec/s   ({written} lines written)")
+
+
+if __name__ == "__main__":
+    main()
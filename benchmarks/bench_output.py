@@ -0,0 +1,97 @@
+"""Hardware writes of digital outputs switched by several tasks, with and without `bff.io.CoalescingOutput`.
+
+Four task threads switch one output line each, about every millisecond. The hardware write is simulated and takes
+100 us. For every approach the benchmark reports the number of hardware writes, the time the tasks spent in their
+output calls and the latency from a request until its write was done:
+
+* direct: every change writes the whole image under a lock, like `DO.send` in `tests/test_app.py` (with a pooled task)
+* coalescing: `CoalescingOutput` with merge windows of 0, 1 and 5 ms
+
+Run with `python benchmarks/bench_output.py [seconds]`.
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+import numpy as np
+from bff.io import CoalescingOutput, IOImage
+
+WRITE_TIME = 100e-6
+TASKS = 4
+
+
+class DO(IOImage):
+    LockGripperLeft:bool
+    UnlockGripperLeft:bool
+    LockGripperRight:bool
+    UnlockGripperRight:bool
+
+
+def hardware_write(word:int) -> None:
+    end = time.perf_counter() + WRITE_TIME
+    while time.perf_counter() < end:
+        pass
+
+
+def run_tasks(seconds:float, request) -> list[float]:
+    """Runs the task threads, returns the time of every output call in seconds."""
+    calls:list[list[float]] = [[] for _ in range(TASKS)]
+    names = DO.names()
+
+    def task(index:int) -> None:
+        stop = time.perf_counter() + seconds
+        value = False
+        while time.perf_counter() < stop:
+            value = not value
+            start = time.perf_counter()
+            request(names[index], value)
+            calls[index].append(time.perf_counter() - start)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=task, args=(i,)) for i in range(TASKS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [duration for durations in calls for duration in durations]
+
+
+def bench_direct(seconds:float) -> None:
+    image = DO()
+    lock = threading.Lock()
+    writes = [0]
+
+    def send(name:str, value:bool) -> None:
+        with lock:
+            setattr(image, name, value)
+            hardware_write(image.value)
+            writes[0] += 1
+
+    calls = np.array(run_tasks(seconds, send)) * 1e6
+    # the write is done when the call returns
+    print(f"{'direct':<18} {len(calls):>6} requests {writes[0]:>6} writes   call p50 {np.percentile(calls, 50):7.1f} us "
+          f"p99 {np.percentile(calls, 99):8.1f} us   latency = call")
+
+
+def bench_coalescing(seconds:float, window:float) -> None:
+    output = CoalescingOutput("bench", DO(), hardware_write, window=window)
+    output.start()
+    calls = np.array(run_tasks(seconds, output.set)) * 1e6
+    output.stop()
+    stats = output.stats()
+    print(f"{f'coalescing {window * 1000:g} ms':<18} {stats.requests:>6} requests {stats.writes:>6} writes   "
+          f"call p50 {np.percentile(calls, 50):7.1f} us p99 {np.percentile(calls, 99):8.1f} us   "
+          f"latency mean {stats.mean_latency * 1000:.2f} ms max {stats.max_latency * 1000:.2f} ms, {stats.sealed} sealed")
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{TASKS} tasks switching a line every ~1 ms, {WRITE_TIME * 1e6:.0f} us per hardware write, {seconds:g} s each")
+    bench_direct(seconds)
+    for window in (0.0, 0.001, 0.005):
+        bench_coalescing(seconds, window)
+
+
+if __name__ == "__main__":
+    main()
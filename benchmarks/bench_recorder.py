@@ -0,0 +1,101 @@
+"""Throughput of `bff.app.recorder.Recorder` compared with CSV writes inside the acquisition loop.
+
+A producer writes blocks of 10 000 float64 samples to every channel at a fixed data rate, like a task reading a DAQ
+card. For every approach the benchmark reports the time the producer spends per block (the time acquisition is
+blocked), the data rate per channel that has been reached and, for the recorder, how many blocks had to be dropped.
+The data is a noisy sine, like a sensor signal.
+
+* csv: `np.savetxt` of every block into one file per channel, the way tasks write their data today
+* recorder raw / zlib: `Recorder.write`, chunks written by the writer thread without and with compression
+
+Run with `python benchmarks/bench_recorder.py [seconds] [channels] [MB/s per channel]`.
+"""
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+import numpy as np
+from bff.app.recorder import Recorder, read_meta
+
+BLOCK = 10_000
+
+
+def blocks(channels:int) -> list[np.ndarray]:
+    t = np.arange(BLOCK) / BLOCK
+    rng = np.random.default_rng(1)
+    return [np.round(np.sin(2 * np.pi * (c + 1) * t) + rng.normal(0, 0.01, BLOCK), 4) for c in range(channels)]
+
+
+def report(label:str, latencies:list[float], written:int, seconds:float, channels:int, dropped:int = 0, size:int = 0) -> None:
+    lat = np.array(latencies) * 1e6
+    rate = written * BLOCK * 8 / seconds / channels / 1e6
+    line = (f"{label:<14} p50 {np.percentile(lat, 50):9.1f} us   p99 {np.percentile(lat, 99):9.1f} us   "
+            f"max {lat.max():9.1f} us   {rate:7.1f} MB/s per channel   {dropped} dropped")
+    if size:
+        line += f"   {size / 1e6:.1f} MB on disk"
+    print(line)
+
+
+def paced(seconds:float, rate:float) -> Iterator[None]:
+    """Yields once per block period, sleeps if the producer is ahead. A producer that falls behind does not catch up."""
+    period = BLOCK * 8 / (rate * 1e6)
+    stop = time.perf_counter() + seconds
+    due = time.perf_counter()
+    while due < stop:
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield
+        due = max(due + period, time.perf_counter() - period)
+
+
+def bench_csv(directory:str, seconds:float, data:list[np.ndarray], rate:float) -> None:
+    files = [open(os.path.join(directory, f"ch{c}.csv"), "w") for c in range(len(data))]
+    latencies:list[float] = []
+    for _ in paced(seconds, rate):
+        for file, block in zip(files, data):
+            start = time.perf_counter()
+            np.savetxt(file, block)
+            latencies.append(time.perf_counter() - start)
+    for file in files:
+        file.close()
+    report("csv", latencies, len(latencies), seconds, len(data))
+
+
+def bench_recorder(directory:str, seconds:float, data:list[np.ndarray], rate:float, compression:str|None) -> None:
+    recorder = Recorder(directory, compression=compression)
+    for c in range(len(data)):
+        recorder.add_channel(f"ch{c}", "float64")
+    path = recorder.start()
+    latencies:list[float] = []
+    written = 0
+    for _ in paced(seconds, rate):
+        for c, block in enumerate(data):
+            start = time.perf_counter()
+            written += recorder.write(f"ch{c}", block)
+            latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    recorder.stop()
+    elapsed = seconds + time.perf_counter() - start # the data is only stored once the writer has caught up
+    meta = read_meta(path) # type:ignore
+    dropped = sum(channel["dropped_blocks"] for channel in meta["channels"].values())
+    size = sum(channel["stored_bytes"] for channel in meta["channels"].values())
+    report(f"recorder {compression or 'raw'}", latencies, written, elapsed, len(data), dropped, size)
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    channels = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 8.0
+    data = blocks(channels)
+    print(f"{channels} channels at {rate:g} MB/s each, blocks of {BLOCK} float64 samples ({BLOCK * 8 // 1000} kB), {seconds:g} s each")
+    with tempfile.TemporaryDirectory() as directory:
+        bench_csv(directory, seconds, data, rate)
+        bench_recorder(directory, seconds, data, rate, None)
+        bench_recorder(directory, seconds, data, rate, "zlib")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Throughput of the task-to-view data path, fed by `bff.app.replay.Replay`.
+
+Records a run of two float64 channels with `Recorder` (raw chunks), then
+
+* opens it with `RecordedRun` and reports the time and the resident memory it takes: the files are only mapped,
+* replays it at max speed into two streams of a running `BFF` (offscreen if no display is set) and reports the
+  samples per second that reached the `s_data` handlers, together with the latency of the GUI event loop,
+* replays the first seconds at 10x speed and reports how far the replayed time deviates from the wall clock.
+
+Run with `python benchmarks/bench_replay.py [MB per channel]`.
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', )))
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+from PyQt6.QtCore import QEventLoop, QTimer
+from bff.app import BFF, Config, RecordedRun
+from bff.app.recorder import Recorder
+
+RATE = 1_000_000
+BLOCK = 100_000
+
+
+def rss_mb() -> float:
+    """Resident memory of this process, Linux only."""
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def record(directory:str, mb:float) -> str:
+    recorder = Recorder(directory)
+    for name in ("a", "b"):
+        recorder.add_channel(name, "float64", rate=RATE)
+    path = recorder.start()
+    block = np.sin(np.arange(BLOCK) / 1000)
+    for _ in range(int(mb * 1e6 / (BLOCK * 8))):
+        for name in ("a", "b"):
+            while not recorder.write(name, block): # the writer is behind, a real task would drop the block
+                time.sleep(0.001)
+    recorder.stop()
+    return path # type:ignore
+
+
+def run_loop(seconds:float, until=None) -> list[float]:
+    """Runs the GUI event loop and returns the lateness of a 1 ms timer in ms."""
+    lateness:list[float] = []
+    expected = [time.perf_counter() + 0.001]
+    timer = QTimer()
+    timer.setInterval(1)
+
+    def tick() -> None:
+        now = time.perf_counter()
+        lateness.append((now - expected[0]) * 1000)
+        expected[0] = now + 0.001
+        if until is not None and until():
+            loop.quit()
+
+    timer.timeout.connect(tick)
+    timer.start()
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    timer.stop()
+    return lateness
+
+
+def main() -> None:
+    mb = float(sys.argv[1]) if len(sys.argv) > 1 else 200.0
+    Config.server_enabled = False
+    Config.defer_theme = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = record(directory, mb)
+        rss = rss_mb()
+        start = time.perf_counter()
+        run = RecordedRun(path)
+        print(f"open {2 * mb:.0f} MB: {(time.perf_counter() - start) * 1000:.2f} ms, "
+              f"{sum(len(c) for c in run.channels.values()):,} samples, {rss_mb() - rss:+.1f} MB resident")
+        run.close()
+
+        bff = BFF()
+        received = {"a": 0, "b": 0}
+        for name in received:
+            stream = bff.create_stream(name, 1_000_000)
+            stream.s_data.connect(lambda batch, name=name: received.__setitem__(name, received[name] + len(batch)))
+        bff.window.show()
+
+        replay = bff.set_replay(path, speed=None)
+        total = sum(len(c) for c in replay.run.channels.values()) # type:ignore
+        start = time.perf_counter()
+        bff.start_measurement()
+        lateness = np.array(run_loop(600, until=lambda: sum(received.values()) >= total))
+        elapsed = time.perf_counter() - start
+        bff.stop_measurement()
+        print(f"max speed: {sum(received.values()):,} samples in {elapsed:.2f} s = {sum(received.values()) / elapsed / 1e6:.1f} MS/s "
+              f"({sum(received.values()) * 8 / elapsed / 1e6:.0f} MB/s), GUI p99 {np.percentile(lateness, 99):.2f} ms")
+
+        replay = bff.set_replay(path, speed=10.0)
+        start = time.perf_counter()
+        bff.start_measurement()
+        run_loop(1.0)
+        wall = (time.perf_counter() - start) * 10.0
+        position = replay.position # type:ignore
+        bff.stop_measurement()
+        print(f"10x speed: {position:.3f} s replayed in {wall / 10:.3f} s wall clock, deviation {abs(position - wall) / wall:.2%}")
+        bff.set_replay(None)
+        bff.window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,41 @@
-from .icons import Icons
-from .theming import set_widget_icon, get_icon, Theme
-from .types import Config, DefaultViews
-from .killable_thread import KillableThread
-from .main import BFF
+import importlib
 
+from .startup import profiler, get_qapp
+
+with profiler.section("import bff.app"):
+    from .icons import Icons
+    from .theming import set_widget_icon, get_icon, Theme
+    from .types import Config, DefaultViews
+    from .killable_thread import KillableThread, CancelToken
+    from .binding import Bindings
+    from .pipeline import Pipeline, StageStats
+    from .scheduler import PeriodicScheduler, PeriodicJob
+    from .metrics import TaskMetrics, StopOverrun
+    from .main import BFF
+
+# subsystems that pull in numpy, asyncio or multiprocessing are imported on first access
+__LAZY__ = {
+    "ProcessTask": ".process_task", "TaskContext": ".process_task",
+    "AsyncLoopThread": ".async_tasks", "AsyncTask": ".async_tasks", "checkpoint": ".async_tasks",
+    "RingBuffer": ".ring_buffer", "SharedRingBuffer": ".ring_buffer",
+    "Stream": ".streaming",
+    "Recorder": ".recorder",
+    "RecordedRun": ".replay", "Replay": ".replay",
+    "ApiServer": ".http_server", "Request": ".http_server", "Response": ".http_server",
+}
+
+
+def __getattr__(name:str):
+    module = __LAZY__.get(name, None)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(__LAZY__))
+
+
+profiler.mark("bff.app imported")
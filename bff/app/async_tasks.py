@@ -0,0 +1,199 @@
+"""Runs `async def` tasks as coroutines on one shared asyncio event loop instead of one thread per task.
+
+I/O bound tasks (polling instruments, sockets, serial devices) spend most of their time waiting.
+As coroutines, hundreds of them share a single `AsyncLoopThread`.
+`AsyncTask` mirrors the interface of `KillableThread`, so `BFF` can handle all kinds of tasks the same way.
+
+Killing a task cancels it: `asyncio.CancelledError` is raised at the `await` the coroutine is currently suspended in.
+Pausing only takes effect where the coroutine awaits `checkpoint()`.
+
+:Example:
+    ```
+    async def poll_instrument():
+        reader, writer = await asyncio.open_connection("192.168.0.10", 5025)
+        while True:
+            await checkpoint()
+            writer.write(b"MEAS?\\n")
+            print(await reader.readline())
+            await asyncio.sleep(0.1)
+
+    loop = AsyncLoopThread()
+    task = AsyncTask(poll_instrument, loop)
+    task.start()
+    time.sleep(2)
+    task.kill()
+    task.join()
+    loop.stop()
+    ```
+"""
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+
+__current_task__: contextvars.ContextVar[AsyncTask] = contextvars.ContextVar("bff_async_task")
+
+
+async def checkpoint() -> None:
+    """Suspends the calling coroutine as long as its `AsyncTask` is paused. Does nothing outside of an `AsyncTask`."""
+    task = __current_task__.get(None)
+    if task is not None and task.__resume_event__ is not None:
+        await task.__resume_event__.wait()
+
+
+class AsyncLoopThread:
+    """An asyncio event loop running in a daemon thread of its own.
+    Methods:
+        start(): Starts the thread, called implicitly by `submit`.
+        submit(coroutine): Schedules a coroutine on the loop, returns a `concurrent.futures.Future`.
+        call_soon(callback): Calls a function on the loop thread.
+        stop(): Cancels all remaining tasks and stops the loop.
+    """
+    def __init__(self, name:str = "AsyncLoop") -> None:
+        self.name:str = name
+        self.loop:asyncio.AbstractEventLoop|None = None
+        self.__thread__:threading.Thread|None = None
+        self.__lock__ = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self.__thread__ is not None and self.__thread__.is_alive()
+
+    def __run__(self, started:threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set) # type:ignore
+        try:
+            self.loop.run_forever() # type:ignore
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens()) # type:ignore
+            self.loop.close() # type:ignore
+
+    def start(self) -> None:
+        with self.__lock__:
+            if self.is_running:
+                return
+            self.loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self.__thread__ = threading.Thread(target=self.__run__, args=(started,), name=self.name, daemon=True)
+            self.__thread__.start()
+            started.wait()
+
+    def submit(self, coroutine:Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """Schedules a coroutine on the loop. Starts the loop thread if necessary."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop) # type:ignore
+
+    def call_soon(self, callback:Callable[..., Any], *args) -> None:
+        """Calls a function on the loop thread, e.g. to touch objects that belong to the loop."""
+        if self.is_running:
+            self.loop.call_soon_threadsafe(callback, *args) # type:ignore
+
+    def stop(self, timeout:float|None = None) -> None:
+        """Cancels all remaining tasks, stops the loop and waits for the thread to end."""
+        if not self.is_running:
+            return
+
+        async def cancel_all() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            asyncio.get_running_loop().stop()
+
+        asyncio.run_coroutine_threadsafe(cancel_all(), self.loop) # type:ignore
+        self.__thread__.join(timeout) # type:ignore
+
+
+class AsyncTask:
+    """Runs an `async def` function on an `AsyncLoopThread`. Offers the same controls as `KillableThread`.
+    Attributes:
+        cooperative (bool): Always True, a coroutine can only be cancelled at an `await`.
+    Methods:
+        start(): Schedules the coroutine on the loop.
+        kill(): Cancels the coroutine.
+        interrupt(): Cancels the coroutine again, for coroutines that swallowed the first cancellation.
+        pause(): Suspends the coroutine on its next `checkpoint()`.
+        resume(): Resumes the coroutine if it is paused.
+        join(): Waits for the coroutine to end.
+    """
+    cooperative:bool = True
+
+    def __init__(self, target:Callable[[], Coroutine[Any, Any, Any]], loop:AsyncLoopThread, name:str|None = None) -> None:
+        self.target:Callable[[], Coroutine[Any, Any, Any]] = target
+        self.loop:AsyncLoopThread = loop
+        self.name:str = name if name is not None else getattr(target, "__name__", "AsyncTask")
+        self.__future__:concurrent.futures.Future|None = None
+        self.__task__:asyncio.Task|None = None
+        self.__resume_event__:asyncio.Event|None = None
+        self.__paused__:bool = False
+        self.__killed__:bool = False
+
+    async def __main__(self) -> None:
+        """Runs on the loop: binds the task to the context and awaits the target."""
+        __current_task__.set(self)
+        self.__task__ = asyncio.current_task()
+        if self.__killed__:
+            return
+        self.__resume_event__ = asyncio.Event()
+        if not self.__paused__:
+            self.__resume_event__.set()
+        try:
+            await self.target()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self) -> None:
+        self.__killed__ = False
+        self.__task__ = None
+        self.__future__ = self.loop.submit(self.__main__())
+
+    def kill(self) -> None:
+        """Cancels the coroutine. `asyncio.CancelledError` is raised at the `await` it is currently suspended in."""
+        self.__paused__ = False
+        self.__killed__ = True
+        # a task that has not been started by the loop yet returns right away, see `__main__`
+        if self.__task__ is not None:
+            self.loop.call_soon(self.__task__.cancel)
+
+    def interrupt(self) -> bool:
+        """Cancels the coroutine again. A coroutine that does not await anything can not be stopped at all.
+        Returns:
+            bool: True if the coroutine was still running.
+        """
+        if not self.is_alive():
+            return False
+        self.kill()
+        return True
+
+    def pause(self) -> None:
+        """Suspends the coroutine on its next `await checkpoint()`."""
+        self.__paused__ = True
+        if self.__resume_event__ is not None:
+            self.loop.call_soon(self.__resume_event__.clear)
+
+    def resume(self) -> None:
+        """Continues a paused coroutine."""
+        self.__paused__ = False
+        if self.__resume_event__ is not None:
+            self.loop.call_soon(self.__resume_event__.set)
+
+    @property
+    def is_paused(self) -> bool:
+        """True if the coroutine is requested to pause."""
+        return self.__paused__
+
+    def is_alive(self) -> bool:
+        return self.__future__ is not None and not self.__future__.done()
+
+    def join(self, timeout:float|None = None) -> None:
+        """Waits for the coroutine to end.
+        Args:
+            timeout (float | None, optional): Maximum time to wait. None waits forever.
+        """
+        if self.__future__ is None:
+            return
+        concurrent.futures.wait([self.__future__], timeout=timeout)
@@ -0,0 +1,351 @@
+"""Compact, columnar log sink with a block index for fast queries.
+
+Records are collected into blocks. Every block stores:
+
+* a small uncompressed JSON table of the logger, thread and process names used in the block,
+* the fixed fields of all records as zlib compressed columns (time, level, logger, thread, process, line),
+* the variable fields (message, arguments, exception text, module, function) as one zlib compressed chunk,
+  serialized with msgpack if it is installed and JSON otherwise.
+
+Blocks are appended to segment files. A segment is closed when it exceeds `segment_bytes`, only the newest
+`max_segments` segments are kept. Every segment has a sidecar `.idx` file with one JSON line per block holding its
+time range, levels and loggers, so a query only reads the index, seeks to the matching blocks, filters the columns
+and decompresses the variable fields of blocks that still contain matches.
+
+:Example:
+    ```
+    for record in query_logs("logs", start=time.time() - 3600, level=logging.WARNING, logger="BFF"):
+        print(format_record(record))
+    ```
+"""
+from __future__ import annotations
+import datetime
+import glob
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+SEGMENT_BYTES = 64 * 1024 * 1024  # 64 MB per segment
+MAX_SEGMENTS = 32
+BLOCK_RECORDS = 4096
+
+__MAGIC__ = b"BFLB"
+__CODEC_JSON__ = 0
+__CODEC_MSGPACK__ = 1
+# magic, codec, record count, length of the name table, the columns and the payload, first and last time stamp
+__BLOCK_HEADER__ = struct.Struct("<4sBIIIIdd")
+__COLUMNS__ = (
+    ("created", np.float64),
+    ("levelno", np.uint8),
+    ("logger", np.uint16),
+    ("thread", np.uint16),
+    ("process", np.uint16),
+    ("lineno", np.uint32),
+)
+
+
+def __pack__(payload:list, codec:int) -> bytes:
+    if codec == __CODEC_MSGPACK__:
+        return msgpack.packb(payload, use_bin_type=True, default=repr) # type:ignore
+    return json.dumps(payload, default=repr, separators=(",", ":")).encode("utf-8")
+
+
+def __unpack__(data:bytes, codec:int) -> list:
+    if codec == __CODEC_MSGPACK__:
+        if msgpack is None:
+            raise RuntimeError("The log has been written with msgpack, install it to read it")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data.decode("utf-8"))
+
+
+def __plain_args__(args:Any) -> Any:
+    """Arguments are kept as long as they are plain data, everything else is stored as its repr."""
+    if args is None or isinstance(args, (str, int, float, bool)):
+        return args
+    if isinstance(args, (list, tuple)):
+        return [__plain_args__(a) for a in args]
+    if isinstance(args, dict):
+        return {str(k): __plain_args__(v) for k, v in args.items()}
+    return repr(args)
+
+
+class BinaryLogWriter:
+    """Writes records into block compressed, indexed segment files.
+    Args:
+        directory (str): Directory of the segment files, created if necessary.
+        prefix (str, optional): File name prefix of the segments.
+        segment_bytes (int, optional): Size after which a new segment is started.
+        max_segments (int, optional): Number of segments to be kept, older ones are deleted.
+        block_records (int, optional): Number of records after which a block is written.
+        flush_interval (float, optional): Time in seconds after which `flush(force=False)` writes a partial block.
+    """
+
+    def __init__(self, directory:str, prefix:str = "bff", segment_bytes:int = SEGMENT_BYTES, max_segments:int = MAX_SEGMENTS,
+                 block_records:int = BLOCK_RECORDS, flush_interval:float = 1.0) -> None:
+        self.directory:str = directory
+        self.prefix:str = prefix
+        self.segment_bytes:int = segment_bytes
+        self.max_segments:int = max_segments
+        self.block_records:int = block_records
+        self.flush_interval:float = flush_interval
+        self.codec:int = __CODEC_MSGPACK__ if msgpack is not None else __CODEC_JSON__
+        self.__pending__:list[logging.LogRecord] = []
+        self.__last_block__:float = time.monotonic()
+        self.__segment__ = None
+        self.__index__ = None
+        os.makedirs(directory, exist_ok=True)
+        segments = list_segments(directory, prefix)
+        self.__number__:int = int(os.path.basename(segments[-1]).rsplit("-", 1)[1].split(".")[0]) if segments else 0
+        self.__open_segment__()
+
+    def __open_segment__(self) -> None:
+        self.__number__ += 1
+        path = os.path.join(self.directory, f"{self.prefix}-{self.__number__:06d}.seg")
+        self.__segment__ = open(path, "ab")
+        self.__index__ = open(path[:-4] + ".idx", "a", encoding="utf-8")
+        for old in list_segments(self.directory, self.prefix)[:-self.max_segments]:
+            for file in (old, old[:-4] + ".idx"):
+                if os.path.exists(file):
+                    os.remove(file)
+
+    def __close_segment__(self) -> None:
+        if self.__segment__ is not None:
+            self.__segment__.close()
+            self.__index__.close() # type:ignore
+            self.__segment__ = self.__index__ = None
+
+    def write(self, record:logging.LogRecord) -> None:
+        """Adds a record to the current block. Writes the block when it is full."""
+        self.__pending__.append(record)
+        if len(self.__pending__) >= self.block_records:
+            self.__write_block__()
+
+    def flush(self, force:bool = True) -> None:
+        """Writes the pending records as a block.
+        Args:
+            force (bool, optional): If False, the block is only written if `flush_interval` has elapsed since the last one.
+        """
+        if not self.__pending__:
+            return
+        if force or time.monotonic() - self.__last_block__ >= self.flush_interval:
+            self.__write_block__()
+
+    def close(self) -> None:
+        self.flush()
+        self.__close_segment__()
+
+    def __write_block__(self) -> None:
+        records, self.__pending__ = self.__pending__, []
+        self.__last_block__ = time.monotonic()
+        tables:dict[str, dict[str, int]] = {"loggers": {}, "threads": {}, "processes": {}}
+
+        def key(table:str, name:str|None) -> int:
+            ids = tables[table]
+            return ids.setdefault(name or "", len(ids))
+
+        columns = {
+            "created": [r.created for r in records],
+            "levelno": [min(max(r.levelno, 0), 255) for r in records],
+            "logger": [key("loggers", r.name) for r in records],
+            "thread": [key("threads", r.threadName) for r in records],
+            "process": [key("processes", r.processName) for r in records],
+            "lineno": [r.lineno or 0 for r in records],
+        }
+        column_bytes = zlib.compress(b"".join(np.asarray(columns[name], dtype=dtype).tobytes() for name, dtype in __COLUMNS__))
+        payload = [
+            [r.msg if isinstance(r.msg, str) else str(r.msg), __plain_args__(r.args), r.exc_text, r.module, r.funcName]
+            for r in records
+        ]
+        payload_bytes = zlib.compress(__pack__(payload, self.codec))
+        meta_bytes = json.dumps({name: list(ids) for name, ids in tables.items()}).encode("utf-8")
+        t_min, t_max = min(columns["created"]), max(columns["created"])
+        header = __BLOCK_HEADER__.pack(__MAGIC__, self.codec, len(records), len(meta_bytes), len(column_bytes), len(payload_bytes), t_min, t_max)
+        offset = self.__segment__.tell() # type:ignore
+        self.__segment__.write(header + meta_bytes + column_bytes + payload_bytes) # type:ignore
+        self.__segment__.flush() # type:ignore
+        levels = sorted(set(columns["levelno"]))
+        self.__index__.write(json.dumps({ # type:ignore
+            "offset": offset, "count": len(records), "t_min": t_min, "t_max": t_max,
+            "levels": levels, "loggers": list(tables["loggers"]),
+        }) + "\n")
+        self.__index__.flush() # type:ignore
+        if self.__segment__.tell() >= self.segment_bytes: # type:ignore
+            self.__close_segment__()
+            self.__open_segment__()
+
+
+class BinaryLogHandler(logging.Handler):
+    """Logging handler that writes into a `BinaryLogWriter`. Used by the log listener process.
+    `flush` only writes a partial block when the flush interval of the writer has elapsed, `close` writes everything.
+    """
+
+    def __init__(self, directory:str, **options) -> None:
+        super().__init__()
+        self.writer = BinaryLogWriter(directory, **options)
+
+    def emit(self, record:logging.LogRecord) -> None:
+        try:
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            self.writer.write(record)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self.writer.flush(force=False)
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.writer.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def list_segments(directory:str, prefix:str = "bff") -> list[str]:
+    """Returns the paths of all segments in the directory, oldest first."""
+    return sorted(glob.glob(os.path.join(glob.escape(directory), f"{prefix}-*.seg")))
+
+
+def read_index(segment:str) -> list[dict[str, Any]]:
+    """Returns the block index of a segment. Rebuilds it from the block headers if the `.idx` file is missing."""
+    index_path = segment[:-4] + ".idx"
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.endswith("\n")]
+    blocks = []
+    with open(segment, "rb") as file:
+        while True:
+            offset = file.tell()
+            header = file.read(__BLOCK_HEADER__.size)
+            if len(header) < __BLOCK_HEADER__.size:
+                break
+            magic, _, count, meta_len, columns_len, payload_len, t_min, t_max = __BLOCK_HEADER__.unpack(header)
+            if magic != __MAGIC__:
+                break
+            meta = json.loads(file.read(meta_len))
+            columns = __read_columns__(file.read(columns_len), count)
+            file.seek(payload_len, os.SEEK_CUR)
+            blocks.append({
+                "offset": offset, "count": count, "t_min": t_min, "t_max": t_max,
+                "levels": sorted(set(columns["levelno"].tolist())), "loggers": meta["loggers"],
+            })
+    return blocks
+
+
+def __read_columns__(data:bytes, count:int) -> dict[str, np.ndarray]:
+    raw = zlib.decompress(data)
+    columns = {}
+    position = 0
+    for name, dtype in __COLUMNS__:
+        size = np.dtype(dtype).itemsize * count
+        columns[name] = np.frombuffer(raw, dtype=dtype, count=count, offset=position)
+        position += size
+    return columns
+
+
+def __logger_matches__(name:str, logger:str) -> bool:
+    return name == logger or name.startswith(logger + ".")
+
+
+def query_logs(directory:str, start:float|None = None, end:float|None = None, level:int = logging.NOTSET,
+               logger:str|None = None, contains:str|None = None, limit:int|None = None, prefix:str = "bff") -> Iterator[dict[str, Any]]:
+    """Yields the records of a binary log that match all given filters, oldest first.
+    Blocks are skipped based on the index, records based on the columns. Only the variable fields of blocks with
+    matching records are decompressed.
+    Args:
+        directory (str): Directory of the segment files.
+        start (float | None, optional): Earliest time stamp (seconds since the epoch).
+        end (float | None, optional): Latest time stamp (seconds since the epoch).
+        level (int, optional): Minimum level.
+        logger (str | None, optional): Logger name, includes its children.
+        contains (str | None, optional): Text the message has to contain.
+        limit (int | None, optional): Maximum number of records.
+        prefix (str, optional): File name prefix of the segments.
+    Yields:
+        dict[str, Any]: The fields of a record, with `message` already formatted.
+    """
+    found = 0
+    for segment in list_segments(directory, prefix):
+        blocks = [
+            block for block in read_index(segment)
+            if (start is None or block["t_max"] >= start)
+            and (end is None or block["t_min"] <= end)
+            and (not block["levels"] or max(block["levels"]) >= level)
+            and (logger is None or any(__logger_matches__(name, logger) for name in block["loggers"]))
+        ]
+        if not blocks:
+            continue
+        with open(segment, "rb") as file:
+            for block in blocks:
+                file.seek(block["offset"])
+                magic, codec, count, meta_len, columns_len, payload_len, _, _ = __BLOCK_HEADER__.unpack(file.read(__BLOCK_HEADER__.size))
+                if magic != __MAGIC__:
+                    break
+                meta = json.loads(file.read(meta_len))
+                columns = __read_columns__(file.read(columns_len), count)
+                mask = columns["levelno"] >= level
+                if start is not None:
+                    mask &= columns["created"] >= start
+                if end is not None:
+                    mask &= columns["created"] <= end
+                if logger is not None:
+                    ids = [i for i, name in enumerate(meta["loggers"]) if __logger_matches__(name, logger)]
+                    mask &= np.isin(columns["logger"], ids)
+                rows = np.flatnonzero(mask)
+                if not len(rows):
+                    continue
+                payload = __unpack__(zlib.decompress(file.read(payload_len)), codec)
+                for row in rows:
+                    msg, args, exc_text, module, func_name = payload[row]
+                    message = msg
+                    if args:
+                        try:
+                            message = msg % (tuple(args) if isinstance(args, list) else args)
+                        except (TypeError, ValueError):
+                            message = f"{msg} {args}"
+                    if contains is not None and contains not in message:
+                        continue
+                    yield {
+                        "created": float(columns["created"][row]),
+                        "levelno": int(columns["levelno"][row]),
+                        "levelname": logging.getLevelName(int(columns["levelno"][row])),
+                        "name": meta["loggers"][columns["logger"][row]],
+                        "threadName": meta["threads"][columns["thread"][row]],
+                        "processName": meta["processes"][columns["process"][row]],
+                        "lineno": int(columns["lineno"][row]),
+                        "module": module,
+                        "funcName": func_name,
+                        "message": message,
+                        "exc_text": exc_text,
+                    }
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+
+def format_record(record:dict[str, Any]) -> str:
+    """Formats a queried record like the text log does."""
+    created = datetime.datetime.fromtimestamp(record["created"]).isoformat(sep=" ", timespec="milliseconds")
+    text = f"{created} {record['processName']} {record['threadName']} {record['levelname']} {record['name']}: {record['message']}"
+    if record["exc_text"]:
+        text += "\n" + record["exc_text"]
+    return text
@@ -0,0 +1,174 @@
+"""Latest-value bindings from tasks to widgets.
+
+A signal per update puts one event per emit into the GUI's event queue, even if only the last value is ever seen,
+as with a status label updated at 100 Hz. `Bindings` keeps one slot per name instead: tasks overwrite the value of
+the slot from any thread, and a single `QTimer` in the GUI thread pushes the values that changed since its last
+tick to the bound widgets. The GUI does at most one update per widget and tick, no matter how often the value was
+set, and the event queue does not grow with the update rate or the number of bindings.
+
+Setting a value is a dictionary lookup and two assignments, no lock and no Qt call. A tick only compares a version
+number per binding.
+
+:Example:
+    ```
+    app.bindings.bind("pressure", pressure_label, "{:.2f} bar".format)
+    app.bindings.bind("ready", ready_checkbox)
+    app.bindings.bind("progress", lambda value: progress_bar.setValue(int(value * 100)))
+
+    @app.register_measurement_task
+    def acquire():
+        while True:
+            app.bindings.set("pressure", read_pressure())
+    ```
+"""
+from __future__ import annotations
+import itertools
+from collections.abc import Callable
+from typing import Any
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSlot
+from PyQt6.QtWidgets import QWidget
+
+
+__NOTHING__ = object()
+# values of these types can not change in place, one equal to the shown one needs no update
+__IMMUTABLE__ = (bool, int, float, str, bytes, type(None))
+
+
+class __Slot__:
+    """The latest value of a name and its version, written by tasks, read by the GUI."""
+    __slots__ = ("value", "version")
+
+    def __init__(self) -> None:
+        self.value:Any = None
+        self.version:int = 0
+
+
+class __Target__:
+    """A widget or function bound to a slot, with the version and value it has shown last."""
+    __slots__ = ("update", "widget", "version", "shown")
+
+    def __init__(self, update:Callable[[Any], None], widget:QWidget|None) -> None:
+        self.update:Callable[[Any], None] = update
+        self.widget:QWidget|None = widget
+        self.version:int = 0
+        self.shown:Any = __NOTHING__
+
+
+def __widget_setter__(widget:QWidget, format:Callable[[Any], str]) -> Callable[[Any], None]:
+    """The function that shows a value on a widget: text for labels and line edits, state for checkable widgets,
+    the value for progress bars, sliders and spin boxes, and `display` for LCD numbers."""
+    if hasattr(widget, "isCheckable") and widget.isCheckable(): # type:ignore
+        return lambda value: widget.setChecked(bool(value)) # type:ignore
+    if hasattr(widget, "setText"):
+        return lambda value: widget.setText(format(value)) # type:ignore
+    if hasattr(widget, "setValue"):
+        return widget.setValue # type:ignore
+    if hasattr(widget, "display"):
+        return widget.display # type:ignore
+    raise TypeError(f"{type(widget).__name__} can not be bound, pass a function that updates it")
+
+
+class Bindings(QObject):
+    """Latest-value slots that tasks write and a GUI timer pushes to the bound widgets, see the module documentation.
+    Attributes:
+        ticks (int): Timer ticks so far.
+        pushes (int): Updates of bound widgets and functions so far.
+    """
+    def __init__(self, interval_ms:int = 50, parent:QObject|None = None) -> None:
+        super().__init__(parent)
+        self.ticks:int = 0
+        self.pushes:int = 0
+        self.__values__:dict[str, __Slot__] = {}
+        self.__targets__:dict[str, list[__Target__]] = {}
+        # versions are unique across all slots and threads, `next` of a count is atomic
+        self.__versions__ = itertools.count(1)
+        self.__timer__ = QTimer(self)
+        self.__timer__.setInterval(interval_ms)
+        self.__timer__.timeout.connect(self.push)
+
+    @property
+    def interval_ms(self) -> int:
+        """Time between two pushes in milliseconds, the maximum update rate of a widget is `1000 / interval_ms`."""
+        return self.__timer__.interval()
+
+    @interval_ms.setter
+    def interval_ms(self, value:int) -> None:
+        self.__timer__.setInterval(value)
+
+    def __slot__(self, name:str) -> __Slot__:
+        slot = self.__values__.get(name, None)
+        if slot is None:
+            slot = self.__values__.setdefault(name, __Slot__())
+        return slot
+
+    def set(self, name:str, value:Any) -> None:
+        """Sets the latest value of a name. Can be called from any thread, never waits for the GUI."""
+        slot = self.__values__.get(name, None) or self.__slot__(name)
+        slot.value = value
+        slot.version = next(self.__versions__)
+
+    def get(self, name:str, default:Any = None) -> Any:
+        """The latest value of a name, `default` if it has never been set."""
+        slot = self.__values__.get(name, None)
+        return default if slot is None or not slot.version else slot.value
+
+    def bind(self, name:str, target:QWidget|Callable[[Any], None], format:Callable[[Any], str] = str) -> None:
+        """Binds a widget or a function to a name. Has to be called from the GUI thread.
+        The current value, if any, is shown with the next tick. Bindings of deleted widgets are removed.
+        Args:
+            name (str): The name the tasks `set`.
+            target (QWidget | Callable[[Any], None]): A label, line edit, checkable button, progress bar, slider,
+                spin box or LCD number, or a function called with the value in the GUI thread.
+            format (Callable[[Any], str], optional): Turns the value into the text of labels and line edits.
+        Raises:
+            TypeError: If the widget type is not supported.
+        """
+        self.__slot__(name)
+        if isinstance(target, QWidget):
+            bound = __Target__(__widget_setter__(target, format), target)
+        else:
+            bound = __Target__(target, None)
+        self.__targets__.setdefault(name, []).append(bound)
+        if not self.__timer__.isActive():
+            self.__timer__.start()
+
+    def unbind(self, name:str, target:QWidget|Callable[[Any], None]|None = None) -> None:
+        """Removes the binding of a widget or function to a name, or all bindings of the name if `target` is None."""
+        targets = self.__targets__.get(name, [])
+        self.__targets__[name] = [t for t in targets if target is not None and target not in (t.widget, t.update)]
+        if not self.__targets__[name]:
+            del self.__targets__[name]
+        if not self.__targets__:
+            self.__timer__.stop()
+
+    @pyqtSlot()
+    def push(self) -> None:
+        """Shows the values that changed since the last tick. Called by the timer."""
+        self.ticks += 1
+        deleted:list[tuple[str, __Target__]] = []
+        for name, targets in self.__targets__.items():
+            slot = self.__values__[name]
+            version = slot.version
+            for target in targets:
+                if target.version == version:
+                    continue
+                target.version = version
+                value = slot.value
+                # a mutable value may be the same object as the shown one with new content, e.g. a reused buffer
+                if type(value) in __IMMUTABLE__ and type(value) is type(target.shown) and value == target.shown:
+                    continue
+                try:
+                    target.update(value)
+                except RuntimeError:
+                    # the C++ object of the widget has been deleted
+                    if target.widget is None:
+                        raise
+                    deleted.append((name, target))
+                    continue
+                target.shown = value
+                self.pushes += 1
+        for name, target in deleted:
+            self.__targets__[name].remove(target)
+            if not self.__targets__[name]:
+                del self.__targets__[name]
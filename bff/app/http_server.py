@@ -0,0 +1,469 @@
+"""Embedded HTTP/JSON API for remote control and telemetry.
+
+The server runs on the asyncio loop of the application (`BFF.async_loop`), not in the GUI thread. Requests never
+touch Qt objects directly: commands like starting a measurement are forwarded to the GUI thread with queued signals,
+status requests only read snapshots of the task registries, and the views are looked up by the GUI thread that owns them. Live stream data is pushed to the clients by
+the `Stream` they subscribed to, one chunk per drained batch, so a slow client can never block the GUI.
+
+Every endpoint is registered with `ApiServer.route`, its docstring is shown on the auto-generated `/docs` page.
+
+The server is off by default (`Config.server_enabled`). It can start and stop the measurement, so requests from a
+browser must not reach it: requests whose `Host` is not local (or in `Config.server_allowed_hosts`) are rejected,
+which defeats DNS rebinding, as are requests with a foreign `Origin`. POST requests need the content type
+`application/json`, which a cross-site form or "simple request" can not send. With `Config.server_token` set, every
+`/api` request has to send it as `Authorization: Bearer <token>`.
+
+:Example:
+    ```
+    curl http://127.0.0.1:3071/api/status
+    curl -X POST -H "Content-Type: application/json" http://127.0.0.1:3071/api/measurement/start
+    curl -N http://127.0.0.1:3071/api/streams/pressure      # newline delimited JSON, one line per batch
+    ```
+"""
+from __future__ import annotations
+import asyncio
+import dataclasses
+import hmac
+import html
+import inspect
+import json
+import logging
+import time
+import typing
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+from PyQt6.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from bff.app.types import Config
+
+if typing.TYPE_CHECKING:
+    from bff.app.main import BFF
+
+
+__REASONS__ = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+               404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+               415: "Unsupported Media Type", 500: "Internal Server Error", 503: "Service Unavailable"}
+__MAX_BODY__ = 1 << 20
+__MAX_QUEUE__ = 1024    # largest `max_queue` of a stream subscription
+__LOCAL_HOSTS__ = ("localhost", "127.0.0.1", "::1")
+__GUI_TIMEOUT__ = 2.0   # seconds a request waits for an answer of the GUI thread
+
+
+@dataclasses.dataclass
+class Request:
+    method:str
+    path:str
+    query:dict[str, str]
+    headers:dict[str, str]
+    body:bytes
+    params:dict[str, str] = dataclasses.field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+@dataclasses.dataclass
+class Response:
+    status:int = 200
+    body:bytes = b""
+    content_type:str = "application/json"
+    # an async iterator of chunks turns the response into a chunked stream
+    stream:typing.AsyncIterator[bytes]|None = None
+
+    @classmethod
+    def json(cls, data:Any, status:int = 200) -> Response:
+        return cls(status, json.dumps(data, default=__to_json__).encode("utf-8"))
+
+    @classmethod
+    def error(cls, status:int, message:str) -> Response:
+        return cls.json({"error": message}, status=status)
+
+
+def __to_json__(value:Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class PayloadTooLarge(Exception):
+    def __init__(self, length:int) -> None:
+        super().__init__(f"Request body of {length} bytes exceeds the limit of {__MAX_BODY__} bytes.")
+
+
+Handler = Callable[..., Awaitable[Response]]
+
+
+class ApiServer(QObject):
+    """HTTP/1.1 server with JSON endpoints, running on the asyncio loop of a `BFF` application.
+    Signals:
+        s_request_measurement (bool): Queued to `BFF.request_measurement` in the GUI thread.
+        s_request_views (object): Queued to the GUI thread, which answers with a snapshot of the views.
+    """
+    s_request_measurement = pyqtSignal(bool)
+    s_request_views = pyqtSignal(object)
+
+    def __init__(self, app:BFF, host:str|None = None, port:int|None = None) -> None:
+        super().__init__()
+        self.app:BFF = app
+        self.host:str = host if host is not None else Config.server_host
+        self.port:int = port if port is not None else Config.server_port
+        self.routes:list[tuple[str, list[str], Handler]] = []
+        self.requests:int = 0
+        self.__server__:asyncio.AbstractServer|None = None
+        self.s_request_measurement.connect(app.request_measurement, Qt.ConnectionType.QueuedConnection)
+        self.s_request_views.connect(self.__snapshot_views__, Qt.ConnectionType.QueuedConnection)
+        self.__register_default_routes__()
+
+    @property
+    def is_running(self) -> bool:
+        return self.__server__ is not None
+
+    def route(self, method:str, path:str) -> Callable[[Handler], Handler]:
+        """Registers an endpoint. Path segments in braces are passed to the handler as `request.params`.
+        :Example:
+            ```
+            @server.route("GET", "/api/streams/{name}")
+            async def stream(request:Request) -> Response: ...
+            ```
+        """
+        def decorator(handler:Handler) -> Handler:
+            self.routes.append((method.upper(), path.strip("/").split("/"), handler))
+            return handler
+        return decorator
+
+    def start(self) -> None:
+        """Starts listening. Errors, e.g. a port that is already in use, are logged and leave the application running."""
+        future = self.app.async_loop.submit(asyncio.start_server(self.__handle_connection__, self.host, self.port))
+        try:
+            self.__server__ = future.result(timeout=5.0)
+        except Exception as e:
+            logging.getLogger("BFF").error("HTTP server could not be started on %s:%s: %s", self.host, self.port, e)
+
+    def stop(self) -> None:
+        server, self.__server__ = self.__server__, None
+        if server is None:
+            return
+
+        async def close() -> None:
+            server.close()
+            await server.wait_closed()
+
+        try:
+            self.app.async_loop.submit(close()).result(timeout=Config.kill_grace_period)
+        except Exception:
+            pass # open streams are cancelled together with the loop
+
+    # ------------------------------------------------------------------ protocol
+
+    def __match__(self, method:str, path:str) -> tuple[Handler|None, dict[str, str], bool]:
+        """Returns the handler, the path parameters and whether the path exists for any method."""
+        segments = path.strip("/").split("/")
+        path_found = False
+        for route_method, pattern, handler in self.routes:
+            if len(pattern) != len(segments):
+                continue
+            params = {}
+            for expected, segment in zip(pattern, segments):
+                if expected.startswith("{") and expected.endswith("}"):
+                    params[expected[1:-1]] = unquote(segment)
+                elif expected != segment:
+                    break
+            else:
+                path_found = True
+                if route_method == method:
+                    return handler, params, True
+        return None, {}, path_found
+
+    async def __read_request__(self, reader:asyncio.StreamReader) -> Request|None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            return None
+        if length > __MAX_BODY__:
+            raise PayloadTooLarge(length)
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return Request(method.upper(), url.path, query, headers, body)
+
+    async def __handle_connection__(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self.__read_request__(reader)
+                except PayloadTooLarge as e:
+                    await self.__write_response__(writer, Response.error(413, str(e)), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                response = await self.__dispatch__(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self.__write_response__(writer, response, keep_alive)
+                if not keep_alive or response.stream is not None:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def __allowed_hosts__(self) -> set[str]:
+        hosts = set(__LOCAL_HOSTS__) | set(Config.server_allowed_hosts)
+        if self.host not in ("", "0.0.0.0", "::"):
+            hosts.add(self.host)
+        return hosts
+
+    def __reject__(self, request:Request) -> Response|None:
+        """Checks host, origin, content type and token of a request, returns the error response if it is refused."""
+        host = urlsplit(f"//{request.headers.get('host', '')}").hostname
+        if host not in self.__allowed_hosts__():
+            return Response.error(403, f"host '{request.headers.get('host', '')}' is not allowed")
+        origin = request.headers.get("origin", None)
+        if origin is not None and origin != f"http://{request.headers['host']}":
+            return Response.error(403, f"cross-origin requests from '{origin}' are not allowed")
+        if request.method == "POST" and request.headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            return Response.error(415, "POST requests need the content type application/json")
+        if Config.server_token is not None and (request.path == "/api" or request.path.startswith("/api/")):
+            if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {Config.server_token}"):
+                return Response.error(401, "missing or wrong token, send 'Authorization: Bearer <token>'")
+        return None
+
+    async def __dispatch__(self, request:Request) -> Response:
+        rejected = self.__reject__(request)
+        if rejected is not None:
+            return rejected
+        handler, params, path_found = self.__match__(request.method, request.path)
+        if handler is None:
+            return Response.error(405 if path_found else 404, f"{request.method} {request.path} is not available, see /docs")
+        request.params = params
+        try:
+            return await handler(request)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            return Response.error(400, str(e))
+        except Exception as e:
+            return Response.error(500, f"{type(e).__name__}: {e}")
+
+    async def __write_response__(self, writer:asyncio.StreamWriter, response:Response, keep_alive:bool) -> None:
+        head = [f"HTTP/1.1 {response.status} {__REASONS__.get(response.status, '')}",
+                f"Content-Type: {response.content_type}",
+                f"Connection: {'keep-alive' if keep_alive and response.stream is None else 'close'}"]
+        if response.stream is None:
+            head.append(f"Content-Length: {len(response.body)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+            await writer.drain()
+            return
+        head += ["Transfer-Encoding: chunked", "Cache-Control: no-cache"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        try:
+            async for chunk in response.stream:
+                writer.write(f"{len(chunk):X}\r\n".encode("latin-1") + chunk + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            await response.stream.aclose() # type:ignore
+
+    # ------------------------------------------------------------------ endpoints
+
+    def __task_status__(self, tasks:dict) -> list[dict[str, Any]]:
+        running = set(self.app.__get_running_tasks__(dict(tasks)))
+        return [
+            {
+                "name": getattr(function, "__name__", str(function)),
+                "running": function in running,
+                "paused": bool(getattr(task, "is_paused", False)) if function in running else False,
+                "type": type(task).__name__,
+            }
+            for function, task in list(tasks.items())
+        ]
+
+    @pyqtSlot(object)
+    def __snapshot_views__(self, reply:Callable[[dict[str, Any]], None]) -> None:
+        """Runs in the GUI thread, which loads and unloads the views, and hands a snapshot of them to `reply`."""
+        window = self.app.window
+        names = list(dict.fromkeys(list(window.views) + list(window.__view_factories__)))
+        reply({
+            "current": window.__current_view__,
+            "views": [{"name": name, "built": name in window.views} for name in names],
+        })
+
+    async def __gui_views__(self) -> dict[str, Any]|None:
+        """Asks the GUI thread for a snapshot of the views. None if it does not answer within `__GUI_TIMEOUT__`."""
+        loop = asyncio.get_running_loop()
+        future:asyncio.Future[dict[str, Any]] = loop.create_future()
+
+        def resolve(snapshot:dict[str, Any]) -> None:
+            if not future.done():
+                future.set_result(snapshot)
+
+        def reply(snapshot:dict[str, Any]) -> None:
+            try:
+                loop.call_soon_threadsafe(resolve, snapshot)
+            except RuntimeError:
+                pass # the loop has been closed in the meantime
+
+        self.s_request_views.emit(reply)
+        try:
+            return await asyncio.wait_for(future, __GUI_TIMEOUT__)
+        except asyncio.TimeoutError:
+            return None
+
+    def __register_default_routes__(self) -> None:
+        route = self.route
+
+        @route("GET", "/")
+        @route("GET", "/docs")
+        async def docs(request:Request) -> Response:
+            """This page."""
+            return Response(200, self.__docs_page__().encode("utf-8"), content_type="text/html; charset=utf-8")
+
+        @route("GET", "/api")
+        async def api(request:Request) -> Response:
+            """All endpoints as JSON."""
+            return Response.json([
+                {"method": method, "path": "/" + "/".join(pattern), "description": inspect.getdoc(handler) or ""}
+                for method, pattern, handler in self.routes
+            ])
+
+        @route("GET", "/api/status")
+        async def status(request:Request) -> Response:
+            """Application name and version, measurement state and the state of all tasks."""
+            return Response.json({
+                "app": Config.app_name,
+                "version": Config.version,
+                "measurement_running": self.app.is_running,
+                "background_tasks": self.__task_status__(self.app.__bg_tasks__),
+                "measurement_tasks": self.__task_status__(self.app.__m_tasks__),
+                "periodic_jobs": [
+                    {"name": job.name, "period": job.period, "runs": job.stats.runs, "overruns": job.stats.overruns}
+                    for job in list(self.app.periodic_jobs.values())
+                ],
+            })
+
+        @route("GET", "/api/tasks")
+        async def tasks(request:Request) -> Response:
+            """State of the background and measurement tasks."""
+            return Response.json({
+                "background": self.__task_status__(self.app.__bg_tasks__),
+                "measurement": self.__task_status__(self.app.__m_tasks__),
+            })
+
+        @route("GET", "/api/metrics")
+        async def metrics(request:Request) -> Response:
+            """Health and timing metrics of all tasks: starts, uptime, CPU time, rate, kill latency and errors."""
+            return Response.json({name: dataclasses.asdict(m) for name, m in self.app.metrics().items()})
+
+        @route("POST", "/api/measurement/start")
+        async def start_measurement(request:Request) -> Response:
+            """Requests the start of the measurement. The request is queued to the GUI thread, poll /api/status for the result."""
+            if self.app.is_running:
+                return Response.error(409, "measurement is already running")
+            self.s_request_measurement.emit(True)
+            return Response.json({"requested": "start"}, status=202)
+
+        @route("POST", "/api/measurement/stop")
+        async def stop_measurement(request:Request) -> Response:
+            """Requests the stop of the measurement. The request is queued to the GUI thread, poll /api/status for the result."""
+            self.s_request_measurement.emit(False)
+            return Response.json({"requested": "stop"}, status=202)
+
+        @route("GET", "/api/views")
+        async def views(request:Request) -> Response:
+            """Names of all registered views, whether they are built and which one is shown."""
+            snapshot = await self.__gui_views__()
+            if snapshot is None:
+                return Response.error(503, "the GUI thread did not answer in time")
+            return Response.json(snapshot)
+
+        @route("POST", "/api/views/{name}")
+        async def show_view(request:Request) -> Response:
+            """Shows the view with the given name in the main window."""
+            self.app.s_show_view.emit(request.params["name"])
+            return Response.json({"requested": request.params["name"]}, status=202)
+
+        @route("GET", "/api/streams")
+        async def streams(request:Request) -> Response:
+            """All streams with their sample type and counters."""
+            return Response.json([
+                {"name": name, "dtype": str(stream.buffer.dtype), "shape": list(stream.buffer.shape),
+                 "samples": stream.samples, "batches": stream.batches, "dropped": stream.dropped}
+                for name, stream in self.app.streams.items()
+            ])
+
+        @route("GET", "/api/streams/{name}")
+        async def stream(request:Request) -> Response:
+            """Live data of a stream as chunked newline delimited JSON, one line `{"t": time, "data": [...]}` per batch.
+            Query parameter `max_queue` (1 to 1024, default 64): batches buffered for this client, older ones are dropped if it is too slow.
+            """
+            stream = self.app.streams.get(request.params["name"], None)
+            if stream is None:
+                return Response.error(404, f"unknown stream '{request.params['name']}'")
+            max_queue = int(request.query.get("max_queue", 64))
+            if not 1 <= max_queue <= __MAX_QUEUE__:
+                return Response.error(400, f"max_queue has to be between 1 and {__MAX_QUEUE__}")
+            return Response(200, content_type="application/x-ndjson", stream=self.__subscribe__(stream, max_queue))
+
+    async def __subscribe__(self, stream, max_queue:int) -> typing.AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        queue:asyncio.Queue[tuple[float, np.ndarray]] = asyncio.Queue(max_queue)
+
+        def push(t:float, batch:np.ndarray) -> None:
+            if queue.full():
+                queue.get_nowait() # drop the oldest batch of a slow client
+            queue.put_nowait((t, batch))
+
+        def on_data(batch:np.ndarray) -> None:
+            # runs in the GUI thread: only copy the batch, the loop serializes it, so the GUI does not pay per client
+            loop.call_soon_threadsafe(push, time.time(), batch.copy())
+
+        # direct: the proxy of a plain function would live in the loop thread, which runs no Qt event loop
+        stream.s_data.connect(on_data, Qt.ConnectionType.DirectConnection)
+        try:
+            while True:
+                t, batch = await queue.get()
+                yield json.dumps({"t": t, "data": batch.tolist()}).encode("utf-8") + b"\n"
+        finally:
+            stream.s_data.disconnect(on_data)
+
+    def __docs_page__(self) -> str:
+        rows = []
+        for method, pattern, handler in self.routes:
+            path = html.escape("/" + "/".join(pattern))
+            description = html.escape(inspect.getdoc(handler) or "").replace("\n", "<br>")
+            rows.append(f"<tr><td><code>{method}</code></td><td><code>{path}</code></td><td>{description}</td></tr>")
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(Config.app_name)} API</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 2em; }}
+    table {{ border-collapse: collapse; width: 100%; }}
+    th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; vertical-align: top; }}
+</style></head>
+<body>
+<h1>{html.escape(Config.app_name)} {html.escape(Config.version)} - HTTP API</h1>
+<p>All endpoints answer with JSON. Commands are executed asynchronously by the application and answer with 202.
+POST requests need the header <code>Content-Type: application/json</code>.</p>
+<table><tr><th>Method</th><th>Path</th><th>Description</th></tr>
+{chr(10).join(rows)}
+</table></body></html>"""
@@ -7,6 +7,7 @@ class Icons(enum.Enum):
     LIGHT_MODE = "light_mode"
     DARK_MODE = "dark_mode"
     MENU = "menu"
+    MONITORING = "monitoring"
     PERSON = "person"
     PLAY = "play"
     ROBOT = "robot"
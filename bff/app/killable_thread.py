@@ -26,26 +26,125 @@ Do not provide an `on_kill` handler if no action is required.
     th.join()
     ```
 
+Tracing every line is not for free though: the default mode installs `sys.settrace` in the thread, which slows down
+tight loops several times. Tasks that can check for cancellation themselves should use the cooperative mode instead.
+The target then receives a `CancelToken` as first argument and is responsible for calling `should_stop()`,
+`checkpoint()` or `sleep()` regularly. Nothing is traced, so there is no per-line overhead.
+If a cooperative task does not react in time, `interrupt()` raises an exception asynchronously inside the thread.
+
+:Example:
+    ```
+    def runner(token:CancelToken):
+        while not token.should_stop():
+            print(time.time())
+            token.sleep(1)
+
+    th = KillableThread(target=runner, cooperative=True)
+    th.start()
+    time.sleep(2)
+    th.kill()
+    th.join(timeout=1)
+    if th.is_alive():
+        th.interrupt()
+    ```
+
 * Current implementation was inspired by this post (https://www.geeksforgeeks.org/python-different-ways-to-kill-a-thread/)
 """
     
 from __future__ import annotations
+import ctypes
+import functools
 import sys
 import threading
 from typing import Callable, Iterable, Mapping, Any, List
 
 
+class TaskCancelled(SystemExit):
+    """Raised by `CancelToken.checkpoint` when the task has been requested to stop.
+    Derives from `SystemExit`, so an uncaught instance ends the thread silently.
+    """
+
+
+class CancelToken:
+    """Cooperative cancellation handle for tasks running in a `KillableThread`.
+    A token costs nothing unless it is asked, so tasks decide themselves how often they check it.
+    Methods:
+        should_stop(): Returns True if the task has been requested to stop. Blocks while paused.
+        checkpoint(): Raises `TaskCancelled` if the task has been requested to stop. Blocks while paused.
+        sleep(seconds): Sleeps, but wakes up immediately when the task is requested to stop.
+    """
+    def __init__(self) -> None:
+        self.__cancelled__:bool = False
+        self.__paused__:bool = False
+        self.__cancel_event__ = threading.Event()
+        self.__resume_event__ = threading.Event()
+        self.__resume_event__.set()
+
+    def cancel(self) -> None:
+        """Requests the task to stop. A paused task is resumed so that it can notice the request."""
+        self.__cancelled__ = True
+        self.__cancel_event__.set()
+        self.__resume_event__.set()
+
+    def pause(self) -> None:
+        """Lets the task block on its next call to `should_stop`, `checkpoint` or `sleep`."""
+        self.__resume_event__.clear()
+        self.__paused__ = True
+
+    def resume(self) -> None:
+        """Releases a paused task."""
+        self.__paused__ = False
+        self.__resume_event__.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True if the task has been requested to stop."""
+        return self.__cancelled__
+
+    @property
+    def is_paused(self) -> bool:
+        """True if the task is requested to pause."""
+        return self.__paused__
+
+    def should_stop(self) -> bool:
+        """Returns True if the task has been requested to stop. Blocks as long as the task is paused."""
+        if self.__paused__:
+            self.__resume_event__.wait()
+        return self.__cancelled__
+
+    def checkpoint(self) -> None:
+        """Raises `TaskCancelled` if the task has been requested to stop. Blocks as long as the task is paused."""
+        if self.should_stop():
+            raise TaskCancelled()
+
+    def sleep(self, seconds:float) -> bool:
+        """Sleeps for the given time or until the task is requested to stop, whatever comes first.
+        Args:
+            seconds (float): Time to sleep in seconds.
+        Returns:
+            bool: True if the task has been requested to stop.
+        """
+        if self.__cancel_event__.wait(seconds):
+            return True
+        return self.should_stop()
+
+
 class KillableThread(threading.Thread):
     """A thread class that supports being killed and paused.
     This class extends the standard `threading.Thread` class to add functionality
     for pausing and killing the thread. When a thread is killed, it will stop
     execution before executing the next line of code. When a thread is paused,
     it will wait until it is resumed.
+    In cooperative mode no trace function is installed. The target is called with the threads `CancelToken`
+    as first argument and has to check it on its own.
     Attributes:
         on_kill (Callable | None): Optional callback to be executed when the thread is killed.
+        cooperative (bool): True if the thread runs in cooperative mode.
+        cancel_token (CancelToken): The token that is handed over to the target in cooperative mode.
     Methods:
         start(): Starts the thread.
         kill(): Requests the thread to be killed.
+        interrupt(): Raises an exception asynchronously inside the thread.
         pause(): Pauses the thread.
         resume(): Resumes the thread if it is paused.
         is_paused(): Returns whether the thread is currently paused.
@@ -55,7 +154,13 @@ class KillableThread(threading.Thread):
                  on_kill: Callable|None = None,
                  name: str | None = None,
                  group: None = None, 
-                 *args, **kwargs):
+                 *args, 
+                 cooperative: bool = False,
+                 **kwargs):
+        self.cancel_token = CancelToken()
+        self.cooperative:bool = cooperative
+        if cooperative and target is not None:
+            target = functools.partial(target, self.cancel_token)
         super().__init__(group, target, name, *args, **kwargs, daemon=True)
         self.__killed__:bool = False
         self.__paused__:bool = False
@@ -63,6 +168,13 @@ class KillableThread(threading.Thread):
         self.on_kill:Callable|None = on_kill
         
     def __run__(self):
+        if self.cooperative:
+            try:
+                self.__run_backup__()
+            finally:
+                if self.__killed__ and self.on_kill is not None:
+                    self.on_kill()
+            return
         sys.settrace(self.__globaltrace__)
         self.__run_backup__()
         self.run = self.__run_backup__
@@ -88,20 +200,44 @@ class KillableThread(threading.Thread):
         threading.Thread.start(self)
     
     def kill(self):
-        """Requests the thread to be killed. The Thread will stop execution before executing next line of code."""
+        """Requests the thread to be killed. The Thread will stop execution before executing next line of code.
+        In cooperative mode the `CancelToken` is cancelled and the target is expected to return on its next check.
+        """
         self.__resume_event__.set() # in case thread is paused
         self.__killed__ = True
+        self.cancel_token.cancel()
+
+    def interrupt(self, exception:type[BaseException] = SystemExit) -> bool:
+        """Raises the given exception asynchronously inside the thread. Fallback for tasks that do not react on `kill`.
+        The exception is delivered as soon as the thread executes Python bytecode again,
+        a thread that is blocked inside a C call will not notice it before the call returns.
+        Args:
+            exception (type[BaseException], optional): The exception to be raised inside the thread.
+        Returns:
+            bool: True if the exception has been scheduled, False if the thread is not running.
+        """
+        if not self.is_alive() or self.ident is None:
+            return False
+        self.kill()
+        modified = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(self.ident), ctypes.py_object(exception))
+        if modified > 1:
+            # more than one thread state was affected, revert to be on the safe side
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(self.ident), None)
+            raise SystemError(f"Failed to interrupt thread '{self.name}'")
+        return modified == 1
         
     def pause(self):
         """Pauses the execution of the threads activity before the next line."""
         
         self.__resume_event__.clear()
         self.__paused__ = True
+        self.cancel_token.pause()
         
     def resume(self):
         """Continuues the execution of the thread right there where it was paused."""
         self.__resume_event__.set()
         self.__paused__ = False
+        self.cancel_token.resume()
         
     @property
     def is_paused(self) -> bool:
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import sys
+import time
 import typing
-import markdown
+import functools
+import inspect
 from collections.abc import Callable
 from PyQt6.QtGui import QIcon, QAction, QDesktopServices, QKeySequence
 from PyQt6.QtCore import (
@@ -31,17 +33,36 @@ from PyQt6.QtWidgets import (
     QTextBrowser,
     QSpacerItem,
     QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
 )
 
 
-from bff.app.theming import get_icon, apply_theme, set_widget_icon, Theme
+from bff.app.theming import get_icon, apply_theme, set_widget_icon, precompile_themes, Theme
 from bff.app.icons import Icons
 from bff.app.types import Config, DefaultViews
 from bff.app.killable_thread import KillableThread
-from bff.app.mp_logging import get_logger, start_logging_subprocess
+from bff.app.binding import Bindings
+from bff.app.pipeline import Pipeline
+from bff.app.scheduler import PeriodicScheduler, PeriodicJob
+from bff.app.metrics import TaskMetrics, TaskMonitor, StopOverrun
+from bff.app.startup import profiler, get_qapp
 import logging
 
-__qapp__ = QApplication(sys.argv)
+if typing.TYPE_CHECKING:
+    # subsystems that pull in numpy, asyncio or multiprocessing are imported when they are first used
+    from bff.app.process_task import ProcessTask
+    from bff.app.async_tasks import AsyncLoopThread, AsyncTask
+    from bff.app.streaming import Stream
+    from bff.app.recorder import Recorder
+    from bff.app.replay import Replay
+    from bff.app.http_server import ApiServer
+    from bff.io.device import DigitalOutput
+    from bff.io.image import IOImage
+    from bff.io.output import CoalescingOutput
+
+    TaskHandle = KillableThread | ProcessTask | AsyncTask
 
 
 class Exceptions:
@@ -58,6 +79,22 @@ class Exceptions:
             functions_str = ", ".join(functions)
             super().__init__(f"Following functions are already running: {functions_str}")
 
+    class StreamAlreadyRegistered(Exception):
+        def __init__(self, stream_name:str) -> None:
+            super().__init__(f"A Stream with the name '{stream_name}' is already registered")
+
+    class PipelineAlreadyRegistered(Exception):
+        def __init__(self, pipeline_name:str) -> None:
+            super().__init__(f"A Pipeline with the name '{pipeline_name}' is already registered")
+
+    class OutputAlreadyRegistered(Exception):
+        def __init__(self, output_name:str) -> None:
+            super().__init__(f"An Output with the name '{output_name}' is already registered")
+
+    class UnknownExecutor(Exception):
+        def __init__(self, executor:str) -> None:
+            super().__init__(f"Unknown executor '{executor}', expected 'thread' or 'process'")
+
 
 class ActionWithTooltip(QAction):
     def setToolTip(self, tip: str|None):
@@ -101,6 +138,7 @@ class AboutView(QWidget):
         """)
         self.text_browser.setOpenExternalLinks(True)  # Make links clickable
         # Convert Markdown to HTML
+        import markdown # only needed by this view, which is built on demand
         markdown_text = sys.modules["__main__"].__doc__ if sys.modules["__main__"].__doc__ else """ - """
         html = markdown.markdown(markdown_text, extensions=["tables"])
         # add minimal CSS styling
@@ -118,7 +156,7 @@ class AboutView(QWidget):
         button_urls = [
             ("Find Me On Bitbucket", Config.repository, "storage"),
             ("Get Help", Config.docu_depot, "help"),
-            ("About HTTP server", f"http://127.0.0.1:{Config.server_port}/docs", "api"),
+            ("About HTTP server", f"http://{Config.server_host}:{Config.server_port}/docs", "api"),
         ]
         button_layout = QVBoxLayout()
         for label, url, icon in button_urls:
@@ -143,6 +181,52 @@ class AboutView(QWidget):
         QDesktopServices.openUrl(QUrl(url))
 
 
+class DiagnosticsView(QWidget):
+    """Table of the `TaskMetrics` of all tasks, refreshed once per second while the view is visible."""
+    COLUMNS = ["Task", "Group", "Executor", "State", "Starts", "Uptime", "CPU", "Rate", "Kill latency", "Interrupts", "Errors", "Last error"]
+
+    def __init__(self, controller:BFF):
+        super().__init__()
+        self.controller:BFF = controller
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False) # type:ignore
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents) # type:ignore
+        self.table.horizontalHeader().setStretchLastSection(True) # type:ignore
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.__timer__ = QTimer(self)
+        self.__timer__.setInterval(1000)
+        self.__timer__.timeout.connect(self.refresh)
+
+    @pyqtSlot()
+    def refresh(self) -> None:
+        metrics = list(self.controller.metrics().values())
+        self.table.setRowCount(len(metrics))
+        for row, m in enumerate(metrics):
+            cells = [
+                m.name, m.group, m.executor, m.state, str(m.starts),
+                f"{m.uptime:.1f} s",
+                f"{m.cpu_time:.2f} s" if m.cpu_time is not None else "-",
+                f"{m.rate:.1f} /s" if m.group.startswith("periodic") else "-",
+                f"{m.kill_latency * 1000:.1f} ms" if m.kill_latency is not None else "-",
+                str(m.interrupts), str(m.errors), m.last_error or "",
+            ]
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+    def showEvent(self, event) -> None: # type:ignore
+        self.refresh()
+        self.__timer__.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None: # type:ignore
+        self.__timer__.stop()
+        super().hideEvent(event)
+
+
 class ToolBar(QToolBar):
 
     def __init__(self, parent=None, theme:Theme=Theme.LIGHT):
@@ -207,6 +291,12 @@ class ToolBar(QToolBar):
             set_widget_icon(Icons.LIGHT_MODE.value, self.btn_change_theme)
         self.addAction(self.btn_change_theme)
 
+        self.diagnostics_button = ActionWithTooltip(DefaultViews.DIAGNOSTICS.value, self)
+        self.diagnostics_button.setShortcut("Ctrl+Shift+d")
+        self.diagnostics_button.setToolTip("Show Task Diagnostics")
+        self.addAction(self.diagnostics_button)
+        set_widget_icon(Icons.MONITORING.value, self.diagnostics_button)
+
         self.about_button = ActionWithTooltip(DefaultViews.ABOUT.value, self)
         self.about_button.setShortcut("Ctrl+Shift+i")
         self.about_button.setToolTip("About The Project")
@@ -264,6 +354,17 @@ class MainWindow(QMainWindow):
 
         self.views:dict[str, QWidget] = {}
         self.views_stack = QStackedWidget()
+        self.__view_factories__:dict[str, Callable[[], QWidget]] = {}
+        self.__view_unload_after__:dict[str, float] = {}
+        self.__view_last_shown__:dict[str, float] = {}
+        self.__current_view__:str|None = None
+        self.__prefetch_queue__:list[str] = []
+        self.__prefetch_timer__ = QTimer(self)
+        self.__prefetch_timer__.setInterval(Config.view_prefetch_interval_ms)
+        self.__prefetch_timer__.timeout.connect(self.__prefetch_next_view__)
+        self.__unload_timer__ = QTimer(self)
+        self.__unload_timer__.setInterval(Config.view_unload_check_ms)
+        self.__unload_timer__.timeout.connect(self.__unload_idle_views__)
         # self.view_changed_event_handlers:dict[str, Callable[[str], None]] = {}
         self.setWindowTitle(f"{Config.app_name} - {sys.modules["__main__"].__file__.split('\\')[-1]}") #type:ignore
         self.setWindowIcon(QIcon(get_icon(Icons.ROBOT.value)))
@@ -282,11 +383,14 @@ class MainWindow(QMainWindow):
         self.addToolBar(Qt.ToolBarArea.TopToolBarArea, self.toolbar)
         
         self.register_view(name=DefaultViews._404.value, widget=_404View())
-        self.register_view(name=DefaultViews.ABOUT.value, widget=AboutView())
+        self.register_view(name=DefaultViews.ABOUT.value, factory=AboutView)
+        self.register_view(name=DefaultViews.DIAGNOSTICS.value, factory=lambda: DiagnosticsView(self.controller))
         
         # start eventlistener on the page
         self.installEventFilter(self)
-        apply_theme(__qapp__, theme=Theme.LIGHT)
+        self.__first_paint_done__:bool = False
+        if not Config.defer_theme:
+            apply_theme(get_qapp(), theme=self.theme)
 
         self.controller.s_measurement_disabled.connect(self.toolbar.start_stop_button.setDisabled)
         self.controller.s_measurement_running.connect(self.on_update_start_stop_button)
@@ -316,11 +420,20 @@ class MainWindow(QMainWindow):
     def on_show_view(self, name:str) -> None:
         """Shows the view with the given name in the main window.
         If the view is not registered, it will show the 404 view.   
+        Lazily registered views are built on their first selection.
         Args:
             name (str): The name of the view to be shown.
         """
         widget: QWidget | None = self.views.get(name, None)
+        if widget is None and name in self.__view_factories__:
+            widget = self.__build_view__(name)
+        # inactivity of a view counts from the moment it is left
+        now = time.monotonic()
+        if self.__current_view__ is not None:
+            self.__view_last_shown__[self.__current_view__] = now
+        self.__current_view__ = name if widget else None
         if widget:
+            self.__view_last_shown__[name] = now
             idx: int = self.views_stack.indexOf(widget)
             self.views_stack.setCurrentIndex(idx)
             self.toolbar.view_name.setText(name)
@@ -351,26 +464,86 @@ class MainWindow(QMainWindow):
                 else:
                     icon, self.theme, tooltip = "dark_mode", Theme.LIGHT, "Switch To Dark Mode"
                 set_widget_icon(icon_name=icon, widget=self.toolbar.btn_change_theme)
-                apply_theme(__qapp__, theme=self.theme)
+                apply_theme(get_qapp(), theme=self.theme)
                 self.toolbar.btn_change_theme.setToolTip(tooltip)
             
             case _:
                 self.on_show_view(name=action.text())
 
-    def register_view(self, name:str, widget:QWidget, icon:str = Icons.ROBOT.value, on_show:Callable[[str], None]|None = None) -> None:
+    def register_view(self, name:str, widget:QWidget|None = None, icon:str = Icons.ROBOT.value, on_show:Callable[[str], None]|None = None,
+                      factory:Callable[[], QWidget]|None = None, prefetch:bool = False, unload_after:float|None = None) -> None:
         """Adds a view to the navigation bar. When the item is selected, the given controls will be shown in the body.
+        Heavy views should be registered with a `factory` instead of a `widget`, they are built the first time they are selected.
         Args:
             name (str): The view name.
-            widget (QWidget): QWidget to be displayed when the view is selected.
+            widget (QWidget | None, optional): QWidget to be displayed when the view is selected.
             icon (str, optional): The icon to be displayed in the navigation bar for this view.
+            factory (Callable[[], QWidget] | None, optional): Builds the widget on demand, replaces `widget`.
+            prefetch (bool, optional): Builds a lazy view in the background once the window is shown, one view per timer tick.
+            unload_after (float | None, optional): Destroys a lazy view that has not been visible for this many seconds.
+                It is built again by the factory when it is selected the next time.
+        Raises:
+            Exceptions.ViewAlreadyRegistered: If a view with the same name already exists.
+            ValueError: If not exactly one of `widget` and `factory` is given.
         """
-        if name in self.views.keys():
+        if name in self.views.keys() or name in self.__view_factories__:
             raise Exceptions.ViewAlreadyRegistered(name)
-        self.views[name] = widget
-        self.views_stack.addWidget(self.views[name])
+        if (widget is None) == (factory is None):
+            raise ValueError("Either a widget or a factory has to be given for a view")
+        if widget is not None:
+            self.views[name] = widget
+            self.views_stack.addWidget(self.views[name])
+        else:
+            self.__view_factories__[name] = factory # type:ignore
+            if prefetch:
+                self.__prefetch_queue__.append(name)
+                if self.isVisible():
+                    self.__prefetch_timer__.start()
+            if unload_after is not None:
+                self.__view_unload_after__[name] = unload_after
+                self.__unload_timer__.start()
         if name not in [v.value for v in DefaultViews]:
             self.nav_bar.register_item(name, icon)
 
+    def __build_view__(self, name:str) -> QWidget:
+        """Builds a lazily registered view and adds it to the stack."""
+        with profiler.section(f"view {name}"):
+            widget = self.__view_factories__[name]()
+        self.views[name] = widget
+        self.views_stack.addWidget(widget)
+        self.__view_last_shown__[name] = time.monotonic()
+        return widget
+
+    @pyqtSlot()
+    def __prefetch_next_view__(self) -> None:
+        """Builds the next view waiting for prefetching. Only one per tick, so the event loop stays responsive."""
+        while self.__prefetch_queue__:
+            name = self.__prefetch_queue__.pop(0)
+            if name not in self.views:
+                self.__build_view__(name)
+                return
+        self.__prefetch_timer__.stop()
+
+    def unload_view(self, name:str) -> bool:
+        """Destroys the widget of a lazily registered view to free its memory. The view stays registered.
+        Returns:
+            bool: False if the view is not built, is currently visible or has been registered without a factory.
+        """
+        widget = self.views.get(name, None)
+        if widget is None or name not in self.__view_factories__ or widget is self.views_stack.currentWidget():
+            return False
+        self.views_stack.removeWidget(widget)
+        del self.views[name]
+        widget.deleteLater()
+        return True
+
+    @pyqtSlot()
+    def __unload_idle_views__(self) -> None:
+        now = time.monotonic()
+        for name, timeout in self.__view_unload_after__.items():
+            if name != self.__current_view__ and now - self.__view_last_shown__.get(name, now) >= timeout:
+                self.unload_view(name)
+
     def show_view(self, name:str) -> None:
         self.controller.s_show_view.emit(name)
 
@@ -393,11 +566,26 @@ class MainWindow(QMainWindow):
             event (QShowEvent): The show event.
         """
         self.controller.start_up()
+        if self.__prefetch_queue__:
+            self.__prefetch_timer__.start()
     
+    @pyqtSlot()
+    def __after_first_paint__(self) -> None:
+        """Applies the deferred theme once the window is on screen and prints the startup trace."""
+        if Config.defer_theme:
+            apply_theme(get_qapp(), theme=self.theme)
+        if Config.precompile_themes:
+            precompile_themes()
+        profiler.finish()
+
     def eventFilter(self, object: QObject, event: QEvent) -> bool: # type:ignore
         """Event filter to handle mouse events on the main window.
         This method is used to hide the navigation bar when the mouse is clicked outside of it.
         """
+        if event.type() == QEvent.Type.Paint and not self.__first_paint_done__:
+            self.__first_paint_done__ = True
+            profiler.mark("first paint")
+            QTimer.singleShot(0, self.__after_first_paint__)
         if event.type() == QEvent.Type.MouseButtonPress:
             if self.nav_bar.isVisible():
                 # Get mouse position relative to NavBar
@@ -416,21 +604,51 @@ class MainWindow(QMainWindow):
 
     def run(self):
         self.show()
-        sys.exit(__qapp__.exec())
+        sys.exit(get_qapp().exec())
 
 
 class BFF(QObject):
+    # time a task gets after its forced termination, and the polling interval while stopping
+    __FORCE_GRACE__:float = 0.2
+    __STOP_POLL__:float = 0.005
     s_measurement_disabled = pyqtSignal(bool)
     s_measurement_running = pyqtSignal(bool)
     s_show_view = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, profile_startup:bool = False):
+        """
+        Args:
+            profile_startup (bool, optional): Prints a startup trace to stderr after the first paint of the main window,
+                see `bff.app.startup`. Can also be enabled with the environment variable `BFF_PROFILE_STARTUP=1`.
+        """
+        if profile_startup:
+            profiler.enabled = True
+        get_qapp()
         super().__init__()
         # self.window_controller = UIController(self)
-        self.window = MainWindow(self)
-
-        self.__bg_tasks__:dict[Callable[[], None], KillableThread] = {}
-        self.__m_tasks__:dict[Callable[[], None], KillableThread] = {}
+        with profiler.section("MainWindow"):
+            self.window = MainWindow(self)
+
+        self.__bg_tasks__:dict[Callable[..., None], TaskHandle] = {}
+        self.__m_tasks__:dict[Callable[..., None], TaskHandle] = {}
+        self.__task_options__:dict[Callable[..., None], dict[str, typing.Any]] = {}
+        self.__streams__:dict[str, Stream] = {}
+        self.__pipelines__:dict[str, tuple[Pipeline, bool]] = {}
+        self.__outputs__:dict[str, CoalescingOutput] = {}
+        # latest values set by tasks, shown on the bound widgets at most every `Config.binding_interval_ms`
+        self.bindings = Bindings(Config.binding_interval_ms, parent=self)
+        self.scheduler = PeriodicScheduler(workers=Config.scheduler_workers)
+        self.__periodic_tasks__:dict[Callable[[], None], tuple[float, bool]] = {}
+        self.__periodic_jobs__:dict[Callable[[], None], PeriodicJob] = {}
+        self.__task_monitors__:dict[Callable[..., None], TaskMonitor] = {}
+        # tasks that exceeded their stop budget during the last stop
+        self.stop_overruns:list[StopOverrun] = []
+        # created on first use, see the properties of the same name
+        self.__async_loop__:AsyncLoopThread|None = None
+        self.__server__:ApiServer|None = None
+        self.__recorder__:Recorder|None = None
+        # replaces the measurement tasks while set, see `set_replay`
+        self.replay:Replay|None = None
         self.__on_start_measurement__:Callable[[], None]|None = None
         self.__on_stop_measurement__:Callable[[], None]|None = None
         self.__on_startup__:Callable[[], None]|None = None
@@ -442,48 +660,328 @@ class BFF(QObject):
         """Returns True if the application is currently running, otherwise False."""
         return self.__measurement_running__
 
-    def __register_task__(self, function:Callable[[], None], tasks:dict[Callable[[], None], KillableThread]) -> Callable[[], None]:
+    @property
+    def async_loop(self) -> AsyncLoopThread:
+        """The asyncio loop shared by `async def` tasks and the HTTP server, created on first use."""
+        if self.__async_loop__ is None:
+            from bff.app.async_tasks import AsyncLoopThread
+            self.__async_loop__ = AsyncLoopThread()
+        return self.__async_loop__
+
+    @property
+    def server(self) -> ApiServer:
+        """The HTTP/JSON API, see `bff.app.http_server`. Created on first use, started on start up if `Config.server_enabled`."""
+        if self.__server__ is None:
+            from bff.app.http_server import ApiServer
+            self.__server__ = ApiServer(self)
+        return self.__server__
+
+    @property
+    def recorder(self) -> Recorder:
+        """Records the channels added with `recorder.add_channel` while the measurement is running, created on first use."""
+        if self.__recorder__ is None:
+            from bff.app.recorder import Recorder
+            self.__recorder__ = Recorder(Config.record_directory, compression=Config.record_compression)
+        return self.__recorder__
+
+    def __register_task__(self, function:Callable[..., None], tasks:dict[Callable[..., None], TaskHandle], **options) -> Callable[..., None]:
         """Registers a function as a task in the given dictionary.
-        This method checks if the function is already registered, and if not, adds it to the dictionary with a new `KillableThread`.
+        This method checks if the function is already registered, and if not, adds it to the dictionary with a new `KillableThread`, `ProcessTask` or `AsyncTask`.
         Args:
-            function (Callable[[], None]): The function to be registered as a task.
-            tasks (dict[Callable[[], None], KillableThread]): The dictionary to register the task in.
+            function (Callable[..., None]): The function to be registered as a task.
+            tasks (dict[Callable[..., None], TaskHandle]): The dictionary to register the task in.
+            **options: Options used to create the tasks thread, see `__create_task__`.
             Raises:
                 Exceptions.TaskAlreadyDefined: If the function is already registered as a task.
                 Returns:
-                    Callable[[], None]: The registered function.
+                    Callable[..., None]: The registered function.
         """
         if function in tasks.keys():
             raise Exceptions.TaskAlreadyDefined(function=function)
-        tasks[function] = KillableThread(target=function)
+        if options.get("executor", "thread") not in ("thread", "process"):
+            raise Exceptions.UnknownExecutor(options["executor"])
+        self.__task_options__[function] = options
+        if inspect.iscoroutinefunction(function):
+            executor = "async"
+        elif options.get("executor", "thread") == "process":
+            executor = "process"
+        else:
+            executor = "cooperative thread" if options.get("cooperative", False) else "thread"
+        group = "background" if tasks is self.__bg_tasks__ else "measurement"
+        self.__task_monitors__[function] = TaskMonitor(function.__name__, group, executor)
+        tasks[function] = self.__create_task__(function)
         return function
+
+    def __create_task__(self, function:Callable[..., None]) -> TaskHandle:
+        """Creates a new (not yet started) thread, worker process or coroutine task for the given task, according to the options it was registered with."""
+        options = self.__task_options__.get(function, {})
+        if options.get("executor", "thread") == "process" and not inspect.iscoroutinefunction(function):
+            from bff.app.process_task import ProcessTask
+            # the target has to be picklable, the end of a process is recorded when it is joined
+            return ProcessTask(target=function, on_result=options.get("on_result", None))
+        target = self.__task_monitors__[function].instrument(function)
+        if inspect.iscoroutinefunction(function):
+            from bff.app.async_tasks import AsyncTask
+            return AsyncTask(target=target, loop=self.async_loop)
+        return KillableThread(target=target, cooperative=options.get("cooperative", False))
     
-    def register_background_task(self, function:Callable[[], None]) -> Callable[[], None]:
+    def register_background_task(self, function:Callable[..., None]|None = None, *,
+                                 cooperative:bool = False,
+                                 executor:str = "thread",
+                                 on_result:Callable[[typing.Any], None]|None = None,
+                                 stop_timeout:float|None = None) -> typing.Any:
         """Decorator to mark a function as a background task.
         This decorator allows you to define a function that will be executed in the background. 
         The function will be started when the application starts.
+        Can be used as `@app.register_background_task` or with options as `@app.register_background_task(cooperative=True)`.
+        `async def` functions run as coroutines on the shared asyncio loop (`async_loop`), the options apart from `stop_timeout` do not apply to them.
+        They are cancelled on stop and can await `bff.app.async_tasks.checkpoint()` to support pausing.
         Args:
             function (Callable[[]]): The function to be decorated as a background task.
+            cooperative (bool, optional): If True, the function receives a `CancelToken` as first argument and
+                has to check it regularly. No trace function is installed, so there is no per-line overhead.
+            executor (str, optional): "thread" (default) or "process". With "process" the function runs in a worker process
+                and receives a `TaskContext` to check for kill/pause requests and to `send()` results, see `bff.app.process_task`.
+            on_result (Callable[[Any], None] | None, optional): Receives the results sent by a task running in a process.
+            stop_timeout (float | None, optional): Time the task gets to stop before it is given up (threads) or killed (processes),
+                defaults to `Config.task_stop_timeout`. See `__stop_tasks__`.
             Raises:
+                Exceptions.UnknownExecutor: If the executor is neither "thread" nor "process".
                 Exceptions.BackgroundTaskAlreadyDefined: If the function is already registered as a background task.
             Returns:
                 Callable[[], None]: The decorated function.
         """
-        return self.__register_task__(function = function, tasks = self.__bg_tasks__)
+        options = dict(cooperative=cooperative, executor=executor, on_result=on_result, stop_timeout=stop_timeout)
+        if function is None:
+            return functools.partial(self.register_background_task, **options)
+        return self.__register_task__(function = function, tasks = self.__bg_tasks__, **options)
     
-    def register_measurement_task(self, function:Callable[[], None]) -> Callable[[], None]:
+    def register_measurement_task(self, function:Callable[..., None]|None = None, *,
+                                  cooperative:bool = False,
+                                  executor:str = "thread",
+                                  on_result:Callable[[typing.Any], None]|None = None,
+                                  stop_timeout:float|None = None) -> typing.Any:
         """Decorator to mark a function as a measurement task.
         This decorator allows you to define a function that will be executed as a measurement task. 
         The function will be started when the measurement is started.
+        Can be used as `@app.register_measurement_task` or with options as `@app.register_measurement_task(cooperative=True)`.
+        `async def` functions run as coroutines on the shared asyncio loop (`async_loop`), the options apart from `stop_timeout` do not apply to them.
+        They are cancelled on stop and can await `bff.app.async_tasks.checkpoint()` to support pausing.
         Args:
             function (Callable[[]]): The function to be decorated as a measurement task.
+            cooperative (bool, optional): If True, the function receives a `CancelToken` as first argument and
+                has to check it regularly. No trace function is installed, so there is no per-line overhead.
+            executor (str, optional): "thread" (default) or "process". With "process" the function runs in a worker process
+                and receives a `TaskContext` to check for kill/pause requests and to `send()` results, see `bff.app.process_task`.
+            on_result (Callable[[Any], None] | None, optional): Receives the results sent by a task running in a process.
+            stop_timeout (float | None, optional): Time the task gets to stop before it is given up (threads) or killed (processes),
+                defaults to `Config.task_stop_timeout`. See `__stop_tasks__`.
             Raises:
+                Exceptions.UnknownExecutor: If the executor is neither "thread" nor "process".
                 Exceptions.MeasurementTaskAlreadyDefined: If the function is already registered as a measurement task.
         Returns:    
             None
         """
-        return self.__register_task__(function = function, tasks = self.__m_tasks__)
+        options = dict(cooperative=cooperative, executor=executor, on_result=on_result, stop_timeout=stop_timeout)
+        if function is None:
+            return functools.partial(self.register_measurement_task, **options)
+        return self.__register_task__(function = function, tasks = self.__m_tasks__, **options)
     
+    def register_periodic_task(self, function:Callable[[], None]|None = None, *, period:float, background:bool = False) -> typing.Any:
+        """Decorator to mark a function as a periodic task, e.g. `@app.register_periodic_task(period=0.1)`.
+        The function is called every `period` seconds by the shared `PeriodicScheduler` instead of looping in a thread of its own.
+        Due times are absolute, so there is no drift, and a run that takes longer than the period skips the next tick.
+        Jitter and overrun statistics are available through `periodic_jobs` and `metrics`.
+        Args:
+            function (Callable[[], None]): The function to be called periodically, it performs a single iteration and returns.
+            period (float): Period in seconds.
+            background (bool, optional): If True, the task runs from start up to shut down like a background task,
+                otherwise it runs while the measurement is running.
+        Raises:
+            Exceptions.TaskAlreadyDefined: If the function is already registered as a periodic task.
+        Returns:
+            Callable[[], None]: The decorated function.
+        """
+        if function is None:
+            return functools.partial(self.register_periodic_task, period=period, background=background)
+        if function in self.__periodic_tasks__:
+            raise Exceptions.TaskAlreadyDefined(function=function)
+        self.__periodic_tasks__[function] = (period, background)
+        group = "periodic background" if background else "periodic measurement"
+        self.__task_monitors__[function] = TaskMonitor(function.__name__, group, "periodic")
+        return function
+
+    @property
+    def periodic_jobs(self) -> dict[str, PeriodicJob]:
+        """The currently scheduled periodic tasks by name, gives access to their timing statistics."""
+        return {job.name: job for job in self.__periodic_jobs__.values()}
+
+    def __start_periodic_tasks__(self, background:bool) -> None:
+        for function, (period, is_background) in self.__periodic_tasks__.items():
+            if is_background == background and function not in self.__periodic_jobs__:
+                self.__task_monitors__[function].started()
+                self.__periodic_jobs__[function] = self.scheduler.add(function, period)
+
+    def __stop_periodic_tasks__(self, background:bool, deadline:float) -> list[StopOverrun]:
+        """Removes the periodic tasks from the scheduler and waits for their current runs to finish, at most until `deadline`.
+        Returns:
+            list[StopOverrun]: The jobs whose current run did not finish in time.
+        """
+        start = time.perf_counter()
+        functions = [f for f in self.__periodic_jobs__ if self.__periodic_tasks__[f][1] == background]
+        jobs = [self.__periodic_jobs__.pop(f) for f in functions]
+        for function, job in zip(functions, jobs):
+            self.__task_monitors__[function].killed()
+            self.scheduler.remove(job, wait=False)
+        overruns:list[StopOverrun] = []
+        for function, job in zip(functions, jobs):
+            monitor = self.__task_monitors__[function]
+            if job.wait_idle(timeout=max(0.0, deadline - time.perf_counter())):
+                monitor.ended(stats=job.stats)
+            else:
+                monitor.overrun()
+                overruns.append(StopOverrun(job.name, max(0.0, deadline - start), time.perf_counter() - start, stopped=False))
+        return overruns
+
+    def create_stream(self, name:str, capacity:int, dtype:typing.Any = "float64", shape:tuple[int, ...] = (),
+                      shared:bool = False, interval_ms:int = 33) -> Stream:
+        """Creates a stream that transports samples from tasks to the GUI.
+        Tasks push blocks of samples into `stream.buffer`, the GUI receives them in batches through `stream.s_data`.
+        Args:
+            name (str): Unique name of the stream.
+            capacity (int): Number of samples the buffer can hold between two drains.
+            dtype (Any, optional): Data type of the samples.
+            shape (tuple[int, ...], optional): Shape of a single sample, e.g. `(channels,)`.
+            shared (bool, optional): If True, the buffer lives in shared memory and can be passed to tasks running in a process.
+            interval_ms (int, optional): Drain interval, defaults to ~30 frames per second.
+        Raises:
+            Exceptions.StreamAlreadyRegistered: If a stream with the same name already exists.
+        Returns:
+            Stream: The new stream, already draining.
+        """
+        if name in self.__streams__:
+            raise Exceptions.StreamAlreadyRegistered(name)
+        from bff.app.ring_buffer import RingBuffer, SharedRingBuffer
+        from bff.app.streaming import Stream
+        buffer = SharedRingBuffer(capacity, dtype, shape) if shared else RingBuffer(capacity, dtype, shape)
+        stream = Stream(name, buffer, interval_ms=interval_ms, parent=self)
+        self.__streams__[name] = stream
+        stream.start()
+        return stream
+
+    def get_stream(self, name:str) -> Stream:
+        """Returns the stream with the given name.
+        Raises:
+            KeyError: If no stream with this name has been created.
+        """
+        return self.__streams__[name]
+
+    @property
+    def streams(self) -> dict[str, Stream]:
+        """All streams created by `create_stream`, by name."""
+        return dict(self.__streams__)
+
+    def create_pipeline(self, name:str, background:bool = False) -> Pipeline:
+        """Creates a pipeline of stages connected by bounded queues, see `bff.app.pipeline`.
+        Stages are added with the decorators `pipeline.source()` and `pipeline.stage(after=...)`.
+        Args:
+            name (str): Unique name of the pipeline.
+            background (bool, optional): If True, the pipeline runs from start up to shut down like a background task,
+                otherwise it runs while the measurement is running.
+        Raises:
+            Exceptions.PipelineAlreadyRegistered: If a pipeline with the same name already exists.
+        Returns:
+            Pipeline: The new, empty pipeline.
+        """
+        if name in self.__pipelines__:
+            raise Exceptions.PipelineAlreadyRegistered(name)
+        pipeline = Pipeline(name)
+        self.__pipelines__[name] = (pipeline, background)
+        return pipeline
+
+    @property
+    def pipelines(self) -> dict[str, Pipeline]:
+        """All pipelines created by `create_pipeline`, by name."""
+        return {name: pipeline for name, (pipeline, _) in self.__pipelines__.items()}
+
+    def __start_pipelines__(self, background:bool) -> None:
+        for pipeline, is_background in self.__pipelines__.values():
+            if is_background == background:
+                pipeline.start()
+
+    def __stop_pipelines__(self, background:bool, deadline:float) -> list[StopOverrun]:
+        """Stops the pipelines, each source first, then the stages once they have drained their queues."""
+        overruns:list[StopOverrun] = []
+        for pipeline, is_background in self.__pipelines__.values():
+            if is_background == background:
+                overruns += pipeline.stop(deadline)
+        return overruns
+
+    def create_output(self, name:str, image:IOImage|type[IOImage], output:DigitalOutput|Callable[[int], None],
+                      window:float|None = None) -> CoalescingOutput:
+        """Creates an output image shared by all tasks, whose changes are merged and written in order, see `bff.io.output`.
+        Args:
+            name (str): Unique name of the output.
+            image (IOImage | type[IOImage]): The image of the output lines, or its class.
+            output (DigitalOutput | Callable[[int], None]): The task the words are written to, e.g.
+                `device.digital_output("port1/line0:15")`, or a function writing a word.
+            window (float | None, optional): Time in seconds requests are collected before a write, defaults to `Config.output_window`.
+        Raises:
+            Exceptions.OutputAlreadyRegistered: If an output with the same name already exists.
+        Returns:
+            CoalescingOutput: The new output, its writer is already running until the application shuts down.
+        """
+        if name in self.__outputs__:
+            raise Exceptions.OutputAlreadyRegistered(name)
+        from bff.io.output import CoalescingOutput
+        if isinstance(image, type):
+            image = image()
+        coalescing = CoalescingOutput(name, image, output, window=Config.output_window if window is None else window)
+        self.__outputs__[name] = coalescing
+        coalescing.start()
+        return coalescing
+
+    @property
+    def outputs(self) -> dict[str, CoalescingOutput]:
+        """All outputs created by `create_output`, by name."""
+        return dict(self.__outputs__)
+
+    def set_replay(self, path:str|None, speed:float|None = 1.0, loop:bool = False, channels:dict[str, str]|None = None) -> Replay|None:
+        """Switches to replay mode: the measurement replays a recorded run into the streams, see `bff.app.replay`.
+        While replaying, starting the measurement starts the replay instead of the measurement tasks, periodic
+        measurement tasks, pipelines and the recorder, so no hardware is touched. Background tasks run as usual.
+        Args:
+            path (str | None): Directory of a run written by the `recorder`. None switches back to the live measurement.
+            speed (float | None, optional): Replay speed, 1.0 is real time. None replays as fast as the views take the samples.
+            loop (bool, optional): If True, the replay starts over at the end of the run.
+            channels (dict[str, str] | None, optional): Stream name by channel name. By default every channel is
+                replayed into the stream of the same name, if there is one.
+        Raises:
+            Exceptions.TasksAlreadyRunning: If the measurement is running.
+            KeyError: If a stream of `channels` does not exist.
+            ValueError: If a channel does not exist or does not fit into its stream.
+        Returns:
+            Replay | None: The replay, its `samples` and `position` show the progress.
+        """
+        if self.__measurement_running__:
+            raise Exceptions.TasksAlreadyRunning(["measurement"])
+        if self.replay is not None:
+            self.replay.run.close()
+            self.replay = None
+        if path is None:
+            return None
+        from bff.app.replay import RecordedRun, Replay
+        run = RecordedRun(path)
+        if channels is None:
+            channels = {name: name for name in run.channels if name in self.__streams__}
+        try:
+            self.replay = Replay(run, {channel: self.__streams__[stream] for channel, stream in channels.items()},
+                                 speed=speed, loop=loop)
+        except (KeyError, ValueError):
+            run.close()
+            raise
+        return self.replay
+
     def register_on_start_measurement(self, function:Callable[[], None]) -> Callable[[], None]:
         """Registers a callback function to be called when the measurement is started.
         This function will be called before any measurement tasks are started.
@@ -520,7 +1018,7 @@ class BFF(QObject):
         self.__on_shutdown__ = function
         return self.__on_shutdown__
 
-    def __get_running_tasks__(self, tasks:dict[Callable[[], None], KillableThread]) -> list[Callable[[], None]]:
+    def __get_running_tasks__(self, tasks:dict[Callable[..., None], TaskHandle]) -> list[Callable[[], None]]:
         """Returns a list if functions that are currently running (appropriate thread is alive)."""
         running_tasks: list[Callable[[], None]] = []
         for function, thread in tasks.items():
@@ -530,15 +1028,77 @@ class BFF(QObject):
                 running_tasks.append(function)
         return running_tasks
     
-    def __stop_tasks__(self, tasks:dict[Callable[[], None], KillableThread]):
-        """Stops all tasks in the given dictionary by killing their threads."""
+    def __stop_tasks__(self, tasks:dict[Callable[..., None], TaskHandle], deadline:float|None = None) -> list[StopOverrun]:
+        """Stops all tasks in the given dictionary in parallel, each within its stop budget.
+        All tasks are killed at once. Cooperative tasks that did not return within `Config.kill_grace_period` get
+        interrupted asynchronously, worker processes get terminated. A task that is still running when its budget
+        (`stop_timeout` of the registration, default `Config.task_stop_timeout`) is used up is escalated:
+        worker processes are killed, threads get a last asynchronous `SystemExit`. If that does not help either,
+        e.g. for a thread blocked in a C call or a worker process whose `on_result` callback still blocks, the task is given up.
+        Its daemon thread is left behind.
+        Args:
+            deadline (float | None, optional): `time.perf_counter()` value no budget may exceed,
+                defaults to `Config.shutdown_timeout` from now.
+        Returns:
+            list[StopOverrun]: The tasks that did not stop within their budget.
+        """
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = start + Config.shutdown_timeout
         running_functions: list[Callable[[], None]] = self.__get_running_tasks__(tasks=tasks)
         for function in running_functions:
+            self.__task_monitors__[function].killed()
             tasks[function].kill()
+        # time of the escalation: budget, but leave the force grace before the deadline
+        escalate_at:dict[Callable[..., None], float] = {}
         for function in running_functions:
-            tasks[function].join()
-
-    def __start_tasks__(self, tasks:dict[Callable[[], None], KillableThread]) -> None:
+            budget = self.__task_options__.get(function, {}).get("stop_timeout", None)
+            budget = Config.task_stop_timeout if budget is None else budget
+            escalate_at[function] = max(start, min(start + budget, deadline - self.__FORCE_GRACE__))
+        pending = list(running_functions)
+        interrupted:set[Callable[..., None]] = set()
+        escalated:set[Callable[..., None]] = set()
+        overruns:list[StopOverrun] = []
+        while pending:
+            now = time.perf_counter()
+            for function in list(pending):
+                task, monitor = tasks[function], self.__task_monitors__[function]
+                if not task.is_alive():
+                    task.join(timeout=0) # releases the resources of worker processes
+                    monitor.ended()
+                    pending.remove(function)
+                    if function in escalated:
+                        overruns.append(StopOverrun(function.__name__, escalate_at[function] - start, now - start, stopped=True))
+                elif function in escalated:
+                    if now >= escalate_at[function] + self.__FORCE_GRACE__:
+                        pending.remove(function)
+                        overruns.append(StopOverrun(function.__name__, escalate_at[function] - start, now - start, stopped=False))
+                elif now >= escalate_at[function]:
+                    escalated.add(function)
+                    monitor.interrupted()
+                    monitor.overrun()
+                    from bff.app.process_task import ProcessTask
+                    if isinstance(task, ProcessTask):
+                        task.interrupt(force=True)
+                    else:
+                        task.interrupt()
+                elif task.cooperative and function not in interrupted and now - start >= Config.kill_grace_period:
+                    interrupted.add(function)
+                    monitor.interrupted()
+                    task.interrupt()
+            if pending:
+                time.sleep(self.__STOP_POLL__)
+        return overruns
+
+    def __report_overruns__(self, overruns:list[StopOverrun]) -> None:
+        """Keeps the overruns of the last stop in `stop_overruns` and logs them."""
+        self.stop_overruns = overruns
+        for overrun in overruns:
+            logging.getLogger("BFF").warning(
+                "task '%s' exceeded its stop budget of %.2f s: %s after %.2f s", overrun.name, overrun.budget,
+                "stopped" if overrun.stopped else "given up", overrun.elapsed)
+
+    def __start_tasks__(self, tasks:dict[Callable[..., None], TaskHandle]) -> None:
         """Starts all tasks in the given dictionary by starting their threads."""
         running_functions: list[Callable[[], None]] = self.__get_running_tasks__(tasks=tasks)
         if running_functions:
@@ -546,9 +1106,27 @@ class BFF(QObject):
             names = [function.__name__ for function in running_functions]
             raise Exceptions.TasksAlreadyRunning(names)
         for function in tasks.keys():
-            tasks[function] = KillableThread(target=function)
+            tasks[function] = self.__create_task__(function)
+            self.__task_monitors__[function].started()
             tasks[function].start()
 
+    def metrics(self) -> dict[str, TaskMetrics]:
+        """Returns a snapshot of the metrics of all tasks, by task name.
+        The metrics are collected when tasks start and end, see `bff.app.metrics`. Calling this is cheap and thread safe.
+        Returns:
+            dict[str, TaskMetrics]: Copies of the metrics, including the current run of running tasks.
+        """
+        result:dict[str, TaskMetrics] = {}
+        for function, monitor in list(self.__task_monitors__.items()):
+            task = self.__bg_tasks__.get(function, None) or self.__m_tasks__.get(function, None)
+            if task is not None and not task.is_alive():
+                # worker processes are not instrumented, their end is noticed here at the latest
+                monitor.ended()
+            job = self.__periodic_jobs__.get(function, None)
+            metrics = monitor.snapshot(job.stats if job is not None else None)
+            result[metrics.name] = metrics
+        return result
+
     @pyqtSlot(bool)
     def request_measurement(self, start:bool):
         """Request to start or stop the measurement.
@@ -562,45 +1140,94 @@ class BFF(QObject):
         """Starts measurement and all measurement-tasks in separate threads.
         This method performs the following actions:
         1. Calls the `on_measurement_start` callback if it is set.
-        2. Iterates over the measurement tasks and starts each task in a new `KillableThread`.
-        3. Updates the application bar.
+        2. Starts a new run of the `recorder`, if channels have been added to it.
+        3. Iterates over the measurement tasks and starts each task in a new `KillableThread`.
+           In replay mode (see `set_replay`) the replay is started instead of steps 2 and 3.
+        4. Updates the application bar.
         """
         # check if any thread is still running
         running_functions = self.__get_running_tasks__(self.__m_tasks__)
-        if running_functions:
+        running_functions += [f for f in self.__periodic_jobs__ if not self.__periodic_tasks__[f][1]]
+        names = [function.__name__ for function in running_functions]
+        names += [name for name, (pipeline, background) in self.__pipelines__.items() if not background and pipeline.is_running]
+        if names:
             # raise an error because at least one of the tasks to be started is already running
-            names = [function.__name__ for function in running_functions]
             raise Exceptions.TasksAlreadyRunning(names)
         # let's get started
         if self.__on_start_measurement__ is not None:
             self.__on_start_measurement__()
-        self.__start_tasks__(self.__m_tasks__)   
+        if self.replay is not None:
+            self.replay.start()
+        else:
+            if self.__recorder__ is not None:
+                self.__recorder__.start({"app": Config.app_name, "version": Config.version})
+            self.__start_tasks__(self.__m_tasks__)
+            self.__start_periodic_tasks__(background=False)
+            self.__start_pipelines__(background=False)
         self.s_measurement_running.emit(True)     
         self.__measurement_running__ = True
 
     def stop_measurement(self) -> None:
         """Stops the measurement and all measurement-tasks.
         This method performs the following actions:
-        1. Calls the `on_measurement_stop` callback if it is set.
-        2. Iterates through all measurement tasks and kills each thread.
-        3. Joins each thread to ensure they have completed execution.
+        1. Stops the measurement pipelines and kills all measurement tasks in parallel, at most `Config.shutdown_timeout` in total.
+        2. Writes the remaining blocks of the `recorder` within the same time.
+        3. Calls the `on_measurement_stop` callback if it is set.
+        4. Reports tasks that exceeded their stop budget, see `stop_overruns`.
         """
-        self.__stop_tasks__(self.__m_tasks__)
+        self.__report_overruns__(self.__stop_measurement__(time.perf_counter() + Config.shutdown_timeout))
+
+    def __stop_measurement__(self, deadline:float) -> list[StopOverrun]:
+        overruns = self.replay.stop(deadline) if self.replay is not None else []
+        overruns += self.__stop_pipelines__(background=False, deadline=deadline)
+        overruns += self.__stop_tasks__(self.__m_tasks__, deadline)
+        overruns += self.__stop_periodic_tasks__(background=False, deadline=deadline)
+        start = time.perf_counter()
+        if self.__recorder__ is not None and not self.__recorder__.stop(timeout=max(0.0, deadline - start)):
+            overruns.append(StopOverrun("recorder", max(0.0, deadline - start), time.perf_counter() - start, stopped=False))
         if self.__on_stop_measurement__ is not None:
             self.__on_stop_measurement__()
         self.s_measurement_running.emit(False)
         self.__measurement_running__ = False
+        return overruns
 
     @pyqtSlot()
     def start_up(self):
         if self.__on_startup__ is not None:
             self.__on_startup__()
         self.__start_tasks__(self.__bg_tasks__)
+        self.scheduler.start()
+        self.__start_periodic_tasks__(background=True)
+        self.__start_pipelines__(background=True)
+        if Config.server_enabled:
+            self.server.start()
 
     @pyqtSlot()
     def shut_down(self):
-        self.stop_measurement()
-        self.__stop_tasks__(self.__bg_tasks__)
+        """Stops everything within `Config.shutdown_timeout` (plus the short timeouts of the server and the asyncio loop).
+        Tasks that exceed their stop budget are reported in `stop_overruns` and logged.
+        """
+        deadline = time.perf_counter() + Config.shutdown_timeout
+        overruns = self.__stop_measurement__(deadline)
+        overruns += self.__stop_pipelines__(background=True, deadline=deadline)
+        overruns += self.__stop_tasks__(self.__bg_tasks__, deadline)
+        overruns += self.__stop_periodic_tasks__(background=True, deadline=deadline)
+        for name, output in self.__outputs__.items():
+            # the last requests of the tasks are still written
+            start = time.perf_counter()
+            if not output.stop(timeout=max(0.0, deadline - start)):
+                overruns.append(StopOverrun(f"output {name}", max(0.0, deadline - start), time.perf_counter() - start, stopped=False))
+        # runs have been waited for above, a stuck one must not block the shutdown
+        self.scheduler.stop(wait=False)
+        if self.__server__ is not None:
+            self.__server__.stop()
+        if self.__async_loop__ is not None:
+            self.__async_loop__.stop(timeout=Config.kill_grace_period)
+        for stream in self.__streams__.values():
+            stream.close()
+        if self.replay is not None:
+            self.replay.run.close()
+        self.__report_overruns__(overruns)
         if self.__on_shutdown__ is not None:
             self.__on_shutdown__()
 
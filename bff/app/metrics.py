@@ -0,0 +1,243 @@
+"""Health and timing metrics of the tasks of a `BFF` application.
+
+Every registered task gets a `TaskMetrics` record. It is updated at the edges of the task's life only: when it is
+started, when it ends by itself or with an exception, and when `BFF` stops it (time from the kill request until the
+task has ended). Nothing is measured while the task runs, so the collection can stay enabled in production.
+
+CPU time is measured for tasks running in threads: the thread's CPU clock is read when the task ends, and while it is
+running on every `snapshot()` (on platforms with `time.pthread_getcpuclockid`). Periodic tasks additionally report
+their run rate and timing from the `JobStats` of the scheduler.
+
+:Example:
+    ```
+    for name, metrics in app.metrics().items():
+        print(name, metrics.state, f"{metrics.cpu_time:.3f} s CPU", metrics.errors)
+    ```
+"""
+from __future__ import annotations
+import dataclasses
+import functools
+import inspect
+import threading
+import time
+import typing
+from collections.abc import Callable
+from typing import Any
+
+if typing.TYPE_CHECKING:
+    from bff.app.scheduler import JobStats
+
+
+@dataclasses.dataclass
+class TaskMetrics:
+    """Metrics of a single task. Times are seconds, timestamps are `time.time()` values.
+    Attributes:
+        name (str): Name of the task function.
+        group (str): "background", "measurement", "periodic background" or "periodic measurement".
+        executor (str): "thread", "cooperative thread", "process", "async" or "periodic".
+        state (str): "idle" (never started), "running" or "stopped".
+        starts (int): Number of times the task has been started.
+        started_at (float | None): Timestamp of the last start.
+        stopped_at (float | None): Timestamp of the last end.
+        uptime (float): Duration of the current run, or of the last one if the task is not running.
+        cpu_time (float | None): CPU time of all runs, None if it can not be measured for the executor.
+        kill_latency (float | None): Time from the last kill request until the task had ended.
+        max_kill_latency (float): Longest kill latency so far.
+        interrupts (int): Number of times the task did not stop in time and had to be interrupted or terminated.
+        stop_overruns (int): Number of stops that took longer than the task's stop budget.
+        errors (int): Number of runs that ended with an exception.
+        last_error (str | None): The last exception as text.
+        iterations (int): Runs of a periodic task during its current (or last) activation.
+        rate (float): Runs per second of a periodic task during its current (or last) activation.
+        mean_duration (float): Mean duration of a run of a periodic task.
+        max_jitter (float): Largest delay between the due time and the start of a run of a periodic task.
+        overruns (int): Runs of a periodic task that were skipped because the previous one was still running.
+    """
+    name:str
+    group:str
+    executor:str
+    state:str = "idle"
+    starts:int = 0
+    started_at:float|None = None
+    stopped_at:float|None = None
+    uptime:float = 0.0
+    cpu_time:float|None = None
+    kill_latency:float|None = None
+    max_kill_latency:float = 0.0
+    interrupts:int = 0
+    stop_overruns:int = 0
+    errors:int = 0
+    last_error:str|None = None
+    iterations:int = 0
+    rate:float = 0.0
+    mean_duration:float = 0.0
+    max_jitter:float = 0.0
+    overruns:int = 0
+
+
+@dataclasses.dataclass
+class StopOverrun:
+    """A task that did not stop within its stop budget.
+    Attributes:
+        name (str): Name of the task function.
+        budget (float): The time the task was given to stop, in seconds.
+        elapsed (float): Time from the kill request until the task had ended or was given up.
+        stopped (bool): False if the task was still running when it was given up, e.g. a thread stuck in a C call.
+    """
+    name:str
+    budget:float
+    elapsed:float
+    stopped:bool
+
+
+class TaskMonitor:
+    """Collects the `TaskMetrics` of one task. Created by `BFF` on registration, one per task function.
+    Methods:
+        instrument(function): Wraps the task function to record the end, CPU time and exceptions of a run.
+        started(): Records a start, called right before the task is started.
+        killed(): Records a kill request.
+        ended(): Records the end of a run, called by the instrumented function or after a join.
+        snapshot(): Returns a copy of the metrics with the live values filled in.
+    """
+    def __init__(self, name:str, group:str, executor:str) -> None:
+        self.metrics:TaskMetrics = TaskMetrics(name=name, group=group, executor=executor,
+                                               cpu_time=0.0 if "thread" in executor or executor == "periodic" else None)
+        self.__lock__ = threading.Lock()
+        self.__kill_requested__:float|None = None
+        self.__run_start__:float = 0.0
+        self.__cpu_clock__:int|None = None
+        self.__cpu_start__:float = 0.0
+        self.__cpu_at_kill__:float|None = None
+
+    def instrument(self, function:Callable[..., Any]) -> Callable[..., Any]:
+        """Returns a wrapper of the task function that records how the run ended.
+        The wrapper runs in the task's thread (or on the asyncio loop) and costs two clock reads per run.
+        """
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                try:
+                    return await function(*args, **kwargs)
+                except Exception as e:
+                    self.error(e)
+                    raise
+                finally:
+                    self.ended()
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> Any:
+            self.__cpu_start__ = time.thread_time()
+            self.__cpu_clock__ = __thread_cpu_clock__()
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                self.error(e)
+                raise
+            finally:
+                self.__cpu_clock__ = None
+                self.ended(cpu_time=time.thread_time() - self.__cpu_start__)
+        return wrapper
+
+    def started(self) -> None:
+        with self.__lock__:
+            metrics = self.metrics
+            metrics.state = "running"
+            metrics.starts += 1
+            metrics.started_at = time.time()
+            metrics.stopped_at = None
+            self.__run_start__ = time.perf_counter()
+            self.__kill_requested__ = None
+            self.__cpu_at_kill__ = None
+
+    def killed(self) -> None:
+        self.__kill_requested__ = time.perf_counter()
+        # a thread killed by its trace function can not record its CPU time any more, take it now
+        self.__cpu_at_kill__ = self.__cpu_running__()
+
+    def interrupted(self) -> None:
+        self.metrics.interrupts += 1
+
+    def overrun(self) -> None:
+        self.metrics.stop_overruns += 1
+
+    def error(self, exception:BaseException) -> None:
+        with self.__lock__:
+            self.metrics.errors += 1
+            self.metrics.last_error = f"{type(exception).__name__}: {exception}"
+
+    def ended(self, cpu_time:float|None = None, stats:JobStats|None = None) -> None:
+        """Records the end of the current run. Further calls for the same run are ignored.
+        Args:
+            cpu_time (float | None, optional): CPU time of the run, if it has been measured by the task's thread.
+            stats (JobStats | None, optional): Statistics of the job of a periodic task, they are added to the totals.
+        """
+        now = time.perf_counter()
+        with self.__lock__:
+            metrics = self.metrics
+            if metrics.state != "running":
+                return
+            metrics.state = "stopped"
+            metrics.stopped_at = time.time()
+            metrics.uptime = now - self.__run_start__
+            if cpu_time is None:
+                cpu_time = self.__cpu_at_kill__
+            if cpu_time is not None and metrics.cpu_time is not None:
+                metrics.cpu_time += cpu_time
+            if self.__kill_requested__ is not None:
+                metrics.kill_latency = now - self.__kill_requested__
+                metrics.max_kill_latency = max(metrics.max_kill_latency, metrics.kill_latency)
+                self.__kill_requested__ = None
+            if stats is not None:
+                __add_job_stats__(metrics, stats)
+
+    def snapshot(self, stats:JobStats|None = None) -> TaskMetrics:
+        """Returns a copy of the metrics including the current run.
+        Args:
+            stats (JobStats | None, optional): Statistics of the running job of a periodic task.
+        """
+        with self.__lock__:
+            metrics = dataclasses.replace(self.metrics)
+            if metrics.state == "running":
+                metrics.uptime = time.perf_counter() - self.__run_start__
+                cpu_time = self.__cpu_running__()
+                if cpu_time is not None and metrics.cpu_time is not None:
+                    metrics.cpu_time += cpu_time
+                if stats is not None:
+                    __add_job_stats__(metrics, stats)
+        return metrics
+
+    def __cpu_running__(self) -> float|None:
+        """CPU time of the current run, read from another thread."""
+        clock = self.__cpu_clock__
+        if clock is None:
+            return None
+        try:
+            return time.clock_gettime(clock) - self.__cpu_start__
+        except OSError:
+            return None # the thread has just ended
+
+
+def __add_job_stats__(metrics:TaskMetrics, stats:JobStats) -> None:
+    """Adds the statistics of one activation of a periodic task. Errors and CPU time accumulate, the rest is replaced."""
+    metrics.iterations = stats.runs
+    metrics.rate = stats.runs / metrics.uptime if metrics.uptime > 0 else 0.0
+    metrics.mean_duration = stats.mean_duration
+    metrics.max_jitter = stats.max_jitter
+    metrics.overruns = stats.overruns
+    metrics.errors += stats.errors
+    if stats.last_error is not None:
+        metrics.last_error = f"{type(stats.last_error).__name__}: {stats.last_error}"
+    if metrics.cpu_time is not None:
+        metrics.cpu_time += stats.cpu_time
+
+
+def __thread_cpu_clock__() -> int|None:
+    """CPU clock of the calling thread, readable from other threads. None where it is not available (Windows)."""
+    getcpuclockid = getattr(time, "pthread_getcpuclockid", None)
+    if getcpuclockid is None:
+        return None
+    try:
+        return getcpuclockid(threading.get_ident())
+    except OSError:
+        return None
@@ -4,64 +4,364 @@ import multiprocessing
 import threading
 import queue
 import sys
+import time
+import argparse
+import datetime
+import json
+from collections import deque
+
+from bff.app.types import Config
+from bff.app.binary_log import BinaryLogHandler, query_logs, format_record
 
 LOG_FILE = "bff.log"
 LOG_MAX_BYTES = 2 * 1024 * 1024  # 2 MB per file
 LOG_BACKUP_COUNT = 5
 
-def log_listener_process(log_queue, log_file=LOG_FILE):
-    """Process that receives log records and writes them to rotating files."""
+OVERLOAD_POLICIES = ("drop_oldest", "sample")
+
+
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """`RotatingFileHandler` that can defer flushing, so a batch of records is written with a single flush."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deferred:bool = False
+
+    def flush(self):
+        if not self.deferred:
+            super().flush()
+
+
+def log_listener_process(log_queue, log_file=LOG_FILE, binary_dir=None):
+    """Process that receives log records and writes them to rotating files.
+    Items on the queue are single records (`QueueHandler`) or lists of records (`BatchingQueueHandler`),
+    a list is written with one flush at its end.
+    Args:
+        log_file (str | None, optional): Text log file, None disables the text log.
+        binary_dir (str | None, optional): Directory of an additional binary log, see `bff.app.binary_log`.
+    """
     root = logging.getLogger()
-    handler = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
-    )
-    formatter = logging.Formatter(
-        "%(asctime)s %(processName)s %(threadName)s %(levelname)s %(name)s: %(message)s"
-    )
-    handler.setFormatter(formatter)
-    root.addHandler(handler)
+    handlers = []
+    text_handler = None
+    if log_file is not None:
+        text_handler = BatchRotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        formatter = logging.Formatter(
+            "%(asctime)s %(processName)s %(threadName)s %(levelname)s %(name)s: %(message)s"
+        )
+        text_handler.setFormatter(formatter)
+        handlers.append(text_handler)
+    if binary_dir is not None:
+        handlers.append(BinaryLogHandler(binary_dir))
+    for handler in handlers:
+        root.addHandler(handler)
     root.setLevel(logging.DEBUG)
 
     while True:
         try:
-            record = log_queue.get()
-            if record is None:
+            try:
+                item = log_queue.get(timeout=1.0)
+            except queue.Empty:
+                # lets the binary log write partial blocks while nothing is logged
+                for handler in handlers:
+                    handler.flush()
+                continue
+            if item is None:
                 break  # Sentinel to shut down
-            logger = logging.getLogger(record.name)
-            logger.handle(record)
+            if isinstance(item, list):
+                if text_handler is not None:
+                    text_handler.deferred = True
+                try:
+                    for record in item:
+                        logging.getLogger(record.name).handle(record)
+                finally:
+                    if text_handler is not None:
+                        text_handler.deferred = False
+                    for handler in handlers:
+                        handler.flush()
+                continue
+            logger = logging.getLogger(item.name)
+            logger.handle(item)
         except Exception:
             import traceback
             print("Logging error:", file=sys.stderr)
             traceback.print_exc(file=sys.stderr)
+    for handler in handlers:
+        root.removeHandler(handler)
+        handler.close()
+
+
+class __ThreadBuffer__:
+    """Records of one thread, waiting for the feeder. Only the owning thread appends, only the feeder pops."""
+    __slots__ = ("thread", "records", "dropped", "reported", "counter")
+
+    def __init__(self, capacity:int, drop_oldest:bool) -> None:
+        self.thread:threading.Thread = threading.current_thread()
+        self.records:deque[logging.LogRecord] = deque(maxlen=capacity if drop_oldest else None)
+        self.dropped:int = 0
+        self.reported:int = 0
+        self.counter:int = 0
+
+
+class BatchingQueueHandler(logging.Handler):
+    """Logging handler that keeps the call site cheap: records are buffered per thread without any locking
+    and a background feeder thread hands them over to the log queue in chunks.
+    The pickling and the pipe write happen once per chunk on the feeder, not once per record on the calling thread.
+
+    If a thread logs faster than its records can be fed, its buffer fills up and the overload policy applies:
+        drop_oldest: New records replace the oldest buffered ones.
+        sample: Only every `sample_every`-th record below WARNING is kept, records from WARNING upwards are always kept.
+    The number of dropped records is reported to the log as a warning.
+
+    Args:
+        log_queue (multiprocessing.Queue): Queue of the logging subprocess.
+        buffer_size (int, optional): Maximum number of buffered records per thread.
+        batch_size (int, optional): Maximum number of records per chunk. A full chunk wakes up the feeder early.
+        flush_interval (float, optional): Time in seconds after which buffered records are fed at the latest.
+        policy (str, optional): Overload policy, "drop_oldest" or "sample".
+        sample_every (int, optional): Sampling rate of the "sample" policy.
+    """
+
+    def __init__(self, log_queue, buffer_size:int = 10_000, batch_size:int = 512, flush_interval:float = 0.05,
+                 policy:str = "drop_oldest", sample_every:int = 10) -> None:
+        super().__init__()
+        if policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unknown overload policy '{policy}', expected one of {OVERLOAD_POLICIES}")
+        self.queue = log_queue
+        self.buffer_size:int = buffer_size
+        self.batch_size:int = batch_size
+        self.flush_interval:float = flush_interval
+        self.policy:str = policy
+        self.sample_every:int = max(sample_every, 1)
+        self.__local__ = threading.local()
+        self.__buffers__:list[__ThreadBuffer__] = []
+        self.__buffers_lock__ = threading.Lock()
+        self.__wakeup__ = threading.Event()
+        self.__closed__:bool = False
+        self.__feeder__ = threading.Thread(target=self.__feed__, name="LogFeeder", daemon=True)
+        self.__feeder__.start()
+
+    @property
+    def dropped(self) -> int:
+        """Total number of records dropped by the overload policy."""
+        with self.__buffers_lock__:
+            return sum(buffer.dropped for buffer in self.__buffers__)
+
+    def __buffer__(self) -> __ThreadBuffer__:
+        buffer = getattr(self.__local__, "buffer", None)
+        if buffer is None:
+            buffer = self.__local__.buffer = __ThreadBuffer__(self.buffer_size, self.policy == "drop_oldest")
+            with self.__buffers_lock__:
+                self.__buffers__.append(buffer)
+        return buffer
 
-def get_logger(log_queue, name:str = "BFF"):
-    """Return a logger that sends records to the logging queue."""
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        """Merges the arguments into the message and renders the exception, so the record can be pickled later on."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record:logging.LogRecord) -> logging.LogRecord|bool:
+        """Like `logging.Handler.handle`, but without the handler lock. The thread buffers need no locking."""
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record:logging.LogRecord) -> None:
+        try:
+            buffer = self.__buffer__()
+            records = buffer.records
+            if len(records) >= self.buffer_size:
+                if self.policy == "sample":
+                    if record.levelno < logging.WARNING:
+                        buffer.counter += 1
+                        if buffer.counter % self.sample_every:
+                            buffer.dropped += 1
+                            return
+                    try:
+                        records.popleft()
+                    except IndexError:
+                        pass # the feeder has just emptied the buffer
+                # drop_oldest: the deque is bounded and drops the oldest record itself
+                buffer.dropped += 1
+            records.append(self.prepare(record))
+            if len(records) == self.batch_size:
+                self.__wakeup__.set()
+        except Exception:
+            self.handleError(record)
+
+    def __collect__(self) -> list[logging.LogRecord]:
+        """Pops everything that is buffered, oldest thread buffers first, and removes buffers of ended threads."""
+        batch: list[logging.LogRecord] = []
+        with self.__buffers_lock__:
+            buffers = list(self.__buffers__)
+        for buffer in buffers:
+            records = buffer.records
+            try:
+                for _ in range(len(records)):
+                    batch.append(records.popleft())
+            except IndexError:
+                pass
+            dropped = buffer.dropped
+            if dropped != buffer.reported:
+                batch.append(logging.LogRecord(
+                    "BFF.logging", logging.WARNING, __file__, 0,
+                    f"{dropped - buffer.reported} log records of thread '{buffer.thread.name}' dropped ({self.policy})",
+                    None, None,
+                ))
+                buffer.reported = dropped
+            if not buffer.thread.is_alive() and not records:
+                with self.__buffers_lock__:
+                    self.__buffers__.remove(buffer)
+        batch.sort(key=lambda record: record.created)
+        return batch
+
+    def __put__(self, batch:list[logging.LogRecord]) -> None:
+        for start in range(0, len(batch), self.batch_size):
+            self.queue.put(batch[start:start + self.batch_size])
+
+    def __feed__(self) -> None:
+        while not self.__closed__:
+            self.__wakeup__.wait(self.flush_interval)
+            self.__wakeup__.clear()
+            try:
+                batch = self.__collect__()
+                if batch:
+                    self.__put__(batch)
+            except Exception:
+                import traceback
+                print("Logging error:", file=sys.stderr)
+                traceback.print_exc(file=sys.stderr)
+
+    def flush(self) -> None:
+        """Feeds all buffered records immediately, from the calling thread."""
+        batch = self.__collect__()
+        if batch:
+            self.__put__(batch)
+
+    def close(self) -> None:
+        """Stops the feeder and feeds the remaining records."""
+        if not self.__closed__:
+            self.__closed__ = True
+            self.__wakeup__.set()
+            self.__feeder__.join()
+            self.flush()
+        super().close()
+
+
+__batching_handlers__:list[BatchingQueueHandler] = []
+
+
+def get_logger(log_queue, name:str = "BFF", batching:bool = False, **batch_options):
+    """Return a logger that sends records to the logging queue.
+    Args:
+        log_queue (multiprocessing.Queue): Queue of the logging subprocess.
+        name (str, optional): Name of the logger.
+        batching (bool, optional): Buffers the records per thread and sends them in chunks, see `BatchingQueueHandler`.
+            All batching loggers of one queue share a single handler and feeder thread.
+        **batch_options: Options of the `BatchingQueueHandler`, e.g. `policy="sample"`. Only used by the first batching logger of a queue.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)
     # Prevent adding multiple handlers if called repeatedly
-    if not any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
-        handler = logging.handlers.QueueHandler(log_queue)
+    if any(isinstance(h, (logging.handlers.QueueHandler, BatchingQueueHandler)) for h in logger.handlers):
+        return logger
+    if batching:
+        handler = next((h for h in __batching_handlers__ if h.queue is log_queue), None)
+        if handler is None:
+            handler = BatchingQueueHandler(log_queue, **batch_options)
+            __batching_handlers__.append(handler)
         logger.addHandler(handler)
+    else:
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
     return logger
 
-def start_logging_subprocess(log_queue=None, log_file=LOG_FILE):
-    """Start the logging subprocess. Returns the queue and process."""
+def start_logging_subprocess(log_queue=None, log_file=LOG_FILE, binary_dir=None):
+    """Start the logging subprocess. Returns the queue and process.
+    With `binary_dir` the records are additionally written to a binary log, see `bff.app.binary_log`.
+    """
     if log_queue is None:
         log_queue = multiprocessing.Queue(-1)
     proc = multiprocessing.Process(
-        target=log_listener_process, args=(log_queue, log_file), daemon=True
+        target=log_listener_process, args=(log_queue, log_file, binary_dir), daemon=True
     )
     proc.start()
     return log_queue, proc
 
-def stop_logging_subprocess(log_queue, proc):
-    """Stop the logging subprocess cleanly."""
+def stop_logging_subprocess(log_queue, proc, timeout:float|None = None) -> bool:
+    """Stop the logging subprocess cleanly. Buffered records of batching loggers are sent first.
+    Args:
+        timeout (float | None, optional): Time the listener gets to write the remaining records,
+            defaults to `Config.logging_stop_timeout`. A listener that is still running afterwards is terminated.
+    Returns:
+        bool: True if the listener ended by itself, False if it had to be terminated.
+    """
+    for handler in [h for h in __batching_handlers__ if h.queue is log_queue]:
+        handler.close()
+        __batching_handlers__.remove(handler)
+        for logger in [logging.getLogger()] + [l for l in logging.Logger.manager.loggerDict.values() if isinstance(l, logging.Logger)]:
+            logger.removeHandler(handler)
     log_queue.put_nowait(None)
-    proc.join(timeout=5)
+    proc.join(timeout=Config.logging_stop_timeout if timeout is None else timeout)
+    if not proc.is_alive():
+        return True
+    # records still in the pipe are lost, do not let them block the exit of this process either
+    log_queue.cancel_join_thread()
+    proc.terminate()
+    proc.join(timeout=1.0)
+    if proc.is_alive():
+        proc.kill()
+        proc.join()
+    return False
+
+def __parse_time__(value:str) -> float:
+    """Seconds since the epoch, an ISO time stamp or a negative number of seconds relative to now."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    return time.time() + seconds if seconds < 0 else seconds
+
+
+def main(argv=None) -> None:
+    """Command line interface: `python -m bff.app.mp_logging query <directory> [filters]`."""
+    parser = argparse.ArgumentParser(prog="python -m bff.app.mp_logging")
+    commands = parser.add_subparsers(dest="command")
+    query = commands.add_parser("query", help="filter a binary log")
+    query.add_argument("directory", help="directory of the binary log")
+    query.add_argument("--since", type=__parse_time__, help="epoch seconds, ISO time stamp or e.g. -3600 for the last hour")
+    query.add_argument("--until", type=__parse_time__, help="epoch seconds, ISO time stamp or negative seconds relative to now")
+    query.add_argument("--level", default="NOTSET", help="minimum level, e.g. WARNING")
+    query.add_argument("--logger", help="logger name, includes its children")
+    query.add_argument("--grep", help="text the message has to contain")
+    query.add_argument("--limit", type=int, help="maximum number of records")
+    query.add_argument("--json", action="store_true", help="print one JSON object per record")
+    args = parser.parse_args(argv)
+
+    if args.command != "query":
+        # Example usage:
+        log_queue, log_proc = start_logging_subprocess()
+        logger: logging.Logger = get_logger(log_queue)
+        logger.info("Hello from main process!")
+        stop_logging_subprocess(log_queue, log_proc)
+        return
+    level = logging.getLevelName(args.level.upper()) if not args.level.isdigit() else int(args.level)
+    if not isinstance(level, int):
+        parser.error(f"unknown level '{args.level}'")
+    records = query_logs(args.directory, start=args.since, end=args.until, level=level, logger=args.logger, contains=args.grep, limit=args.limit)
+    try:
+        for record in records:
+            print(json.dumps(record) if args.json else format_record(record))
+    except BrokenPipeError:
+        pass
+
 
-# Example usage:
 if __name__ == "__main__":
-    log_queue, log_proc = start_logging_subprocess()
-    logger: logging.Logger = get_logger(log_queue)
-    logger.info("Hello from main process!")
-    stop_logging_subprocess(log_queue, log_proc)
\ No newline at end of file
+    main()
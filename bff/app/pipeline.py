@@ -0,0 +1,382 @@
+"""Measurement pipelines: stages connected by bounded queues.
+
+Instead of independent measurement tasks that share state through globals, a pipeline declares how data flows:
+a source stage produces items, every other stage receives the items of the stage(s) it comes `after`, handles them
+and passes its results on. Each stage runs in a thread of its own and reads from a bounded input queue:
+
+* backpressure: with `policy="block"` a full queue makes the upstream stage wait. With "drop_oldest" or
+  "drop_newest" the queue drops items instead, so a slow consumer (e.g. a display) can never stall acquisition.
+* parallelism: `workers=4` handles four items at once, in a thread pool or, with `executor="process"`, in worker
+  processes for CPU bound stages. Results are passed on in the order the items arrived.
+* ordering: stages are started from the sinks to the source, so nothing produced is lost. On stop the source is
+  cancelled first and every stage drains its queue before it ends, so all produced items are handled.
+
+A stage function returns the item for the next stages, None drops it. A stage without successors is a sink.
+Exceptions of a stage function are counted in the `StageStats` and drop the item, the pipeline keeps running.
+
+:Example:
+    ```
+    pipeline = app.create_pipeline("daq")
+
+    @pipeline.source()
+    def acquire(token:CancelToken):
+        with nidaqmx.Task() as task:
+            task.ai_channels.add_ai_voltage_chan("Dev1/ai0:3")
+            while not token.cancelled:
+                yield np.array(task.read(number_of_samples_per_channel=1000))
+
+    @pipeline.stage(after="acquire", workers=4, executor="process")
+    def spectrum(block):                                    # module level function, it is sent to worker processes
+        return np.abs(np.fft.rfft(block))
+
+    @pipeline.stage(after="spectrum", queue_size=10_000)    # storage must not lose anything
+    def store(spectrum):
+        file.write(spectrum.tobytes())
+
+    @pipeline.stage(after="spectrum", queue_size=2, policy="drop_oldest")
+    def display(spectrum):
+        stream.push(spectrum)
+    ```
+"""
+from __future__ import annotations
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from bff.app.killable_thread import CancelToken, KillableThread
+from bff.app.metrics import StopOverrun
+
+
+__END__ = object()
+__POLICIES__ = ("block", "drop_oldest", "drop_newest")
+__EXECUTORS__ = ("thread", "process")
+
+
+@dataclasses.dataclass
+class StageStats:
+    """Counters of a pipeline stage, for the current run. They are reset when the pipeline is started.
+    Attributes:
+        received (int): Items taken from the input queue.
+        emitted (int): Items passed on to the next stages.
+        dropped (int): Items the input queue dropped because it was full, or discarded when the pipeline was given up.
+        errors (int): Items the stage function raised an exception for.
+        last_error (BaseException | None): The last exception.
+        blocked (float): Seconds spent waiting for full queues of the next stages, i.e. backpressure.
+    """
+    received:int = 0
+    emitted:int = 0
+    dropped:int = 0
+    errors:int = 0
+    last_error:BaseException|None = None
+    blocked:float = 0.0
+
+    def reset(self) -> None:
+        self.received = self.emitted = self.dropped = self.errors = 0
+        self.last_error = None
+        self.blocked = 0.0
+
+
+class StageQueue:
+    """Bounded input queue of a stage with a policy for full queues. The end marker is never dropped."""
+    def __init__(self, size:int, policy:str, stats:StageStats) -> None:
+        self.__queue__:queue.Queue = queue.Queue(maxsize=size)
+        self.policy:str = policy
+        self.stats:StageStats = stats
+        # several upstream stages put into the queue of a fan-in stage
+        self.__dropped_lock__ = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.__queue__.qsize()
+
+    def put(self, item:Any, abort:CancelToken) -> None:
+        """Puts an item, blocks according to the policy. Returns early if the pipeline is aborted."""
+        if self.policy == "block" or item is __END__:
+            while not abort.cancelled:
+                try:
+                    self.__queue__.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        while True:
+            try:
+                self.__queue__.put_nowait(item)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.count_dropped(1)
+                    return
+                try:
+                    oldest = self.__queue__.get_nowait()
+                except queue.Empty:
+                    continue # the consumer took it in the meantime, nothing is dropped
+                if oldest is __END__:
+                    # the end of another upstream stage of a fan-in stage, it is queued again
+                    self.put(oldest, abort)
+                    continue
+                self.count_dropped(1)
+
+    def get(self, abort:CancelToken) -> Any:
+        """Returns the next item, or the end marker once the pipeline is aborted."""
+        while not abort.cancelled:
+            try:
+                return self.__queue__.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return __END__
+
+    def count_dropped(self, count:int) -> None:
+        """Adds dropped items to `stats.dropped`, thread safe."""
+        with self.__dropped_lock__:
+            self.stats.dropped += count
+
+    def clear(self) -> int:
+        cleared = 0
+        while True:
+            try:
+                self.__queue__.get_nowait()
+                cleared += 1
+            except queue.Empty:
+                return cleared
+
+
+class Stage:
+    """A stage of a `Pipeline`, created by `Pipeline.source` and `Pipeline.stage`.
+    Attributes:
+        name (str): Name of the stage, unique within its pipeline.
+        function (Callable): The stage function.
+        after (list[str]): Names of the stages this one receives items from, empty for the source.
+        workers (int): Number of items handled at once.
+        executor (str): "thread" or "process".
+        stats (StageStats): Counters, updated while the pipeline runs.
+    """
+    def __init__(self, name:str, function:Callable[..., Any], after:list[str], workers:int, executor:str,
+                 queue_size:int, policy:str) -> None:
+        self.name:str = name
+        self.function:Callable[..., Any] = function
+        self.after:list[str] = after
+        self.workers:int = workers
+        self.executor:str = executor
+        self.stats:StageStats = StageStats()
+        self.input:StageQueue|None = StageQueue(queue_size, policy, self.stats) if after else None
+        self.next:list[Stage] = []
+        self.thread:KillableThread|None = None
+        # cancelled when the pipeline is given up: queues stop blocking, stages end without draining
+        self.abort:CancelToken = CancelToken()
+
+    @property
+    def is_source(self) -> bool:
+        return not self.after
+
+    @property
+    def queued(self) -> int:
+        """Number of items waiting in the input queue."""
+        return len(self.input) if self.input is not None else 0
+
+    def __emit__(self, item:Any) -> None:
+        start = time.perf_counter()
+        for stage in self.next:
+            stage.input.put(item, self.abort) # type:ignore
+        self.stats.blocked += time.perf_counter() - start
+        if item is not __END__:
+            self.stats.emitted += 1
+
+    def __error__(self, exception:BaseException) -> None:
+        self.stats.errors += 1
+        self.stats.last_error = exception
+
+    def __run_source__(self, token:CancelToken) -> None:
+        try:
+            items:Iterable[Any] = self.function(token)
+            for item in items:
+                if item is not None:
+                    self.__emit__(item)
+                if token.cancelled:
+                    break
+        except Exception as e:
+            self.__error__(e)
+        finally:
+            self.__emit__(__END__)
+
+    def __handle__(self, item:Any) -> None:
+        try:
+            result = self.function(item)
+        except Exception as e:
+            self.__error__(e)
+            return
+        if result is not None and self.next:
+            self.__emit__(result)
+
+    def __finish__(self, future:concurrent.futures.Future) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            self.__error__(e)
+            return
+        if result is not None and self.next:
+            self.__emit__(result)
+
+    def __run_stage__(self, token:CancelToken) -> None:
+        abort = self.abort
+        pool:concurrent.futures.Executor|None = None
+        if self.executor == "process":
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        elif self.workers > 1:
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        pending:collections.deque[concurrent.futures.Future] = collections.deque()
+        ends = 0
+        try:
+            while ends < len(self.after):
+                item = self.input.get(abort) # type:ignore
+                if item is __END__:
+                    if abort.cancelled:
+                        break
+                    ends += 1
+                    continue
+                self.stats.received += 1
+                if pool is None:
+                    self.__handle__(item)
+                    continue
+                pending.append(pool.submit(self.function, item))
+                # keep the order: results are passed on from the oldest item, at most two items per worker in flight
+                while pending and (len(pending) >= 2 * self.workers or pending[0].done()):
+                    self.__finish__(pending.popleft())
+            while pending and not abort.cancelled:
+                self.__finish__(pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=not abort.cancelled, cancel_futures=True)
+            if abort.cancelled:
+                self.input.count_dropped(len(pending) + self.input.clear()) # type:ignore
+            self.__emit__(__END__)
+
+    def start(self) -> None:
+        target = self.__run_source__ if self.is_source else self.__run_stage__
+        self.thread = KillableThread(target=target, cooperative=True, name=f"Stage-{self.name}")
+        self.thread.start()
+
+
+class Pipeline:
+    """Stages connected by bounded queues, see the module documentation.
+    Attributes:
+        name (str): Name of the pipeline.
+        stages (dict[str, Stage]): The stages by name, in the order they were added.
+    Methods:
+        source(): Decorator that adds the source stage.
+        stage(after): Decorator that adds a stage receiving the items of the stage(s) `after`.
+        start(): Starts all stages, the source last.
+        stop(deadline): Stops the source and lets the other stages drain their queues.
+        stats(): Returns the counters of all stages.
+    """
+    def __init__(self, name:str) -> None:
+        self.name:str = name
+        self.stages:dict[str, Stage] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return any(stage.thread is not None and stage.thread.is_alive() for stage in self.stages.values())
+
+    def __add__(self, stage:Stage) -> None:
+        if self.is_running:
+            raise RuntimeError(f"Stages can not be added to the running pipeline '{self.name}'")
+        if stage.name in self.stages:
+            raise ValueError(f"A stage with the name '{stage.name}' is already part of the pipeline '{self.name}'")
+        for name in stage.after:
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}', stages have to be added after the stages they receive items from")
+        if stage.workers < 1:
+            raise ValueError("workers has to be at least 1")
+        if stage.executor not in __EXECUTORS__:
+            raise ValueError(f"Unknown executor '{stage.executor}', expected one of {__EXECUTORS__}")
+        if stage.input is not None and stage.input.policy not in __POLICIES__:
+            raise ValueError(f"Unknown policy '{stage.input.policy}', expected one of {__POLICIES__}")
+        for name in stage.after:
+            self.stages[name].next.append(stage)
+        self.stages[stage.name] = stage
+
+    def source(self, function:Callable[[CancelToken], Iterable[Any]]|None = None, *, name:str|None = None) -> Any:
+        """Decorator that adds a source stage. The function receives a `CancelToken` and yields the items.
+        It should check `token.cancelled` between items, it is also asked to stop after every item it yields.
+        Args:
+            name (str | None, optional): Name of the stage, defaults to the name of the function.
+        """
+        if function is None:
+            return functools.partial(self.source, name=name)
+        self.__add__(Stage(name or function.__name__, function, [], 1, "thread", 0, "block"))
+        return function
+
+    def stage(self, function:Callable[[Any], Any]|None = None, *, after:str|list[str], name:str|None = None,
+              workers:int = 1, executor:str = "thread", queue_size:int = 64, policy:str = "block") -> Any:
+        """Decorator that adds a stage. The function receives one item and returns the item for the next stages or None.
+        Args:
+            after (str | list[str]): Stage(s) the items come from. With several, the stage ends after all of them ended.
+            name (str | None, optional): Name of the stage, defaults to the name of the function.
+            workers (int, optional): Number of items handled at once, results keep the order of the items.
+            executor (str, optional): "thread" (default) or "process". Process workers need a picklable (module level)
+                function and picklable items.
+            queue_size (int, optional): Capacity of the input queue.
+            policy (str, optional): What happens to new items while the input queue is full: "block" (default) makes
+                the upstream stage wait, "drop_oldest" and "drop_newest" drop an item and count it in `stats.dropped`.
+        Raises:
+            ValueError: If a stage with the name exists, an `after` stage is unknown or an option is invalid.
+            RuntimeError: If the pipeline is running.
+        """
+        if function is None:
+            return functools.partial(self.stage, after=after, name=name, workers=workers, executor=executor,
+                                     queue_size=queue_size, policy=policy)
+        after = [after] if isinstance(after, str) else list(after)
+        self.__add__(Stage(name or function.__name__, function, after, workers, executor, queue_size, policy))
+        return function
+
+    def start(self) -> None:
+        """Starts the stages from the sinks to the sources, so every queue has its consumer before items arrive.
+        The counters of the stages start from zero.
+        """
+        abort = CancelToken()
+        for stage in reversed(list(self.stages.values())):
+            if stage.input is not None:
+                stage.input.clear()
+            stage.stats.reset()
+            stage.abort = abort
+            stage.start()
+
+    def stop(self, deadline:float|None = None) -> list[StopOverrun]:
+        """Cancels the sources and waits until all stages have handled the remaining items.
+        Stages still running at the deadline are cancelled, their queued items are discarded (counted as dropped).
+        Stages that do not end even then, e.g. a source blocked in a driver call, are interrupted and given up.
+        Args:
+            deadline (float | None, optional): `time.perf_counter()` value to give up at. None waits for the queues to drain.
+        Returns:
+            list[StopOverrun]: The stages that did not end by the deadline, named "<pipeline>.<stage>".
+        """
+        start = time.perf_counter()
+        stages = [stage for stage in self.stages.values() if stage.thread is not None]
+        for stage in stages:
+            if stage.is_source:
+                stage.thread.kill() # type:ignore
+        # stages end in the order of the flow, as the end marker is passed on
+        for stage in stages:
+            stage.thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter())) # type:ignore
+        overruns:list[StopOverrun] = []
+        late = [stage for stage in stages if stage.thread.is_alive()] # type:ignore
+        for stage in late:
+            stage.abort.cancel()
+            stage.thread.kill() # type:ignore
+        for stage in late:
+            stage.thread.join(0.2) # type:ignore
+            if stage.thread.is_alive(): # type:ignore
+                stage.thread.interrupt() # type:ignore
+            budget = max(0.0, (deadline or start) - start)
+            overruns.append(StopOverrun(f"{self.name}.{stage.name}", budget, time.perf_counter() - start,
+                                        stopped=not stage.thread.is_alive())) # type:ignore
+        return overruns
+
+    def stats(self) -> dict[str, StageStats]:
+        """Copies of the counters of all stages, by stage name."""
+        return {name: dataclasses.replace(stage.stats) for name, stage in self.stages.items()}
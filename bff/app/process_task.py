@@ -0,0 +1,215 @@
+"""Runs a task in a worker process instead of a thread, so CPU heavy tasks do not compete for the GIL of the GUI process.
+
+`ProcessTask` mirrors the interface of `KillableThread` (`start`, `kill`, `pause`, `resume`, `join`, `is_alive`),
+so `BFF` can handle both the same way.
+Control commands are sent to the worker through a pipe, results come back through a `SharedMemoryChannel`.
+
+The target is called in the worker with a `TaskContext` as only argument. The context is a `CancelToken`,
+so the target checks `should_stop()`, `checkpoint()` or `sleep()` to react on kill and pause requests,
+and calls `send()` to hand results over to the `on_result` callback in the GUI process.
+
+**The target and all results have to be picklable. On platforms that spawn worker processes (Windows),
+the main module is imported again in the worker, so the application has to be guarded by `if __name__ == "__main__":`.**
+
+:Example:
+    ```
+    def fft_task(context:TaskContext):
+        while not context.should_stop():
+            context.send(np.abs(np.fft.rfft(read_block())))
+
+    def on_result(spectrum):
+        print(spectrum.max())
+
+    task = ProcessTask(target=fft_task, on_result=on_result)
+    task.start()
+    time.sleep(2)
+    task.kill()
+    task.join()
+    ```
+"""
+from __future__ import annotations
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from bff.app.killable_thread import CancelToken
+from bff.app.shm_channel import SharedMemoryChannel
+
+
+class TaskContext(CancelToken):
+    """`CancelToken` that is handed over to a task running in a worker process. Additionally allows to send results."""
+    def __init__(self, results:SharedMemoryChannel) -> None:
+        super().__init__()
+        self.results:SharedMemoryChannel = results
+
+    def send(self, result:Any, timeout:float|None = None) -> bool:
+        """Sends a result to the GUI process. Waits while the result channel is full.
+        Args:
+            result (Any): A picklable object.
+            timeout (float | None, optional): Maximum time to wait for free space. None waits forever.
+        Returns:
+            bool: True if the result has been sent.
+        """
+        return self.results.put(result, timeout=timeout)
+
+
+def __listen_control__(control, context:TaskContext) -> None:
+    """Applies commands received through the control pipe to the context, runs in a thread of the worker process."""
+    while True:
+        try:
+            command = control.recv()
+        except (EOFError, OSError):
+            # parent has gone, nobody will ever resume or stop us
+            context.cancel()
+            return
+        match command:
+            case "kill":
+                context.cancel()
+                return
+            case "pause":
+                context.pause()
+            case "resume":
+                context.resume()
+
+
+def __worker_main__(target:Callable[[TaskContext], None], control, results:SharedMemoryChannel) -> None:
+    """Entry point of the worker process."""
+    context = TaskContext(results)
+    threading.Thread(target=__listen_control__, args=(control, context), daemon=True).start()
+    try:
+        target(context)
+    finally:
+        results.close()
+
+
+class ProcessTask:
+    """Runs a task in a worker process. Offers the same controls as `KillableThread`.
+    Attributes:
+        on_result (Callable | None): Callback that receives the results sent by the task. Called from a thread of the GUI process.
+        cooperative (bool): Always True, the task has to check its `TaskContext` to notice kill and pause requests.
+    Methods:
+        start(): Starts the worker process.
+        kill(): Requests the task to stop.
+        interrupt(force): Terminates (or kills) the worker process.
+        pause(): Requests the task to pause.
+        resume(): Resumes the task if it is paused.
+        join(): Waits for the worker process to end and releases the result channel.
+    """
+    cooperative:bool = True
+
+    def __init__(self,
+                 target: Callable[[TaskContext], None],
+                 on_result: Callable[[Any], None]|None = None,
+                 name: str|None = None,
+                 channel_capacity: int = 1 << 22):
+        self.on_result:Callable[[Any], None]|None = on_result
+        self.name:str = name if name is not None else getattr(target, "__name__", "ProcessTask")
+        self.target:Callable[[TaskContext], None] = target
+        self.channel_capacity:int = channel_capacity
+        self.__paused__:bool = False
+        # pipe, channel and process are created on start, so an unstarted task does not hold any resources
+        self.__control__ = None
+        self.__results__:SharedMemoryChannel|None = None
+        self.__process__:multiprocessing.Process|None = None
+        self.__reader__:threading.Thread|None = None
+
+    def __read_results__(self, process:multiprocessing.Process, control, results:SharedMemoryChannel) -> None:
+        """Forwards results from the channel to `on_result` until the worker has ended and the channel is drained.
+        Then releases the control pipe and the channel of this run, also if nobody joins the task, e.g. because it ended on its own.
+        """
+        try:
+            while True:
+                alive = process.is_alive()
+                if results.wait(timeout=0.1):
+                    for result in results.get_all():
+                        if self.on_result is not None:
+                            self.on_result(result)
+                elif not alive:
+                    return
+        finally:
+            control.close()
+            results.close()
+            results.unlink()
+
+    def __send__(self, command:str) -> None:
+        control = self.__control__
+        if control is None:
+            return
+        try:
+            control.send(command)
+        except (BrokenPipeError, OSError):
+            pass  # worker has already ended, the pipe may have been closed by the reader
+
+    def start(self) -> None:
+        self.__control__, worker_control = multiprocessing.Pipe()
+        self.__results__ = SharedMemoryChannel(capacity=self.channel_capacity)
+        self.__process__ = multiprocessing.Process(
+            target=__worker_main__, args=(self.target, worker_control, self.__results__), name=self.name, daemon=True
+        )
+        self.__reader__ = threading.Thread(
+            target=self.__read_results__, args=(self.__process__, self.__control__, self.__results__), name=f"{self.name}-results", daemon=True
+        )
+        self.__process__.start()
+        worker_control.close()
+        self.__reader__.start()
+
+    def kill(self) -> None:
+        """Requests the task to stop. The task ends on its next check of the `TaskContext`."""
+        self.__paused__ = False
+        self.__send__("kill")
+
+    def interrupt(self, force:bool = False) -> bool:
+        """Terminates the worker process. Fallback for tasks that do not react on `kill`.
+        Args:
+            force (bool, optional): Kills the process (SIGKILL) instead of terminating it, for workers that ignore SIGTERM
+                or are stuck in a driver call.
+        Returns:
+            bool: True if the process has been terminated, False if it is not running.
+        """
+        if self.__process__ is None or not self.__process__.is_alive():
+            return False
+        if force:
+            self.__process__.kill() # type:ignore
+        else:
+            self.__process__.terminate() # type:ignore
+        return True
+
+    def pause(self) -> None:
+        """Requests the task to pause on its next check of the `TaskContext`."""
+        self.__paused__ = True
+        self.__send__("pause")
+
+    def resume(self) -> None:
+        """Continues a paused task."""
+        self.__paused__ = False
+        self.__send__("resume")
+
+    @property
+    def is_paused(self) -> bool:
+        """True if the task is requested to pause."""
+        return self.__paused__
+
+    def is_alive(self) -> bool:
+        """True while the worker process runs or its remaining results are still handed to `on_result`."""
+        if self.__process__ is None:
+            return False
+        return self.__process__.is_alive() or (self.__reader__ is not None and self.__reader__.is_alive())
+
+    def join(self, timeout:float|None = None) -> None:
+        """Waits for the worker process to end and its remaining results to be delivered, then all resources are released.
+        Args:
+            timeout (float | None, optional): Maximum time to wait for both, e.g. for a slow `on_result`. None waits forever.
+        """
+        if self.__process__ is None or self.__reader__ is None:
+            return
+        start = time.perf_counter()
+        self.__process__.join(timeout)
+        if self.__process__.is_alive():
+            return
+        # the reader releases the pipe and the channel once it has delivered the remaining results
+        self.__reader__.join(None if timeout is None else max(0.0, timeout - (time.perf_counter() - start)))
+        if self.__reader__.is_alive():
+            return
+        self.__control__, self.__results__, self.__reader__ = None, None, None
@@ -0,0 +1,392 @@
+"""Recording of measurement data into chunked, appendable binary files.
+
+Tasks hand NumPy blocks to `Recorder.write`, which copies them into a queue and returns at once. A writer thread
+collects the blocks of every channel into chunks of about `chunk_bytes`, optionally compresses them with zlib and
+appends them to the channel's file. If the writer falls behind by more than `max_pending_bytes`, new blocks are
+dropped and counted, the producer never waits for the disk.
+
+Every run gets a directory of its own:
+
+* `meta.json`: application, start and stop time, user metadata and, per channel, dtype, shape, sample rate and counters.
+* `<channel>.bfc`: the chunks of one channel. Every chunk starts at a multiple of 64 bytes with a 64 byte header
+  (`__CHUNK_HEADER__`: magic `BFCK`, codec, rows, raw and stored length, time of the first and the last block),
+  followed by the data in C order, raw (codec 0) or zlib compressed (codec 1), padded to 64 bytes. Raw chunks can be
+  memory mapped. The files have no separate index, so a file of an interrupted run can be read up to its last
+  complete chunk.
+
+:Example:
+    ```
+    app.recorder.add_channel("pressure", "float32", shape=(4,), rate=10_000)
+
+    @app.register_measurement_task
+    def acquire():
+        with nidaqmx.Task() as task:
+            task.ai_channels.add_ai_voltage_chan("Dev1/ai0:3")
+            while True:
+                app.recorder.write("pressure", np.array(task.read(number_of_samples_per_channel=1000)).T)
+
+    data = read_channel(app.recorder.path, "pressure")     # after the measurement, shape (n, 4)
+    ```
+"""
+from __future__ import annotations
+import collections
+import dataclasses
+import datetime
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+
+
+ALIGNMENT = 64
+CHUNK_BYTES = 4 * 1024 * 1024           # 4 MB per chunk
+MAX_PENDING_BYTES = 256 * 1024 * 1024   # 256 MB the writer may fall behind
+
+__MAGIC__ = b"BFCK"
+__CODEC_RAW__ = 0
+__CODEC_ZLIB__ = 1
+__CODECS__ = {None: __CODEC_RAW__, "zlib": __CODEC_ZLIB__}
+# magic, codec, rows, length of the raw and the stored data, time of the first and the last block
+__CHUNK_HEADER__ = struct.Struct("<4sB3xQQQdd")
+__CHANNEL_NAME__ = re.compile(r"[A-Za-z0-9_.-]+")
+__WAKEUP_INTERVAL__ = 0.05
+
+
+@dataclasses.dataclass
+class ChannelStats:
+    """A channel of a `Recorder` and its counters of the current (or last) run.
+    Attributes:
+        name (str): Name of the channel, also the name of its file.
+        dtype (np.dtype): Data type of the samples.
+        shape (tuple[int, ...]): Shape of a single sample, e.g. `(channels,)`.
+        rate (float | None): Sample rate in Hz, if the channel is sampled at a fixed rate.
+        rows (int): Samples written to the file.
+        chunks (int): Chunks written to the file.
+        raw_bytes (int): Size of the written samples.
+        stored_bytes (int): Size of the written chunks on disk, without headers and padding.
+        dropped_blocks (int): Blocks that were dropped because the writer had fallen behind.
+        dropped_rows (int): Samples of the dropped blocks.
+    """
+    name:str
+    dtype:np.dtype
+    shape:tuple[int, ...]
+    rate:float|None = None
+    rows:int = 0
+    chunks:int = 0
+    raw_bytes:int = 0
+    stored_bytes:int = 0
+    dropped_blocks:int = 0
+    dropped_rows:int = 0
+
+    def reset(self) -> None:
+        self.rows = self.chunks = self.raw_bytes = self.stored_bytes = self.dropped_blocks = self.dropped_rows = 0
+
+    def to_meta(self) -> dict[str, Any]:
+        meta = dataclasses.asdict(self)
+        meta["dtype"] = self.dtype.str
+        meta["shape"] = list(self.shape)
+        meta["file"] = f"{self.name}.bfc"
+        return meta
+
+
+class __ChannelWriter__:
+    """Blocks of a channel that have not been written yet, and the file they are written to. Used by the writer thread only."""
+
+    def __init__(self, stats:ChannelStats, path:str) -> None:
+        self.stats:ChannelStats = stats
+        self.file = open(path, "wb")
+        self.blocks:list[np.ndarray] = []
+        self.bytes:int = 0
+        self.t_first:float = 0.0
+        self.t_last:float = 0.0
+        self.since:float = 0.0
+
+
+class Recorder:
+    """Writes blocks of samples per channel to chunked files, from a writer thread. Started and stopped by `BFF`
+    together with the measurement, as long as at least one channel has been added.
+    Args:
+        directory (str): Directory the runs are written to, one sub directory per run.
+        compression (str | None, optional): "zlib" or None for raw chunks.
+        level (int, optional): zlib compression level, 1 is the fastest.
+        chunk_bytes (int, optional): Size of the raw data after which a chunk is written.
+        max_pending_bytes (int, optional): Data the writer may fall behind before new blocks are dropped.
+        flush_interval (float, optional): Time in seconds after which a partial chunk is written.
+    Attributes:
+        channels (dict[str, ChannelStats]): The channels and their counters.
+        metadata (dict[str, Any]): User metadata written to `meta.json` of every run, e.g. the serial number of the DUT.
+        path (str | None): Directory of the current (or last) run.
+        error (str | None): The error that stopped the writer, e.g. a full disk.
+    """
+
+    def __init__(self, directory:str, compression:str|None = None, level:int = 1, chunk_bytes:int = CHUNK_BYTES,
+                 max_pending_bytes:int = MAX_PENDING_BYTES, flush_interval:float = 1.0) -> None:
+        if compression not in __CODECS__:
+            raise ValueError(f"Unknown compression {compression!r}, use one of {list(__CODECS__)}")
+        self.directory:str = directory
+        self.compression:str|None = compression
+        self.level:int = level
+        self.chunk_bytes:int = chunk_bytes
+        self.max_pending_bytes:int = max_pending_bytes
+        self.flush_interval:float = flush_interval
+        self.channels:dict[str, ChannelStats] = {}
+        self.metadata:dict[str, Any] = {}
+        self.path:str|None = None
+        self.error:str|None = None
+        self.__meta__:dict[str, Any] = {}
+        self.__lock__ = threading.Lock()
+        self.__queue__:collections.deque[tuple[ChannelStats, np.ndarray, float]] = collections.deque()
+        self.__pending_bytes__:int = 0
+        self.__wakeup__ = threading.Event()
+        self.__stopping__:bool = False
+        self.__recording__:bool = False
+        self.__thread__:threading.Thread|None = None
+
+    @property
+    def is_recording(self) -> bool:
+        return self.__recording__
+
+    @property
+    def pending_bytes(self) -> int:
+        """Data that has been accepted by `write` but not written to disk yet."""
+        return self.__pending_bytes__
+
+    def add_channel(self, name:str, dtype:Any = "float64", shape:tuple[int, ...] = (), rate:float|None = None) -> ChannelStats:
+        """Adds a channel, its samples are recorded from the next run on.
+        Args:
+            name (str): Unique name of the channel, letters, digits, "_", "." and "-" only.
+            dtype (Any, optional): Data type of the samples, blocks are converted to it.
+            shape (tuple[int, ...], optional): Shape of a single sample, e.g. `(channels,)`.
+            rate (float | None, optional): Sample rate in Hz, stored in the metadata (used to replay the run in real time).
+        Raises:
+            ValueError: If the name is not valid or already used.
+            RuntimeError: If a run is being recorded.
+        """
+        if not __CHANNEL_NAME__.fullmatch(name):
+            raise ValueError(f"Invalid channel name {name!r}")
+        if name in self.channels:
+            raise ValueError(f"Channel {name!r} already exists")
+        if self.__thread__ is not None and self.__thread__.is_alive():
+            raise RuntimeError("Channels can not be added while recording")
+        stats = ChannelStats(name, np.dtype(dtype), tuple(shape), rate)
+        self.channels[name] = stats
+        return stats
+
+    def write(self, channel:str, block:Any) -> bool:
+        """Queues a block of samples of a channel, shape `(n, *shape)` or a single sample. Never waits for the writer.
+        The block is copied, its buffer can be reused right away. Can be called from any thread or coroutine.
+        Raises:
+            KeyError: If the channel does not exist.
+            ValueError: If the shape of the samples does not match the channel.
+        Returns:
+            bool: False if the block has been dropped: nothing is recorded, or the writer is `max_pending_bytes` behind.
+        """
+        stats = self.channels[channel]
+        if not self.__recording__:
+            return False
+        data = np.asarray(block)
+        if data.shape == stats.shape:
+            data = data.reshape((1, *stats.shape))
+        elif data.shape[1:] != stats.shape:
+            raise ValueError(f"Samples of {channel!r} have the shape {stats.shape}, got a block of {data.shape}")
+        size = data.size * stats.dtype.itemsize
+        with self.__lock__:
+            if self.__pending_bytes__ + size > self.max_pending_bytes:
+                stats.dropped_blocks += 1
+                stats.dropped_rows += len(data)
+                return False
+            self.__pending_bytes__ += size
+            pending = self.__pending_bytes__
+        self.__queue__.append((stats, data.astype(stats.dtype, order="C", copy=True), time.time()))
+        if pending >= self.chunk_bytes:
+            self.__wakeup__.set()
+        return True
+
+    def start(self, metadata:dict[str, Any]|None = None) -> str|None:
+        """Starts a new run in a new directory. Does nothing if no channel has been added.
+        Args:
+            metadata (dict[str, Any] | None, optional): Metadata of this run, in addition to `metadata`.
+        Raises:
+            RuntimeError: If a run is already being recorded, or the writer of the last run is still writing.
+        Returns:
+            str | None: The directory of the run.
+        """
+        if self.__thread__ is not None:
+            if self.__thread__.is_alive():
+                raise RuntimeError("The recorder is already running")
+            # the writer of a run whose stop timed out has finished in the meantime
+            self.__finished__()
+        if not self.channels:
+            return None
+        started = datetime.datetime.now()
+        path = os.path.join(self.directory, started.strftime("run-%Y%m%d-%H%M%S"))
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(self.directory, started.strftime("run-%Y%m%d-%H%M%S") + f"-{suffix}")
+        os.makedirs(path)
+        for stats in self.channels.values():
+            stats.reset()
+        writers = [__ChannelWriter__(stats, os.path.join(path, f"{stats.name}.bfc")) for stats in self.channels.values()]
+        self.path = path
+        self.error = None
+        self.__meta__ = {"started": started.isoformat(), "stopped": None, **self.metadata, **(metadata or {})}
+        self.__write_meta__()
+        self.__stopping__ = False
+        self.__wakeup__.clear()
+        self.__thread__ = threading.Thread(target=self.__run__, args=(writers,), name="Recorder", daemon=True)
+        self.__thread__.start()
+        self.__recording__ = True
+        return path
+
+    def stop(self, timeout:float|None = None) -> bool:
+        """Stops accepting blocks, writes everything queued so far and closes the files.
+        Args:
+            timeout (float | None, optional): Time in seconds to wait for the writer, None waits until it has finished.
+        Returns:
+            bool: False if the writer has not finished in time. It keeps writing in the background.
+        """
+        thread = self.__thread__
+        if thread is None:
+            return True
+        self.__recording__ = False
+        self.__stopping__ = True
+        self.__wakeup__.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        self.__finished__()
+        return True
+
+    def __finished__(self) -> None:
+        """Releases the finished writer thread and reports the blocks dropped during its run."""
+        self.__thread__ = None
+        dropped = {name: stats.dropped_blocks for name, stats in self.channels.items() if stats.dropped_blocks}
+        if dropped:
+            logging.getLogger("BFF").warning("Recorder dropped blocks of %s, the writer could not keep up", dropped)
+
+    def __run__(self, writers:list[__ChannelWriter__]) -> None:
+        by_channel = {id(writer.stats): writer for writer in writers}
+        try:
+            while True:
+                self.__wakeup__.wait(__WAKEUP_INTERVAL__)
+                self.__wakeup__.clear()
+                stopping = self.__stopping__
+                while self.__queue__:
+                    stats, data, t = self.__queue__.popleft()
+                    writer = by_channel[id(stats)]
+                    if not writer.blocks:
+                        writer.t_first = t
+                        writer.since = time.monotonic()
+                    writer.blocks.append(data)
+                    writer.bytes += data.nbytes
+                    writer.t_last = t
+                    if writer.bytes >= self.chunk_bytes:
+                        self.__write_chunk__(writer)
+                now = time.monotonic()
+                for writer in writers:
+                    if writer.blocks and (stopping or now - writer.since >= self.flush_interval):
+                        self.__write_chunk__(writer)
+                if stopping and not self.__queue__:
+                    break
+        except Exception as e:
+            # e.g. a full disk: stop recording, the producers keep running
+            self.__recording__ = False
+            self.error = f"{type(e).__name__}: {e}"
+            logging.getLogger("BFF").exception("Recorder stopped")
+            self.__queue__.clear()
+            with self.__lock__:
+                self.__pending_bytes__ = 0
+        finally:
+            for writer in writers:
+                writer.file.close()
+            self.__meta__["stopped"] = datetime.datetime.now().isoformat()
+            if self.error is not None:
+                self.__meta__["error"] = self.error
+            self.__write_meta__()
+
+    def __write_chunk__(self, writer:__ChannelWriter__) -> None:
+        blocks, size = writer.blocks, writer.bytes
+        data = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        writer.blocks, writer.bytes = [], 0
+        raw = data.reshape(-1).view(np.uint8)
+        stored = zlib.compress(raw, self.level) if self.compression == "zlib" else raw
+        header = __CHUNK_HEADER__.pack(__MAGIC__, __CODECS__[self.compression], len(data), len(raw), len(stored),
+                                       writer.t_first, writer.t_last)
+        file = writer.file
+        file.write(header.ljust(ALIGNMENT, b"\0"))
+        file.write(stored)
+        file.write(b"\0" * (-len(stored) % ALIGNMENT))
+        file.flush()
+        stats = writer.stats
+        stats.rows += len(data)
+        stats.chunks += 1
+        stats.raw_bytes += len(raw)
+        stats.stored_bytes += len(stored)
+        with self.__lock__:
+            self.__pending_bytes__ -= size
+
+    def __write_meta__(self) -> None:
+        meta = {**self.__meta__, "channels": {name: stats.to_meta() for name, stats in self.channels.items()}}
+        temp = os.path.join(self.path, "meta.json.tmp") # type:ignore
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=2, default=repr)
+        os.replace(temp, os.path.join(self.path, "meta.json")) # type:ignore
+
+
+def read_meta(path:str) -> dict[str, Any]:
+    """Returns the metadata of a recorded run."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def read_index(path:str, channel:str) -> list[dict[str, Any]]:
+    """Returns the chunks of a channel of a run from their headers, stops at the first incomplete chunk."""
+    chunks = []
+    file_path = os.path.join(path, f"{channel}.bfc")
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        offset = 0
+        while offset + ALIGNMENT <= size:
+            file.seek(offset)
+            magic, codec, rows, raw_bytes, stored_bytes, t_first, t_last = __CHUNK_HEADER__.unpack(file.read(__CHUNK_HEADER__.size))
+            if magic != __MAGIC__ or offset + ALIGNMENT + stored_bytes > size:
+                break
+            chunks.append({
+                "offset": offset + ALIGNMENT, "codec": codec, "rows": rows, "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes, "t_first": t_first, "t_last": t_last,
+            })
+            offset += ALIGNMENT + stored_bytes + -stored_bytes % ALIGNMENT
+    return chunks
+
+
+def iter_chunks(path:str, channel:str) -> Iterator[np.ndarray]:
+    """Yields the chunks of a channel of a run as arrays of shape `(rows, *shape)`. Raw chunks are memory mapped."""
+    meta = read_meta(path)["channels"][channel]
+    dtype, shape = np.dtype(meta["dtype"]), tuple(meta["shape"])
+    file_path = os.path.join(path, f"{channel}.bfc")
+    with open(file_path, "rb") as file:
+        for chunk in read_index(path, channel):
+            if chunk["codec"] == __CODEC_RAW__:
+                yield np.memmap(file_path, dtype=dtype, mode="r", offset=chunk["offset"], shape=(chunk["rows"], *shape))
+            else:
+                file.seek(chunk["offset"])
+                raw = zlib.decompress(file.read(chunk["stored_bytes"]))
+                yield np.frombuffer(raw, dtype=dtype).reshape((chunk["rows"], *shape))
+
+
+def read_channel(path:str, channel:str) -> np.ndarray:
+    """Returns all samples of a channel of a run, shape `(n, *shape)`."""
+    chunks = list(iter_chunks(path, channel))
+    if not chunks:
+        meta = read_meta(path)["channels"][channel]
+        return np.empty((0, *meta["shape"]), dtype=np.dtype(meta["dtype"]))
+    return np.concatenate(chunks)
@@ -0,0 +1,250 @@
+"""Replay of recorded runs into streams, for reviews and demos without hardware.
+
+`RecordedRun` opens a run written by `bff.app.recorder.Recorder`. Only the chunk headers are read, the channel files
+are memory mapped and every raw chunk is a NumPy view of the map: opening a run of several GB takes milliseconds and
+only the pages that are replayed are ever read from disk. zlib compressed chunks can not be mapped, they are
+decompressed when the replay reaches them.
+
+`Replay` pushes the samples of the channels into the streams of the same name from a thread of its own, so the views
+receive them exactly like the samples of a live measurement:
+
+* `speed=1.0` replays at real time, `speed=10.0` ten times faster. Samples are placed in time by the channel's
+  sample rate or, if it has none, by the time stamps of the chunks. Like a live acquisition, samples the stream can
+  not take are dropped and counted by its buffer.
+* `speed=None` replays as fast as the views take the samples: the replay waits for free space in the buffers and
+  drops nothing. This measures the throughput of the whole path from the stream to the views.
+
+:Example:
+    ```
+    app = BFF()
+    app.create_stream("pressure", 100_000, "float32", shape=(4,))
+    app.set_replay("records/run-20240501-101500", speed=4.0, loop=True)
+    app.run()       # the start button replays the run instead of starting the measurement tasks
+    ```
+"""
+from __future__ import annotations
+import os
+import time
+import zlib
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from bff.app.killable_thread import CancelToken, KillableThread
+from bff.app.metrics import StopOverrun
+from bff.app.recorder import __CODEC_RAW__, read_index, read_meta
+
+if TYPE_CHECKING:
+    from bff.app.streaming import Stream
+
+
+class RecordedChannel:
+    """A channel of a recorded run, memory mapped.
+    Attributes:
+        name (str): Name of the channel.
+        dtype (np.dtype): Data type of the samples.
+        shape (tuple[int, ...]): Shape of a single sample.
+        rate (float | None): Sample rate in Hz, if it has been recorded.
+        rows (int): Number of samples.
+        starts (np.ndarray): Index of the first sample of every chunk, plus `rows` at the end.
+        times (np.ndarray): Time of every chunk boundary in seconds since the start of the run, used to place the samples in time.
+    """
+
+    def __init__(self, path:str, name:str, meta:dict, t0:float, chunks:list[dict]) -> None:
+        self.name:str = name
+        self.dtype:np.dtype = np.dtype(meta["dtype"])
+        self.shape:tuple[int, ...] = tuple(meta["shape"])
+        self.rate:float|None = meta.get("rate", None)
+        self.__chunks__:list[dict] = chunks
+        rows = [chunk["rows"] for chunk in chunks]
+        self.starts:np.ndarray = np.concatenate(([0], np.cumsum(rows))).astype(np.int64)
+        self.rows:int = int(self.starts[-1])
+        self.__file_path__:str = os.path.join(path, f"{name}.bfc")
+        self.__map__:np.memmap|None = None
+        if self.rows and any(chunk["codec"] == __CODEC_RAW__ for chunk in chunks):
+            self.__map__ = np.memmap(self.__file_path__, dtype=np.uint8, mode="r")
+        self.__cached__:tuple[int, np.ndarray]|None = None
+        if not chunks:
+            self.times:np.ndarray = np.zeros(1)
+        elif self.rate:
+            # a sample is available once its sample period has passed, starting with the first recorded block
+            offset = chunks[0]["t_first"] - t0
+            self.times = offset + self.starts / self.rate
+        else:
+            # all samples of a chunk have arrived when its last block was recorded
+            self.times = np.array([chunks[0]["t_first"]] + [chunk["t_last"] for chunk in chunks]) - t0
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def duration(self) -> float:
+        """Time of the last sample in seconds since the start of the run."""
+        return float(self.times[-1])
+
+    def index_at(self, t:float) -> int:
+        """Number of samples that had been recorded `t` seconds after the start of the run."""
+        return int(np.interp(t, self.times, self.starts))
+
+    def chunk(self, index:int) -> np.ndarray:
+        """The samples of a chunk, a view of the memory map for raw chunks."""
+        chunk = self.__chunks__[index]
+        shape = (chunk["rows"], *self.shape)
+        if chunk["codec"] == __CODEC_RAW__:
+            return np.ndarray(shape, dtype=self.dtype, buffer=self.__map__, offset=chunk["offset"]) # type:ignore
+        if self.__cached__ is None or self.__cached__[0] != index:
+            with open(self.__file_path__, "rb") as file:
+                file.seek(chunk["offset"])
+                data = np.frombuffer(zlib.decompress(file.read(chunk["stored_bytes"])), dtype=self.dtype).reshape(shape)
+            self.__cached__ = (index, data)
+        return self.__cached__[1]
+
+    def slices(self, start:int, stop:int) -> Iterator[np.ndarray]:
+        """Yields the samples `start` to `stop` as views of the chunks they are stored in, without copying."""
+        index = int(np.searchsorted(self.starts, start, side="right")) - 1
+        while start < stop and index < len(self.__chunks__):
+            first = int(self.starts[index])
+            end = min(stop, int(self.starts[index + 1]))
+            if end > start:
+                yield self.chunk(index)[start - first:end - first]
+                start = end
+            index += 1
+
+    def close(self) -> None:
+        self.__map__ = None
+        self.__cached__ = None
+
+
+class RecordedRun:
+    """A run written by `Recorder`, opened for reading. Only the headers are read, the data is memory mapped.
+    Attributes:
+        path (str): Directory of the run.
+        meta (dict): Content of `meta.json`.
+        channels (dict[str, RecordedChannel]): The channels by name.
+    """
+
+    def __init__(self, path:str) -> None:
+        self.path:str = path
+        self.meta:dict = read_meta(path)
+        indices = {name: read_index(path, name) for name in self.meta["channels"]}
+        t0 = min((chunks[0]["t_first"] for chunks in indices.values() if chunks), default=0.0)
+        self.channels:dict[str, RecordedChannel] = {
+            name: RecordedChannel(path, name, meta, t0, indices[name]) for name, meta in self.meta["channels"].items()
+        }
+
+    @property
+    def duration(self) -> float:
+        """Time of the last sample of all channels in seconds since the start of the run."""
+        return max((channel.duration for channel in self.channels.values()), default=0.0)
+
+    def close(self) -> None:
+        for channel in self.channels.values():
+            channel.close()
+
+
+class Replay:
+    """Pushes the samples of a `RecordedRun` into streams, see the module documentation.
+    Args:
+        run (RecordedRun): The run to replay.
+        streams (dict[str, Stream]): The stream of every channel to replay, by channel name.
+        speed (float | None, optional): Replay speed, 1.0 is real time. None replays as fast as the streams are drained.
+        loop (bool, optional): If True, the replay starts over at the end of the run.
+        interval (float, optional): Time in seconds between two pushes to the streams.
+    Attributes:
+        samples (dict[str, int]): Samples pushed per channel, including the ones the streams had to drop.
+        position (float): Time of the run in seconds that has been replayed so far.
+        loops (int): Number of times the end of the run has been reached.
+    Raises:
+        ValueError: If a channel does not exist, or its dtype or sample shape do not match its stream.
+    """
+
+    def __init__(self, run:RecordedRun, streams:dict[str, Stream], speed:float|None = 1.0, loop:bool = False,
+                 interval:float = 0.005) -> None:
+        for name, stream in streams.items():
+            if name not in run.channels:
+                raise ValueError(f"The run has no channel {name!r}")
+            channel = run.channels[name]
+            if stream.buffer.shape != channel.shape or not np.can_cast(channel.dtype, stream.buffer.dtype, "same_kind"):
+                raise ValueError(f"Channel {name!r} ({channel.dtype}, {channel.shape}) does not fit into stream "
+                                 f"{stream.name!r} ({stream.buffer.dtype}, {stream.buffer.shape})")
+        if speed is not None and speed <= 0:
+            raise ValueError("speed has to be greater than 0, or None to replay as fast as possible")
+        self.run:RecordedRun = run
+        self.streams:dict[str, Stream] = dict(streams)
+        self.speed:float|None = speed
+        self.loop:bool = loop
+        self.interval:float = interval
+        self.samples:dict[str, int] = {name: 0 for name in streams}
+        self.position:float = 0.0
+        self.loops:int = 0
+        self.thread:KillableThread|None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the replay from the beginning of the run."""
+        self.samples = {name: 0 for name in self.streams}
+        self.position = 0.0
+        self.loops = 0
+        self.thread = KillableThread(target=self.__run__, cooperative=True, name="Replay")
+        self.thread.start()
+
+    def stop(self, deadline:float|None = None) -> list[StopOverrun]:
+        """Stops the replay.
+        Args:
+            deadline (float | None, optional): `time.perf_counter()` value to give up at. None waits until it has stopped.
+        Returns:
+            list[StopOverrun]: The replay, if it did not stop by the deadline.
+        """
+        if self.thread is None:
+            return []
+        start = time.perf_counter()
+        self.thread.kill()
+        self.thread.join(None if deadline is None else max(0.0, deadline - start))
+        if self.thread.is_alive():
+            return [StopOverrun("replay", max(0.0, (deadline or start) - start), time.perf_counter() - start, stopped=False)]
+        return []
+
+    def __run__(self, token:CancelToken) -> None:
+        channels = [(self.run.channels[name], stream) for name, stream in self.streams.items()]
+        while True:
+            cursors = [0] * len(channels)
+            begin = time.perf_counter()
+            while not self.__step__(channels, cursors, begin):
+                if token.sleep(self.interval):
+                    return
+            self.loops += 1
+            if not self.loop or token.should_stop():
+                return
+
+    def __step__(self, channels:list[tuple[RecordedChannel, Stream]], cursors:list[int], begin:float) -> bool:
+        """Pushes the next samples of all channels. Returns True at the end of the run."""
+        if self.speed is None:
+            self.__push_free__(channels, cursors)
+            self.position = max((float(np.interp(cursor, channel.starts, channel.times))
+                                 for (channel, _), cursor in zip(channels, cursors)), default=0.0)
+            return all(cursor >= channel.rows for (channel, _), cursor in zip(channels, cursors))
+        self.position = (time.perf_counter() - begin) * self.speed
+        self.__push_until__(channels, cursors, self.position)
+        return self.position >= self.run.duration
+
+    def __push_until__(self, channels:list[tuple[RecordedChannel, Stream]], cursors:list[int], t:float) -> None:
+        """Pushes the samples recorded up to `t`. Samples that do not fit are dropped by the stream buffer."""
+        for i, (channel, stream) in enumerate(channels):
+            stop = channel.index_at(t)
+            for block in channel.slices(cursors[i], stop):
+                stream.buffer.push(block)
+            self.samples[channel.name] += stop - cursors[i]
+            cursors[i] = stop
+
+    def __push_free__(self, channels:list[tuple[RecordedChannel, Stream]], cursors:list[int]) -> None:
+        """Pushes as many samples as the stream buffers can take."""
+        for i, (channel, stream) in enumerate(channels):
+            stop = min(channel.rows, cursors[i] + stream.buffer.free())
+            for block in channel.slices(cursors[i], stop):
+                stream.buffer.push(block)
+            self.samples[channel.name] += stop - cursors[i]
+            cursors[i] = stop
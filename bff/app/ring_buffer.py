@@ -0,0 +1,168 @@
+"""Preallocated single-producer/single-consumer ring buffers for streaming samples from tasks to the GUI.
+
+A task pushes blocks of samples, the GUI pops everything that is available in one batch at display rate.
+Producer and consumer only share two monotonic counters, no lock is involved:
+the producer writes the data first and publishes it by advancing the write counter afterwards,
+the consumer copies the data and releases the space by advancing the read counter.
+The producer never blocks. If a block does not fit, the samples that do not fit are dropped and counted.
+
+`RingBuffer` lives in the memory of the current process and is meant for threads.
+`SharedRingBuffer` lives in shared memory and can be handed over to a worker process as argument.
+
+:Example:
+    ```
+    buffer = RingBuffer(capacity=100_000, dtype=np.float64, shape=(2,))
+
+    def producer():
+        while True:
+            buffer.push(read_block())   # block of shape (n, 2)
+
+    def on_timer():
+        batch = buffer.pop()            # all available samples, shape (m, 2)
+        plot(batch)
+    ```
+"""
+from __future__ import annotations
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+
+
+class RingBuffer:
+    """NumPy backed single-producer/single-consumer ring buffer.
+    Attributes:
+        capacity (int): Number of samples the buffer can hold.
+        dtype (np.dtype): Data type of the samples.
+        shape (tuple[int, ...]): Shape of a single sample, e.g. `(channels,)`. Empty for scalar samples.
+    Methods:
+        push(block): Appends samples. Never blocks, samples that do not fit are dropped.
+        pop(max_samples): Removes and returns the available samples.
+        available(): Number of samples waiting to be popped.
+    """
+    # header layout: write counter, read counter, overruns, dropped samples
+    __WRITE__, __READ__, __OVERRUNS__, __DROPPED__ = range(4)
+    __HEADER_SIZE__ = 4
+
+    def __init__(self, capacity:int, dtype:Any = np.float64, shape:tuple[int, ...] = ()) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity has to be greater than 0")
+        self.capacity:int = capacity
+        self.dtype:np.dtype = np.dtype(dtype)
+        self.shape:tuple[int, ...] = tuple(shape)
+        self.__header__, self.__data__ = self.__allocate__()
+
+    def __allocate__(self) -> tuple[np.ndarray, np.ndarray]:
+        header = np.zeros(self.__HEADER_SIZE__, dtype=np.int64)
+        data = np.zeros((self.capacity, *self.shape), dtype=self.dtype)
+        return header, data
+
+    @property
+    def overruns(self) -> int:
+        """Number of `push` calls that could not store all of their samples."""
+        return int(self.__header__[self.__OVERRUNS__])
+
+    @property
+    def dropped(self) -> int:
+        """Number of samples that have been dropped because the buffer was full."""
+        return int(self.__header__[self.__DROPPED__])
+
+    def available(self) -> int:
+        """Returns the number of samples waiting to be popped."""
+        return int(self.__header__[self.__WRITE__] - self.__header__[self.__READ__])
+
+    def free(self) -> int:
+        """Returns the number of samples that can be pushed without dropping any."""
+        return self.capacity - self.available()
+
+    def push(self, block:Any) -> int:
+        """Appends a block of samples. To be called by the producer only.
+        Args:
+            block (array_like): Samples of shape `(n, *shape)`, a single sample of shape `shape` is accepted as well.
+        Returns:
+            int: Number of samples that have been stored. Samples that did not fit are dropped and counted.
+        """
+        block = np.asarray(block, dtype=self.dtype).reshape((-1, *self.shape))
+        write = int(self.__header__[self.__WRITE__])
+        count = min(len(block), self.capacity - (write - int(self.__header__[self.__READ__])))
+        if count < len(block):
+            self.__header__[self.__OVERRUNS__] += 1
+            self.__header__[self.__DROPPED__] += len(block) - count
+        if count <= 0:
+            return 0
+        start = write % self.capacity
+        first = min(count, self.capacity - start)
+        self.__data__[start:start + first] = block[:first]
+        if first < count:
+            self.__data__[:count - first] = block[first:count]
+        # publish the samples only after they have been copied
+        self.__header__[self.__WRITE__] = write + count
+        return count
+
+    def pop(self, max_samples:int|None = None) -> np.ndarray:
+        """Removes and returns the available samples as one contiguous batch. To be called by the consumer only.
+        Args:
+            max_samples (int | None, optional): Upper limit for the batch size. None returns everything that is available.
+        Returns:
+            np.ndarray: Samples of shape `(m, *shape)`, m might be 0.
+        """
+        read = int(self.__header__[self.__READ__])
+        count = int(self.__header__[self.__WRITE__]) - read
+        if max_samples is not None:
+            count = min(count, max_samples)
+        start = read % self.capacity
+        first = min(count, self.capacity - start)
+        if first == count:
+            batch = self.__data__[start:start + count].copy()
+        else:
+            batch = np.concatenate((self.__data__[start:], self.__data__[:count - first]))
+        # release the space only after the samples have been copied
+        self.__header__[self.__READ__] = read + count
+        return batch
+
+    def clear(self) -> None:
+        """Discards all available samples. To be called by the consumer only."""
+        self.__header__[self.__READ__] = self.__header__[self.__WRITE__]
+
+
+class SharedRingBuffer(RingBuffer):
+    """`RingBuffer` in shared memory. Can be passed to a worker process as argument, the worker attaches to the same memory.
+    Producer and consumer may live in different processes.
+    Methods:
+        close(): Detaches from the shared memory block.
+        unlink(): Releases the shared memory block, to be called once by the creator.
+    """
+    def __init__(self, capacity:int, dtype:Any = np.float64, shape:tuple[int, ...] = (), name:str|None = None) -> None:
+        self.__shm_name__:str|None = name
+        super().__init__(capacity, dtype, shape)
+
+    def __allocate__(self) -> tuple[np.ndarray, np.ndarray]:
+        header_bytes = self.__HEADER_SIZE__ * np.dtype(np.int64).itemsize
+        data_bytes = self.capacity * int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+        create = self.__shm_name__ is None
+        self.__shm__ = SharedMemory(name=self.__shm_name__, create=create, size=header_bytes + data_bytes)
+        header = np.ndarray((self.__HEADER_SIZE__,), dtype=np.int64, buffer=self.__shm__.buf)
+        data = np.ndarray((self.capacity, *self.shape), dtype=self.dtype, buffer=self.__shm__.buf, offset=header_bytes)
+        if create:
+            header[:] = 0
+        return header, data
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"capacity": self.capacity, "dtype": self.dtype.str, "shape": self.shape, "name": self.__shm__.name}
+
+    def __setstate__(self, state:dict[str, Any]) -> None:
+        self.__init__(state["capacity"], state["dtype"], state["shape"], name=state["name"])
+
+    @property
+    def name(self) -> str:
+        """Name of the underlying shared memory block."""
+        return self.__shm__.name
+
+    def close(self) -> None:
+        """Detaches from the shared memory block."""
+        del self.__header__, self.__data__
+        self.__shm__.close()
+
+    def unlink(self) -> None:
+        """Releases the shared memory block. Has to be called exactly once, by the process that created the buffer."""
+        self.__shm__.unlink()
@@ -0,0 +1,243 @@
+"""Process-wide scheduler for periodic jobs.
+
+Instead of one thread per `while True: ...; time.sleep(period)` loop, periodic jobs are registered at a single
+`PeriodicScheduler`. One dispatcher thread keeps the due times of all jobs in a heap and hands due jobs over to
+a small worker pool.
+
+Due times are absolute (`start + n * period`), so the execution time of a job and the wake up latency do not
+accumulate into a drift. A job that is still running when it is due again is not started twice, the tick is
+counted as overrun and skipped. Ticks that have been missed completely (e.g. because the machine was suspended)
+are skipped as well, the job continues on the next tick in the future.
+
+:Example:
+    ```
+    scheduler = PeriodicScheduler(workers=2)
+    job = scheduler.add(read_inputs, period=0.1)
+    scheduler.start()
+    time.sleep(5)
+    print(job.stats)
+    scheduler.stop()
+    ```
+"""
+from __future__ import annotations
+import dataclasses
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+
+@dataclasses.dataclass
+class JobStats:
+    """Timing statistics of a periodic job. Jitter is the delay between the due time and the actual start."""
+    runs:int = 0
+    overruns:int = 0
+    skipped:int = 0
+    errors:int = 0
+    last_error:BaseException|None = None
+    last_jitter:float = 0.0
+    max_jitter:float = 0.0
+    total_jitter:float = 0.0
+    last_duration:float = 0.0
+    max_duration:float = 0.0
+    total_duration:float = 0.0
+    cpu_time:float = 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        return self.total_jitter / self.runs if self.runs else 0.0
+
+    @property
+    def mean_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0.0
+
+
+class PeriodicJob:
+    """A function that is called periodically by a `PeriodicScheduler`.
+    Attributes:
+        function (Callable[[], None]): The function to be called.
+        period (float): Period in seconds.
+        name (str): Name of the job, defaults to the name of the function.
+        stats (JobStats): Timing statistics, updated after every run.
+    """
+    def __init__(self, function:Callable[[], None], period:float, name:str|None = None) -> None:
+        if period <= 0:
+            raise ValueError("period has to be greater than 0")
+        self.function:Callable[[], None] = function
+        self.period:float = period
+        self.name:str = name if name is not None else getattr(function, "__name__", "job")
+        self.stats:JobStats = JobStats()
+        self.next_due:float = 0.0
+        self.__running__:bool = False
+        self.__cancelled__:bool = False
+        self.__idle__ = threading.Event()
+        self.__idle__.set()
+
+    @property
+    def running(self) -> bool:
+        """True while the function is executed."""
+        return self.__running__
+
+    def __run__(self, due:float) -> None:
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        jitter = start - due
+        try:
+            self.function()
+        except Exception as e:
+            self.stats.errors += 1
+            self.stats.last_error = e
+        finally:
+            duration = time.perf_counter() - start
+            stats = self.stats
+            stats.runs += 1
+            stats.last_jitter = jitter
+            stats.max_jitter = max(stats.max_jitter, jitter)
+            stats.total_jitter += jitter
+            stats.last_duration = duration
+            stats.max_duration = max(stats.max_duration, duration)
+            stats.total_duration += duration
+            stats.cpu_time += time.thread_time() - cpu_start
+            self.__running__ = False
+            self.__idle__.set()
+
+    def wait_idle(self, timeout:float|None = None) -> bool:
+        """Waits until the current run (if any) has finished. Returns False if the timeout elapsed before."""
+        return self.__idle__.wait(timeout)
+
+
+class PeriodicScheduler:
+    """Multiplexes many periodic jobs over one dispatcher thread and a small worker pool.
+    Methods:
+        add(function, period): Adds a job, it is due immediately.
+        remove(job): Removes a job, optionally waits for its current run.
+        start(): Starts the dispatcher.
+        stop(): Stops the dispatcher and waits for all running jobs.
+    """
+    # the dispatcher sleeps on its condition until shortly before the due time, the rest is slept precisely
+    __PRECISE_SLEEP__ = 0.002
+
+    def __init__(self, workers:int = 4, name:str = "PeriodicScheduler") -> None:
+        self.workers:int = workers
+        self.name:str = name
+        self.jobs:list[PeriodicJob] = []
+        self.__heap__:list[tuple[float, int, PeriodicJob]] = []
+        self.__sequence__ = itertools.count()
+        self.__condition__ = threading.Condition()
+        self.__stopped__:bool = True
+        self.__dispatcher__:threading.Thread|None = None
+        self.__pool__:ThreadPoolExecutor|None = None
+
+    @property
+    def is_running(self) -> bool:
+        return not self.__stopped__
+
+    def add(self, function:Callable[[], None], period:float, name:str|None = None) -> PeriodicJob:
+        """Adds a periodic job. The first run is due immediately.
+        Args:
+            function (Callable[[], None]): The function to be called.
+            period (float): Period in seconds.
+            name (str | None, optional): Name of the job, defaults to the name of the function.
+        Returns:
+            PeriodicJob: The job, gives access to its statistics.
+        """
+        job = PeriodicJob(function, period, name)
+        with self.__condition__:
+            job.next_due = time.perf_counter()
+            self.jobs.append(job)
+            heapq.heappush(self.__heap__, (job.next_due, next(self.__sequence__), job))
+            self.__condition__.notify()
+        return job
+
+    def remove(self, job:PeriodicJob, wait:bool = True, timeout:float|None = None) -> bool:
+        """Removes a job. It will not be started again.
+        Args:
+            job (PeriodicJob): The job to be removed.
+            wait (bool, optional): Waits for the current run of the job to finish.
+            timeout (float | None, optional): Maximum time to wait.
+        Returns:
+            bool: False if the job was still running when the timeout elapsed.
+        """
+        with self.__condition__:
+            job.__cancelled__ = True
+            if job in self.jobs:
+                self.jobs.remove(job)
+            self.__condition__.notify()
+        return job.wait_idle(timeout) if wait else True
+
+    def start(self) -> None:
+        """Starts the dispatcher and the worker pool."""
+        with self.__condition__:
+            if not self.__stopped__:
+                return
+            self.__stopped__ = False
+            self.__pool__ = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-worker")
+            now = time.perf_counter()
+            self.__heap__ = []
+            for job in self.jobs:
+                job.next_due = now
+                heapq.heappush(self.__heap__, (job.next_due, next(self.__sequence__), job))
+        self.__dispatcher__ = threading.Thread(target=self.__dispatch__, name=self.name, daemon=True)
+        self.__dispatcher__.start()
+
+    def stop(self, wait:bool = True) -> None:
+        """Stops the dispatcher. Jobs stay registered and are continued by the next `start`.
+        Args:
+            wait (bool, optional): Waits for all running jobs to finish.
+        """
+        with self.__condition__:
+            if self.__stopped__:
+                return
+            self.__stopped__ = True
+            self.__condition__.notify()
+        if self.__dispatcher__ is not None:
+            self.__dispatcher__.join()
+        if self.__pool__ is not None:
+            self.__pool__.shutdown(wait=wait)
+
+    def __dispatch__(self) -> None:
+        while True:
+            with self.__condition__:
+                while not self.__stopped__:
+                    # drop removed jobs from the top of the heap
+                    while self.__heap__ and self.__heap__[0][2].__cancelled__:
+                        heapq.heappop(self.__heap__)
+                    if not self.__heap__:
+                        self.__condition__.wait()
+                        continue
+                    remaining = self.__heap__[0][0] - time.perf_counter()
+                    if remaining <= self.__PRECISE_SLEEP__:
+                        break
+                    self.__condition__.wait(remaining - self.__PRECISE_SLEEP__)
+                if self.__stopped__:
+                    return
+                due, _, job = heapq.heappop(self.__heap__)
+            remaining = due - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            self.__submit__(job, due)
+
+    def __submit__(self, job:PeriodicJob, due:float) -> None:
+        with self.__condition__:
+            # checked under the lock, so `remove` either prevents the run or waits for it
+            if job.__cancelled__:
+                return
+            if job.__running__:
+                job.stats.overruns += 1
+            else:
+                job.__running__ = True
+                job.__idle__.clear()
+                self.__pool__.submit(job.__run__, due) # type:ignore
+        # schedule on the absolute grid, skip ticks that are already in the past
+        next_due = due + job.period
+        now = time.perf_counter()
+        if next_due <= now:
+            missed = int((now - next_due) // job.period) + 1
+            job.stats.skipped += missed
+            next_due += missed * job.period
+        job.next_due = next_due
+        with self.__condition__:
+            if not job.__cancelled__:
+                heapq.heappush(self.__heap__, (next_due, next(self.__sequence__), job))
@@ -0,0 +1,152 @@
+"""A single-producer/single-consumer channel for Python objects living in shared memory.
+
+Objects are pickled and written as length-prefixed frames into a byte ring inside a `SharedMemory` block.
+Producer and consumer only share two monotonic counters in the header of that block, no lock is involved.
+The channel can be handed over to a `multiprocessing.Process` as argument, the child attaches to the same block.
+
+:Example:
+    ```
+    def worker(channel:SharedMemoryChannel):
+        for i in range(10):
+            channel.put(i)
+
+    channel = SharedMemoryChannel()
+    proc = multiprocessing.Process(target=worker, args=(channel,))
+    proc.start()
+    while proc.is_alive() or channel.available():
+        if channel.wait(0.1):
+            print(channel.get_all())
+    proc.join()
+    channel.close()
+    channel.unlink()
+    ```
+"""
+from __future__ import annotations
+import multiprocessing
+import pickle
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+
+class SharedMemoryChannel:
+    """Lock free byte ring in shared memory that transports pickled objects from one producer to one consumer.
+    Attributes:
+        capacity (int): Size of the data area in bytes.
+    Methods:
+        put(obj): Sends an object, waits while the channel is full.
+        get_all(): Returns all objects that are currently available.
+        wait(timeout): Waits until data is available.
+        close(): Detaches from the shared memory block.
+        unlink(): Releases the shared memory block, to be called once by the creator.
+    """
+    __HEADER__ = struct.Struct("<QQ")  # write counter, read counter
+    __FRAME__ = struct.Struct("<I")    # payload length
+
+    def __init__(self, capacity:int = 1 << 20, name:str|None = None, data_ready=None) -> None:
+        self.capacity:int = capacity
+        create = name is None
+        self.__shm__ = SharedMemory(name=name, create=create, size=self.__HEADER__.size + capacity)
+        self.__buf__ = self.__shm__.buf
+        if create:
+            self.__HEADER__.pack_into(self.__buf__, 0, 0, 0)
+        self.__data_ready__ = data_ready if data_ready is not None else multiprocessing.Event()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"capacity": self.capacity, "name": self.__shm__.name, "data_ready": self.__data_ready__}
+
+    def __setstate__(self, state:dict[str, Any]) -> None:
+        self.__init__(state["capacity"], name=state["name"], data_ready=state["data_ready"])
+
+    @property
+    def name(self) -> str:
+        """Name of the underlying shared memory block."""
+        return self.__shm__.name
+
+    def __counters__(self) -> tuple[int, int]:
+        return self.__HEADER__.unpack_from(self.__buf__, 0)
+
+    def available(self) -> int:
+        """Returns the number of bytes that are waiting to be read."""
+        written, read = self.__counters__()
+        return written - read
+
+    def __write__(self, position:int, data:bytes|memoryview) -> None:
+        offset = self.__HEADER__.size
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        self.__buf__[offset + start:offset + start + first] = data[:first]
+        if first < len(data):
+            self.__buf__[offset:offset + len(data) - first] = data[first:]
+
+    def __read__(self, position:int, size:int) -> bytes:
+        offset = self.__HEADER__.size
+        start = position % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self.__buf__[offset + start:offset + start + first])
+        if first < size:
+            data += bytes(self.__buf__[offset:offset + size - first])
+        return data
+
+    def put(self, obj:Any, timeout:float|None = None) -> bool:
+        """Pickles the object and writes it into the channel. Waits while there is not enough space left.
+        Args:
+            obj (Any): A picklable object.
+            timeout (float | None, optional): Maximum time to wait for free space. None waits forever.
+        Raises:
+            ValueError: If the pickled object does not fit into the channel at all.
+        Returns:
+            bool: True if the object has been written, False if the timeout elapsed.
+        """
+        payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        size = self.__FRAME__.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(f"Object of {len(payload)} bytes does not fit into a channel of {self.capacity} bytes")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            written, read = self.__counters__()
+            if self.capacity - (written - read) >= size:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        self.__write__(written, self.__FRAME__.pack(len(payload)))
+        self.__write__(written + self.__FRAME__.size, payload)
+        # publish the frame only after it has been written completely
+        struct.pack_into("<Q", self.__buf__, 0, written + size)
+        self.__data_ready__.set()
+        return True
+
+    def get_all(self) -> list[Any]:
+        """Returns all objects that are currently available, oldest first."""
+        written, read = self.__counters__()
+        objects: list[Any] = []
+        while read < written:
+            (length,) = self.__FRAME__.unpack(self.__read__(read, self.__FRAME__.size))
+            objects.append(pickle.loads(self.__read__(read + self.__FRAME__.size, length)))
+            read += self.__FRAME__.size + length
+        struct.pack_into("<Q", self.__buf__, 8, read)
+        return objects
+
+    def wait(self, timeout:float|None = None) -> bool:
+        """Waits until data is available.
+        Args:
+            timeout (float | None, optional): Maximum time to wait. None waits forever.
+        Returns:
+            bool: True if data is available.
+        """
+        if self.available():
+            return True
+        self.__data_ready__.wait(timeout)
+        self.__data_ready__.clear()
+        return self.available() > 0
+
+    def close(self) -> None:
+        """Detaches from the shared memory block."""
+        self.__buf__ = None
+        self.__shm__.close()
+
+    def unlink(self) -> None:
+        """Releases the shared memory block. Has to be called exactly once, by the process that created the channel."""
+        self.__shm__.unlink()
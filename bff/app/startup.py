@@ -0,0 +1,92 @@
+"""Startup trace and the lazily created `QApplication`.
+
+The `profiler` collects the time spent in the expensive steps of the startup (imports, `QApplication`, stylesheet,
+icon rendering, view construction) from the moment `bff.app` is imported. Collecting costs next to nothing,
+the report is only printed if profiling is enabled, either by `BFF(profile_startup=True)` or by setting the
+environment variable `BFF_PROFILE_STARTUP=1`. It is printed to stderr as soon as the main window has been painted
+for the first time:
+
+    ```
+    startup trace (first paint after 412.3 ms)
+      section                         total      count   first at
+      import bff.app                 103.5 ms        1      0.0 ms
+      QApplication                    21.2 ms        1    104.1 ms
+      ...
+    ```
+"""
+from __future__ import annotations
+import contextlib
+import os
+import sys
+import time
+from collections.abc import Iterator
+
+from PyQt6.QtWidgets import QApplication
+
+
+class StartupProfiler:
+    """Accumulates the duration of named sections and the time of named marks relative to its creation.
+    Attributes:
+        enabled (bool): Prints the report on `finish`.
+    """
+
+    def __init__(self) -> None:
+        self.enabled:bool = os.environ.get("BFF_PROFILE_STARTUP", "") not in ("", "0")
+        self.t0:float = time.perf_counter()
+        # name -> [total duration, count, first start relative to t0]
+        self.sections:dict[str, list[float]] = {}
+        self.marks:dict[str, float] = {}
+        self.__finished__:bool = False
+
+    @contextlib.contextmanager
+    def section(self, name:str) -> Iterator[None]:
+        """Measures the enclosed block. Repeated sections with the same name are summed up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            entry = self.sections.get(name, None)
+            if entry is None:
+                self.sections[name] = [duration, 1, start - self.t0]
+            else:
+                entry[0] += duration
+                entry[1] += 1
+
+    def mark(self, name:str) -> None:
+        """Records the time of an event, e.g. the first paint. Only the first occurrence counts."""
+        self.marks.setdefault(name, time.perf_counter() - self.t0)
+
+    def report(self) -> str:
+        """Returns the trace as a table, sections in the order they started."""
+        first_paint = self.marks.get("first paint", None)
+        title = f"startup trace (first paint after {first_paint * 1000:.1f} ms)" if first_paint is not None else "startup trace"
+        lines = [title, f"  {'section':<28} {'total':>10} {'count':>8} {'first at':>10}"]
+        for name, (total, count, first) in sorted(self.sections.items(), key=lambda item: item[1][2]):
+            lines.append(f"  {name:<28} {total * 1000:>7.1f} ms {int(count):>8} {first * 1000:>7.1f} ms")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {name:<28} {'':>10} {'':>8} {at * 1000:>7.1f} ms")
+        return "\n".join(lines)
+
+    def finish(self) -> None:
+        """Prints the report once, if profiling is enabled."""
+        if self.enabled and not self.__finished__:
+            self.__finished__ = True
+            print(self.report(), file=sys.stderr)
+
+
+profiler = StartupProfiler()
+# keeps the application created by `get_qapp` alive
+__qapp__:QApplication|None = None
+
+
+def get_qapp() -> QApplication:
+    """Returns the `QApplication`, creates it on the first call.
+    Creating it lazily keeps `import bff.app` free of side effects and lets tools import parts of it without a GUI.
+    """
+    global __qapp__
+    app = QApplication.instance()
+    if app is None:
+        with profiler.section("QApplication"):
+            app = __qapp__ = QApplication(sys.argv)
+    return app # type:ignore
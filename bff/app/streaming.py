@@ -0,0 +1,102 @@
+"""GUI side of the task-to-view data path.
+
+A `Stream` owns a ring buffer that tasks push their samples into. A `QTimer` drains the buffer at display rate
+and emits everything that arrived since the last tick as one batch, so the Qt event queue sees one event per frame
+instead of one per sample. Overruns of the buffer are reported with the next batch.
+
+:Example:
+    ```
+    stream = app.create_stream("pressure", capacity=100_000)
+    stream.s_data.connect(lambda batch: label.setText(f"{batch[-1]:.2f} bar"))
+
+    @app.register_measurement_task
+    def acquire():
+        while True:
+            stream.buffer.push(read_block())
+    ```
+"""
+from __future__ import annotations
+from typing import Any
+
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from bff.app.ring_buffer import RingBuffer, SharedRingBuffer
+
+
+class Stream(QObject):
+    """Drains a ring buffer on a timer in the GUI thread and emits the samples in batches.
+    Attributes:
+        name (str): Name of the stream.
+        buffer (RingBuffer): The buffer tasks push their samples into. A `SharedRingBuffer` for streams fed by worker processes.
+    Signals:
+        s_data (np.ndarray): All samples that arrived since the last tick, shape `(n, *buffer.shape)`.
+        s_overrun (int, int): Total number of overruns and of dropped samples, emitted whenever they increased.
+    """
+    s_data = pyqtSignal(object)
+    s_overrun = pyqtSignal(int, int)
+
+    def __init__(self, name:str, buffer:RingBuffer, interval_ms:int = 33, max_batch:int|None = None, parent:QObject|None = None) -> None:
+        super().__init__(parent)
+        self.name:str = name
+        self.buffer:RingBuffer = buffer
+        self.max_batch:int|None = max_batch
+        self.batches:int = 0
+        self.samples:int = 0
+        self.__overruns__:int = 0
+        self.__timer__ = QTimer(self)
+        self.__timer__.setInterval(interval_ms)
+        self.__timer__.timeout.connect(self.drain)
+
+    @property
+    def interval_ms(self) -> int:
+        """Drain interval in milliseconds."""
+        return self.__timer__.interval()
+
+    @interval_ms.setter
+    def interval_ms(self, value:int) -> None:
+        self.__timer__.setInterval(value)
+
+    @property
+    def overruns(self) -> int:
+        """Number of pushes that could not store all of their samples."""
+        return self.buffer.overruns
+
+    @property
+    def dropped(self) -> int:
+        """Number of samples that have been dropped because the buffer was full."""
+        return self.buffer.dropped
+
+    def push(self, block:Any) -> int:
+        """Shortcut for `buffer.push`, to be called by the producing task."""
+        return self.buffer.push(block)
+
+    def start(self) -> None:
+        """Starts draining. Has to be called from the GUI thread."""
+        self.__timer__.start()
+
+    def stop(self) -> None:
+        """Stops draining and emits whatever is left in the buffer."""
+        self.__timer__.stop()
+        self.drain()
+
+    @pyqtSlot()
+    def drain(self) -> None:
+        """Pops one batch from the buffer and emits it. Called by the timer."""
+        overruns = self.buffer.overruns
+        if overruns != self.__overruns__:
+            self.__overruns__ = overruns
+            self.s_overrun.emit(overruns, self.buffer.dropped)
+        if not self.buffer.available():
+            return
+        batch: np.ndarray = self.buffer.pop(self.max_batch)
+        self.batches += 1
+        self.samples += len(batch)
+        self.s_data.emit(batch)
+
+    def close(self) -> None:
+        """Stops draining and releases the buffer if it lives in shared memory."""
+        self.__timer__.stop()
+        if isinstance(self.buffer, SharedRingBuffer):
+            self.buffer.close()
+            self.buffer.unlink()
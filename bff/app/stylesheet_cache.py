@@ -0,0 +1,236 @@
+"""Compiled qt_material stylesheets, cached in memory and on disk.
+
+`qt_material.apply_stylesheet` renders its Jinja template and regenerates its icon resources on every call.
+Here every theme file is compiled once: the stylesheet, the theme colors, the environment variables qt_material
+provides for them (`QTMATERIAL_*`) and a directory with the generated icons of the theme. The result is kept in
+memory and as JSON in `stylesheet_cache_dir()`, keyed by theme file and qt_material version. Applying a compiled
+theme only switches the `icon:` search path, restores the environment variables and calls `setStyleSheet`.
+
+Compiling has no side effects on the application, the environment or the search paths, so it can run in a
+background thread, see `precompile_stylesheets`. Applying has to happen in the GUI thread.
+
+Compiling reproduces `qt_material.build_stylesheet` with internals of qt_material, so it is only used for the versions
+in `SUPPORTED_QT_MATERIAL`, whose output has been checked to be identical. With any other version `apply_stylesheet`
+lets qt_material apply the theme itself, uncached.
+"""
+from __future__ import annotations
+import dataclasses
+import importlib.metadata
+import json
+import os
+import platform
+import sys
+import threading
+from xml.dom.minidom import parse
+
+from PyQt6.QtCore import QDir, QStandardPaths
+from PyQt6.QtGui import QColor, QGuiApplication, QPalette
+
+from bff.app.startup import profiler
+
+
+@dataclasses.dataclass
+class CompiledStylesheet:
+    """Everything needed to apply a qt_material theme without rendering it again.
+    Attributes:
+        theme_file (str): qt_material theme file, e.g. "dark_cyan.xml".
+        stylesheet (str): The rendered QSS.
+        colors (dict[str, str]): Theme colors, secondary light and dark colors are inverted.
+        environ (dict[str, str]): Environment variables qt_material sets for the theme.
+        icon_dir (str): Directory of the generated icons, the `icon:` search path of the stylesheet.
+    """
+    theme_file:str
+    stylesheet:str
+    colors:dict[str, str]
+    environ:dict[str, str]
+    icon_dir:str
+
+
+# qt_material versions `__render__` has been checked against, see the module documentation
+SUPPORTED_QT_MATERIAL = ("2.17",)
+
+__compiled__:dict[str, CompiledStylesheet] = {}
+__lock__ = threading.Lock()
+__app_prepared__:bool = False
+
+
+def qt_material_module():
+    """qt_material (together with jinja2) takes a while to import, it is loaded with the first theme."""
+    if "qt_material" not in sys.modules:
+        with profiler.section("import qt_material"):
+            import qt_material
+    return sys.modules["qt_material"]
+
+
+def qt_material_version() -> str:
+    try:
+        return importlib.metadata.version("qt-material")
+    except importlib.metadata.PackageNotFoundError:
+        return getattr(qt_material_module(), "__version__", "unknown")
+
+
+def is_supported() -> bool:
+    """True if the installed qt_material is one of `SUPPORTED_QT_MATERIAL`, so its themes can be compiled and cached."""
+    return qt_material_version() in SUPPORTED_QT_MATERIAL
+
+
+def stylesheet_cache_dir() -> str:
+    """Directory of the on-disk stylesheet cache, below the user cache directory."""
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation)
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), "bff", "stylesheets")
+
+
+def __cache_file__(theme_file:str) -> str:
+    name = os.path.splitext(os.path.basename(theme_file))[0]
+    return os.path.join(stylesheet_cache_dir(), f"{name}-qt_material-{qt_material_version()}.json")
+
+
+def __read_colors__(theme_file:str) -> tuple[dict[str, str], dict[str, str]]:
+    """Reads the colors of a theme file like `qt_material.get_theme(theme_file, invert_secondary=True)`,
+    but returns the environment variables instead of setting them.
+    """
+    qt_material = qt_material_module()
+    path = theme_file if os.path.exists(theme_file) else os.path.join(os.path.dirname(qt_material.__file__), "themes", theme_file)
+    document = parse(path)
+    colors = {child.getAttribute("name"): child.firstChild.nodeValue for child in document.getElementsByTagName("color")}
+    environ = dict(colors)
+    colors["secondaryLightColor"], colors["secondaryDarkColor"] = colors["secondaryDarkColor"], colors["secondaryLightColor"]
+    for color in ["primaryColor", "primaryLightColor", "secondaryColor", "secondaryLightColor",
+                  "secondaryDarkColor", "primaryTextColor", "secondaryTextColor"]:
+        environ[f"QTMATERIAL_{color.upper()}"] = colors[color]
+    environ["QTMATERIAL_THEME"] = theme_file
+    return colors, environ
+
+
+def __generate_icons__(theme_file:str, colors:dict[str, str]) -> str:
+    """Generates the icons of the theme into a directory of their own, so themes do not overwrite each other."""
+    qt_material = qt_material_module()
+    name = os.path.splitext(os.path.basename(theme_file))[0]
+    resources = qt_material.ResourseGenerator(
+        primary=colors["primaryColor"],
+        secondary=colors["secondaryColor"],
+        disabled=colors["secondaryLightColor"],
+        source=os.path.join(os.path.dirname(qt_material.__file__), "resources", "source"),
+        parent=f"bff_{name}",
+    )
+    resources.generate()
+    return resources.index
+
+
+def __render__(theme_file:str) -> CompiledStylesheet:
+    """Renders the qt_material template, mirrors `qt_material.build_stylesheet` without its side effects."""
+    import jinja2
+    qt_material = qt_material_module()
+    colors, environ = __read_colors__(theme_file)
+    icon_dir = __generate_icons__(theme_file, colors)
+    folder, template = os.path.split(qt_material.TEMPLATE_FILE)
+    env = jinja2.Environment(autoescape=False, loader=jinja2.FileSystemLoader(folder))
+    env.filters["opacity"] = qt_material.opacity
+    env.filters["density"] = qt_material.density
+    theme = dict(colors)
+    theme.setdefault("icon", None)
+    theme.setdefault("font_family", "Roboto")
+    theme.setdefault("danger", "#dc3545")
+    theme.setdefault("warning", "#ffc107")
+    theme.setdefault("success", "#17a2b8")
+    theme.setdefault("density_scale", "0")
+    theme.setdefault("button_shape", "default")
+    context = {
+        "linux": platform.system() == "Linux",
+        "windows": platform.system() == "Windows",
+        "darwin": platform.system() == "Darwin",
+        "pyqt6": True,
+        "pyside6": False,
+    }
+    context.update(theme)
+    stylesheet = env.get_template(template).render(context)
+    return CompiledStylesheet(theme_file, stylesheet, colors, environ, icon_dir)
+
+
+def __load__(theme_file:str) -> CompiledStylesheet|None:
+    try:
+        with open(__cache_file__(theme_file), encoding="utf-8") as file:
+            compiled = CompiledStylesheet(**json.load(file))
+    except (OSError, ValueError, TypeError):
+        return None
+    if not os.path.isdir(os.path.join(compiled.icon_dir, "primary")):
+        # the generated icons have been deleted, e.g. by qt_material itself
+        compiled.icon_dir = __generate_icons__(theme_file, compiled.colors)
+    return compiled
+
+
+def __save__(compiled:CompiledStylesheet) -> None:
+    try:
+        os.makedirs(stylesheet_cache_dir(), exist_ok=True)
+        with open(__cache_file__(compiled.theme_file), "w", encoding="utf-8") as file:
+            json.dump(dataclasses.asdict(compiled), file)
+    except OSError:
+        pass # the cache is optional, e.g. on a read-only home directory
+
+
+def compile_stylesheet(theme_file:str) -> CompiledStylesheet:
+    """Returns the compiled theme from memory, from disk or by rendering it. Thread safe."""
+    compiled = __compiled__.get(theme_file, None)
+    if compiled is not None:
+        return compiled
+    with __lock__:
+        compiled = __compiled__.get(theme_file, None)
+        if compiled is None:
+            compiled = __load__(theme_file)
+            if compiled is None:
+                with profiler.section("compile stylesheet"):
+                    compiled = __render__(theme_file)
+                __save__(compiled)
+            __compiled__[theme_file] = compiled
+        return compiled
+
+
+def apply_compiled_stylesheet(app, compiled:CompiledStylesheet) -> None:
+    """Applies a compiled theme to the application. Has to be called from the GUI thread."""
+    global __app_prepared__
+    qt_material = qt_material_module()
+    if not __app_prepared__:
+        app.setStyle("Fusion")
+        qt_material.add_fonts()
+        QDir.addSearchPath("qt_material", os.path.join(os.path.dirname(qt_material.__file__), "resources"))
+        __app_prepared__ = True
+    os.environ.update(compiled.environ)
+    QDir.setSearchPaths("icon", [compiled.icon_dir])
+    palette = QGuiApplication.palette()
+    primary = compiled.colors["primaryColor"]
+    palette.setColor(QPalette.ColorRole.Text, QColor(*[int(primary[i:i + 2], 16) for i in range(1, 6, 2)], 92))
+    QGuiApplication.setPalette(palette)
+    with profiler.section("stylesheet"):
+        app.setStyleSheet(compiled.stylesheet)
+
+
+def apply_stylesheet(app, theme_file:str) -> None:
+    """Applies a qt_material theme, compiled and cached if the qt_material version is supported. GUI thread only."""
+    if is_supported():
+        apply_compiled_stylesheet(app, compile_stylesheet(theme_file))
+        return
+    qt_material = qt_material_module()
+    with profiler.section("stylesheet"):
+        qt_material.apply_stylesheet(app=app, theme=theme_file, invert_secondary=True)
+
+
+def precompile_stylesheets(theme_files:list[str], background:bool = True) -> threading.Thread|None:
+    """Compiles the given themes, so switching to them later on only applies the cached result.
+    Does nothing if the qt_material version is not supported.
+    Args:
+        theme_files (list[str]): qt_material theme files.
+        background (bool, optional): Compiles in a daemon thread and returns it, otherwise compiles right away.
+    """
+    if not is_supported():
+        return None
+
+    def compile_all() -> None:
+        for theme_file in theme_files:
+            compile_stylesheet(theme_file)
+
+    if not background:
+        compile_all()
+        return None
+    thread = threading.Thread(target=compile_all, name="StylesheetPrecompiler", daemon=True)
+    thread.start()
+    return thread
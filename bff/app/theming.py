@@ -3,13 +3,17 @@ import os
 import sys
 from typing import Any
 
-from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QStandardPaths
+from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor, QGuiApplication
 from PyQt6.QtWidgets import QMainWindow, QWidget, QListWidgetItem
 from PyQt6.QtSvg import QSvgRenderer
-from qt_material import apply_stylesheet, QtStyleTools
-from weakref import WeakSet
+from weakref import WeakSet, WeakMethod, ref
 import enum
-from typing import Protocol
+from typing import Protocol, Callable
+
+from bff.app.startup import profiler
+from bff.app.stylesheet_cache import apply_stylesheet, precompile_stylesheets
 
 
 class Theme(enum.Enum):
@@ -21,8 +25,17 @@ class Theme(enum.Enum):
 class IconContainer(Protocol):
     def setIcon(self, icon:QIcon):...
 
+# logical sizes every icon is rendered in, Qt picks the best match for the size it is drawn with
+ICON_SIZES : tuple[int, ...] = (16, 24, 32)
+
 __icons__ : dict[str, QIcon] = {}
-__icon_widgets_map__ : dict[str, list[Any]] = {}
+__pixmap_cache__ : dict[tuple[str, str, int, float, int], QPixmap] = {}
+# id(widget) -> (weak reference, icon name) and icon name -> {id(widget): weak reference}
+# keyed by id, because some icon containers (e.g. QListWidgetItem) are not hashable
+__widget_icons__ : dict[int, tuple[ref, str]] = {}
+__icon_widgets__ : dict[str, dict[int, ref]] = {}
+__theme_listeners__ : list[ref] = []
+__current_theme__ : Theme|None = None
 
 
 def get_path(relative_path:str) -> str:
@@ -30,17 +43,39 @@ def get_path(relative_path:str) -> str:
     return os.path.join(base_path, relative_path)
 
 
-def colorize_svg_icon(name:str, color:str) -> QIcon:
-    svg_path = get_path(f"assets\\icons\\{name}.svg")
+def icon_cache_dir() -> str:
+    """Directory of the on-disk icon cache, below the user cache directory."""
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation)
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), "bff", "icons")
+
+
+def clear_icon_cache() -> None:
+    """Empties the in-memory and the on-disk icon cache."""
+    __pixmap_cache__.clear()
+    directory = icon_cache_dir()
+    if os.path.isdir(directory):
+        for file in os.listdir(directory):
+            if file.endswith(".png"):
+                os.remove(os.path.join(directory, file))
+
+
+def __device_pixel_ratio__() -> float:
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app is not None else None # type:ignore
+    return screen.devicePixelRatio() if screen is not None else 1.0
+
+
+def __render_pixmap__(svg_path:str, color:str, size:int, dpr:float) -> QPixmap:
+    pixels = max(round(size * dpr), 1)
     # Render the SVG to a transparent pixmap
-    pixmap = QPixmap(24, 24)
+    pixmap = QPixmap(pixels, pixels)
     pixmap.fill(QColor(0,0,0,0))
     renderer = QSvgRenderer(svg_path)
     painter = QPainter(pixmap)
     renderer.render(painter)
     painter.end()
     # Apply color tint
-    tinted_pixmap = QPixmap(24, 24)
+    tinted_pixmap = QPixmap(pixels, pixels)
     tinted_pixmap.fill(QColor(0,0,0,0))
     painter = QPainter(tinted_pixmap)
     painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
@@ -48,46 +83,153 @@ def colorize_svg_icon(name:str, color:str) -> QIcon:
     painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
     painter.fillRect(tinted_pixmap.rect(), QColor(color))
     painter.end()
-    return QIcon(tinted_pixmap)
+    return tinted_pixmap
+
+
+def colorized_pixmap(name:str, color:str, size:int = 24, dpr:float = 1.0) -> QPixmap:
+    """Returns the icon `name` tinted in `color`, rendered for `size` logical pixels at the device pixel ratio `dpr`.
+    Pixmaps are cached in memory and as PNG files in `icon_cache_dir()`, keyed by name, color, size, device pixel ratio
+    and modification time of the SVG. An SVG is only rasterized if neither cache has it.
+    """
+    svg_path = get_path(os.path.join("assets", "icons", f"{name}.svg"))
+    try:
+        mtime = os.stat(svg_path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    key = (name, color, size, dpr, mtime)
+    pixmap = __pixmap_cache__.get(key, None)
+    if pixmap is not None:
+        return pixmap
+    file_color = "".join(c for c in color if c.isalnum())
+    cache_file = os.path.join(icon_cache_dir(), f"{name}-{file_color}-{size}-{dpr:g}-{mtime}.png")
+    pixmap = QPixmap(cache_file) if os.path.exists(cache_file) else QPixmap()
+    if pixmap.isNull():
+        pixmap = __render_pixmap__(svg_path, color, size, dpr)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            pixmap.save(cache_file, "PNG")
+        except OSError:
+            pass # the cache is optional, e.g. on a read-only home directory
+    pixmap.setDevicePixelRatio(dpr)
+    __pixmap_cache__[key] = pixmap
+    return pixmap
+
+
+def colorize_svg_icon(name:str, color:str, sizes:tuple[int, ...]|None = None, dpr:float|None = None) -> QIcon:
+    """Returns the icon `name` tinted in `color`, with one pixmap per size in `sizes` (defaults to `ICON_SIZES`).
+    Args:
+        dpr (float | None, optional): Device pixel ratio, defaults to the one of the primary screen.
+    """
+    with profiler.section("icons"):
+        dpr = dpr if dpr is not None else __device_pixel_ratio__()
+        icon = QIcon()
+        for size in sizes or ICON_SIZES:
+            icon.addPixmap(colorized_pixmap(name, color, size, dpr))
+        return icon
 
 
 def recolor_all_icons():
-    color = os.environ.get("QTMATERIAL_PRIMARYTEXTCOLOR", "red")
+    color = theme_color("primaryTextColor", "#3c3c3c")
     for name in __icons__.keys():
         __icons__[name] = colorize_svg_icon(name, color)
 
 
 def update_widgets():
     for icon_name, icon in __icons__.items():
-        if __icon_widgets_map__.get(icon_name, None) is None:
+        widgets = __icon_widgets__.get(icon_name, None)
+        if not widgets:
             continue
-        for widget in __icon_widgets_map__[icon_name]:
+        for key, widget_ref in list(widgets.items()):
+            widget = widget_ref()
+            if widget is None or sip.isdeleted(widget):
+                # e.g. a list item deleted together with its list, the wrapper outlived the C++ object
+                __forget_widget__(key)
+                continue
             widget.setIcon(icon)
 
 
 def get_icon(name:str) -> QIcon:
     if name not in __icons__:
-        color = os.environ.get("QTMATERIAL_PRIMARYTEXTCOLOR", "red")
+        # icons requested before the first theme is applied get a neutral color and are recolored by `apply_theme`
+        color = theme_color("primaryTextColor", "#3c3c3c")
         icon = colorize_svg_icon(name, color=color)
         __icons__[name] = icon
     return __icons__[name]
 
 
+def __forget_widget__(key:int) -> None:
+    entry = __widget_icons__.pop(key, None)
+    if entry is not None:
+        __icon_widgets__[entry[1]].pop(key, None)
+
+
 def set_widget_icon(icon_name:str, widget) -> None:
-    # check if current widget is already available in any list
-    # is so, remove! To avoid ref leaks and unexpected icons on widgets
-    for lst in __icon_widgets_map__.values():
-        if widget in lst:
-            lst.remove(widget)
+    """Sets the icon on the widget and keeps track of it, so the icon is recolored on theme changes.
+    Only weak references to the widget are kept. A widget is forgotten when it is garbage collected or, for QObjects,
+    when it is destroyed by Qt.
+    """
+    key = id(widget)
+    entry = __widget_icons__.get(key, None)
     # then apply icon to widget
     icon = get_icon(name=icon_name)
     widget.setIcon(icon)
-    if __icon_widgets_map__.get(icon_name, None) is None:
-        __icon_widgets_map__[icon_name] = list()
-    __icon_widgets_map__[icon_name].append(widget)
+    if entry is None:
+        widget_ref = ref(widget, lambda _, key=key: __forget_widget__(key))
+        if isinstance(widget, QObject):
+            widget.destroyed.connect(lambda *_, key=key: __forget_widget__(key))
+    else:
+        widget_ref, previous = entry
+        if previous == icon_name:
+            return
+        # a widget only belongs to the widgets of its current icon, to avoid unexpected icons on widgets
+        __icon_widgets__[previous].pop(key, None)
+    __widget_icons__[key] = (widget_ref, icon_name)
+    __icon_widgets__.setdefault(icon_name, {})[key] = widget_ref
+
+
+def registered_icon_widgets() -> int:
+    """Number of widgets whose icons are kept in sync with the theme."""
+    return len(__widget_icons__)
+
+
+def theme_color(name:str, default:str = "#888888") -> str:
+    """Returns a color of the current theme, e.g. `theme_color("secondaryColor")`. Available after the first `apply_theme`."""
+    return os.environ.get(f"QTMATERIAL_{name.upper()}", default)
+
+
+def current_theme() -> Theme|None:
+    """Returns the theme applied last, None before the first `apply_theme`."""
+    return __current_theme__
+
+
+def register_theme_listener(callback:Callable[[Theme], None]) -> None:
+    """Registers a callback that is called with the new theme after every `apply_theme`.
+    Only a weak reference is kept, so registering a bound method does not keep its widget alive.
+    """
+    __theme_listeners__.append(WeakMethod(callback) if hasattr(callback, "__self__") else ref(callback))
+
+
+def notify_theme_listeners(theme:Theme) -> None:
+    for listener in list(__theme_listeners__):
+        callback = listener()
+        if callback is None:
+            __theme_listeners__.remove(listener)
+            continue
+        callback(theme)
 
 
 def apply_theme(app, theme:Theme) -> None:
-    apply_stylesheet(app=app, theme=theme.value, invert_secondary=True)
+    """Applies the theme to the application, recolors all registered icons and notifies the theme listeners.
+    The stylesheet of each theme is compiled only once and then cached, see `bff.app.stylesheet_cache`.
+    """
+    global __current_theme__
+    apply_stylesheet(app, theme.value)
+    __current_theme__ = theme
     recolor_all_icons()
-    update_widgets()
\ No newline at end of file
+    update_widgets()
+    notify_theme_listeners(theme)
+
+
+def precompile_themes(background:bool = True):
+    """Compiles the stylesheets of all `Theme` members, in a background thread by default."""
+    return precompile_stylesheets([theme.value for theme in Theme], background=background)
@@ -6,8 +6,25 @@ class Config:
     app_name: str = "BFF"
     version: str = "1.0.0"
     server_port: int = 0xBFF
+    server_host: str = "127.0.0.1"
+    server_enabled: bool = False
+    server_token: str|None = None
+    server_allowed_hosts: tuple[str, ...] = ()
     repository: str|None = None
     docu_depot: str|None = None
+    kill_grace_period: float = 2.0
+    task_stop_timeout: float = 5.0
+    shutdown_timeout: float = 10.0
+    logging_stop_timeout: float = 5.0
+    record_directory: str = "records"
+    record_compression: str|None = None
+    output_window: float = 0.001
+    binding_interval_ms: int = 50
+    scheduler_workers: int = 4
+    view_prefetch_interval_ms: int = 100
+    view_unload_check_ms: int = 10_000
+    defer_theme: bool = True
+    precompile_themes: bool = True
 
 
 class DefaultViews(enum.Enum):
@@ -16,3 +33,4 @@ class DefaultViews(enum.Enum):
     SETTINGS = "/SETTINGS"
     USERS = "/USERS"
     ABOUT = "/ABOUT"
+    DIAGNOSTICS = "/DIAGNOSTICS"
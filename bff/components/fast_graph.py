@@ -0,0 +1,163 @@
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtCore import QTimer, pyqtSlot
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+
+from bff.app.streaming import Stream
+from bff.app.theming import Theme, register_theme_listener, theme_color
+from bff.components.live_series import LiveSeries
+
+
+class FastGraphWidget(QWidget):
+    """pyqtgraph based graph for high-rate live views. Use `GraphWidget` (Matplotlib) for static reports.
+    The widget holds one or more plots stacked on top of each other, their x-axes are linked by default.
+    All plots clip to the visible range and downsample automatically (peak mode), so long series stay cheap.
+    Colors follow the application theme and are updated on every theme switch.
+
+    Data is added with `append` or `set_data`, or by connecting a `Stream` with `connect_stream`.
+    Appends that arrive faster than `max_fps` are merged into one frame. With `set_window` the x-axis scrolls
+    and only the last seconds are kept. All methods have to be called from the GUI thread.
+    """
+
+    def __init__(self, parent=None, max_fps:float = 30.0):
+        super().__init__(parent)
+        self.max_fps:float = max_fps
+        self.plots:dict[str, pg.PlotItem] = {}
+        self.curves:dict[str, LiveSeries] = {}
+        self.__window__:float|None = None
+        self.__last_frame__:float = 0.0
+        self.__frame_timer__ = QTimer(self)
+        self.__frame_timer__.setSingleShot(True)
+        self.__frame_timer__.timeout.connect(self.__render__)
+        self.graphics = pg.GraphicsLayoutWidget(self)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.graphics)
+        self.setLayout(layout)
+        register_theme_listener(self.on_theme_changed)
+        self.on_theme_changed(None)
+
+    def add_plot(self, name:str, title:str|None = None, link_x:bool = True) -> pg.PlotItem:
+        """Adds a plot below the existing ones.
+        Args:
+            name (str): Unique name of the plot.
+            title (str | None, optional): Title shown above the plot.
+            link_x (bool, optional): Links the x-axis to the first plot, so zooming and panning affects all of them.
+        Returns:
+            pg.PlotItem: The new plot, for further customization.
+        """
+        if name in self.plots:
+            raise ValueError(f"A plot with the name '{name}' already exists")
+        plot: pg.PlotItem = self.graphics.addPlot(row=len(self.plots), col=0, title=title)
+        plot.setClipToView(True)
+        plot.setDownsampling(auto=True, mode="peak")
+        plot.showGrid(x=True, y=True, alpha=0.3)
+        if link_x and self.plots:
+            plot.setXLink(next(iter(self.plots.values())))
+        self.plots[name] = plot
+        self.__apply_plot_colors__(plot)
+        return plot
+
+    def __curve__(self, label:str, plot:str|None) -> LiveSeries:
+        live = self.curves.get(label, None)
+        if live is not None:
+            return live
+        if plot is None:
+            plot = next(iter(self.plots), None) or "main"
+        if plot not in self.plots:
+            self.add_plot(plot)
+        pen = pg.mkPen(theme_color("primaryColor") if not self.curves else pg.intColor(len(self.curves), hues=9))
+        item = self.plots[plot].plot(pen=pen, name=label)
+        item.setSkipFiniteCheck(True)
+        live = self.curves[label] = LiveSeries(item)
+        return live
+
+    def append(self, x_data, y_data, label:str = "live", plot:str|None = None) -> None:
+        """Appends samples to a curve. The curve (and the plot) is created on the first call with a new label.
+        Args:
+            x_data (float | array_like): x values, monotonically increasing.
+            y_data (float | array_like): y values.
+            label (str, optional): Name of the curve.
+            plot (str | None, optional): Plot to create the curve in, defaults to the first plot.
+        """
+        self.__curve__(label, plot).append(x_data, y_data)
+        self.__schedule_frame__()
+
+    def set_data(self, x_data, y_data, label:str = "live", plot:str|None = None) -> None:
+        """Replaces all samples of a curve."""
+        live = self.__curve__(label, plot)
+        live.start = live.end = 0
+        live.append(x_data, y_data)
+        self.__schedule_frame__()
+
+    def set_window(self, seconds:float|None) -> None:
+        """Lets the x-axis scroll with the live data and keeps only the last `seconds` of it.
+        Args:
+            seconds (float | None): Width of the visible x-range. None keeps all data.
+        """
+        self.__window__ = seconds
+        self.__schedule_frame__()
+
+    def connect_stream(self, stream:Stream, labels:str|list[str], plot:str|None = None, sample_period:float = 1.0) -> None:
+        """Feeds the batches of a stream into curves of this graph.
+        Samples of shape `()` are plotted against their running sample number times `sample_period`.
+        Samples of shape `(1 + n,)` carry the x value in their first column and one value per label in the others.
+        Args:
+            stream (Stream): The stream to be displayed.
+            labels (str | list[str]): Curve label(s) for the y values.
+            plot (str | None, optional): Plot to create the curves in, defaults to the first plot.
+            sample_period (float, optional): x distance between two scalar samples.
+        """
+        labels = [labels] if isinstance(labels, str) else list(labels)
+        counter = [0]
+
+        def on_data(batch:np.ndarray) -> None:
+            if batch.ndim == 1:
+                x = (counter[0] + np.arange(len(batch))) * sample_period
+                counter[0] += len(batch)
+                self.append(x, batch, label=labels[0], plot=plot)
+                return
+            for column, label in enumerate(labels, start=1):
+                self.append(batch[:, 0], batch[:, column], label=label, plot=plot)
+
+        stream.s_data.connect(on_data)
+
+    def __schedule_frame__(self) -> None:
+        """Renders a frame as soon as the frame rate allows it. Calls in between are merged into that frame."""
+        if self.__frame_timer__.isActive():
+            return
+        wait = 1.0 / self.max_fps - (time.perf_counter() - self.__last_frame__)
+        self.__frame_timer__.start(max(int(wait * 1000), 0))
+
+    @pyqtSlot()
+    def __render__(self) -> None:
+        self.__last_frame__ = time.perf_counter()
+        filled = [live for live in self.curves.values() if len(live)]
+        if self.__window__ is not None and filled:
+            x_last = max(live.last_x for live in filled)
+            for live in filled:
+                live.discard_before(x_last - self.__window__)
+            for plot in self.plots.values():
+                if plot.getViewBox().linkedView(pg.ViewBox.XAxis) is None:
+                    plot.setXRange(x_last - self.__window__, x_last, padding=0)
+        for live in self.curves.values():
+            live.line.setData(*live.view())
+
+    def __apply_plot_colors__(self, plot:pg.PlotItem) -> None:
+        foreground = theme_color("primaryTextColor", "#3c3c3c")
+        for axis in ("left", "bottom", "right", "top"):
+            plot.getAxis(axis).setPen(foreground)
+            plot.getAxis(axis).setTextPen(foreground)
+        if plot.titleLabel.text:
+            plot.setTitle(plot.titleLabel.text, color=foreground)
+
+    def on_theme_changed(self, theme:Theme|None) -> None:
+        """Applies the colors of the current application theme."""
+        self.graphics.setBackground(theme_color("secondaryColor", "#f5f5f5"))
+        for plot in self.plots.values():
+            self.__apply_plot_colors__(plot)
+        for index, live in enumerate(self.curves.values()):
+            if index == 0:
+                live.line.setPen(pg.mkPen(theme_color("primaryColor")))
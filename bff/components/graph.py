@@ -5,10 +5,60 @@ from PyQt6.QtGui import QPalette, QColor
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 import numpy as np
+import time
+from bff.components.live_series import LiveSeries
 
 
 
+class MinMaxPyramid:
+    """Min/max decimation pyramid over a series with monotonically increasing x values.
+    Level 0 is the raw data, every further level combines `factor` buckets of the level below into one,
+    keeping the minimum and maximum of each bucket. Rendering a bucket as its min and max preserves every peak,
+    no matter how much the series is decimated.
+    """
+
+    def __init__(self, x_data, y_data, factor:int = 4, min_buckets:int = 256):
+        self.x:np.ndarray = np.asarray(x_data, dtype=np.float64)
+        self.y:np.ndarray = np.asarray(y_data, dtype=np.float64)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError("x_data and y_data have to be one-dimensional and of equal length")
+        self.factor:int = factor
+        # every level holds (x of the first sample in the bucket, bucket minimum, bucket maximum)
+        self.levels:list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        x, y_min, y_max = self.x, self.y, self.y
+        while len(x) > min_buckets:
+            starts = np.arange(0, len(x), factor)
+            x, y_min, y_max = x[starts], np.minimum.reduceat(y_min, starts), np.maximum.reduceat(y_max, starts)
+            self.levels.append((x, y_min, y_max))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def query(self, x_start:float, x_end:float, max_points:int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns at most about `max_points` points that represent the series between `x_start` and `x_end`.
+        One sample beyond each end is included, so the line does not end abruptly at the border of the view.
+        """
+        first = max(int(np.searchsorted(self.x, x_start, side="left")) - 1, 0)
+        last = min(int(np.searchsorted(self.x, x_end, side="right")) + 1, len(self.x))
+        if last - first <= max_points or not self.levels:
+            return self.x[first:last], self.y[first:last]
+        bucket_size = 1
+        for x, y_min, y_max in self.levels:
+            bucket_size *= self.factor
+            buckets = (last - first) // bucket_size + 2
+            if 2 * buckets <= max_points:
+                break
+        lo, hi = first // bucket_size, min(last // bucket_size + 1, len(x))
+        # draw each bucket as a vertical stroke from its minimum to its maximum
+        x_out = np.repeat(x[lo:hi], 2)
+        y_out = np.empty(2 * (hi - lo), dtype=np.float64)
+        y_out[0::2] = y_min[lo:hi]
+        y_out[1::2] = y_max[lo:hi]
+        return x_out, y_out
+
+
 class MplCanvas(FigureCanvas):
 
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -18,10 +68,31 @@ class MplCanvas(FigureCanvas):
 
 
 class GraphWidget(QWidget):
+    """Matplotlib based graph for static data and reports.
+    Series are kept in a `MinMaxPyramid` and only about two points per pixel of the visible x-range are handed over to Matplotlib.
+    Zooming, panning and resizing re-decimate the visible range, so the frame time does not depend on the length of the series.
+
+    Live data is added with `append`. Live series reuse their artist and are drawn by blitting onto a cached background,
+    the full figure is only redrawn when the axes limits have to change. Appends that arrive faster than `max_fps`
+    are merged into one frame. With `set_window` the x-axis scrolls and only the last seconds are kept.
+    `append` has to be called from the GUI thread, e.g. from a slot connected to `Stream.s_data`.
+    """
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_fps:float = 30.0):
         super().__init__(parent)
         self.canvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.series:list[tuple[Line2D, MinMaxPyramid]] = []
+        self.live_series:dict[str, LiveSeries] = {}
+        self.max_fps:float = max_fps
+        self.__window__:float|None = None
+        # x-limits as read back after the last scroll, the float round trip of `set_xlim` is not exact
+        self.__window_xlim__:tuple[float, float]|None = None
+        self.__background__ = None
+        self.__rendering__:bool = False
+        self.__last_frame__:float = 0.0
+        self.__frame_timer__ = QTimer(self)
+        self.__frame_timer__.setSingleShot(True)
+        self.__frame_timer__.timeout.connect(self.__render__)
         toolbar = NavigationToolbar(self.canvas, self)
         self.layout:QVBoxLayout = QVBoxLayout(self)
         self.layout.addWidget(toolbar)
@@ -31,15 +102,133 @@ class GraphWidget(QWidget):
         self.canvas.axes.set_xlabel('X-axis')
         self.canvas.axes.set_ylabel('Y-axis')
         self.canvas.axes.grid(True)
+        self.canvas.axes.callbacks.connect("xlim_changed", self.__on_view_changed__)
+        self.canvas.mpl_connect("resize_event", self.__on_view_changed__)
+        self.canvas.mpl_connect("draw_event", self.__on_draw__)
         x = np.linspace(0, 1_000_000, 1_000_000)
         y = np.sin(x)
         self.plot_data(x, y)
 
+    def __max_points__(self) -> int:
+        """Number of points to be rendered per series: two per horizontal pixel of the axes."""
+        return max(2 * int(self.canvas.axes.bbox.width), 2)
+
+    def __decimate__(self) -> None:
+        x_start, x_end = self.canvas.axes.get_xlim()
+        max_points = self.__max_points__()
+        for line, pyramid in self.series:
+            line.set_data(*pyramid.query(x_start, x_end, max_points))
+
+    def __on_view_changed__(self, *_) -> None:
+        self.__decimate__()
+        if not self.__rendering__:
+            self.canvas.draw_idle()
+
+    def __on_draw__(self, _) -> None:
+        """Caches the background after every full draw and puts the live series on top of it."""
+        self.__background__ = self.canvas.copy_from_bbox(self.canvas.axes.bbox)
+        for live in self.live_series.values():
+            self.canvas.axes.draw_artist(live.line)
+
+    def set_window(self, seconds:float|None) -> None:
+        """Lets the x-axis scroll with the live data and keeps only the last `seconds` of it.
+        Args:
+            seconds (float | None): Width of the visible x-range. None keeps all data and grows the x-range instead.
+        """
+        self.__window__ = seconds
+        self.__window_xlim__ = None
+        self.__schedule_frame__()
+
+    def append(self, x_data, y_data, label:str = "live") -> None:
+        """Appends samples to a live series. The series is created on the first call with a new label.
+        Args:
+            x_data (float | array_like): x values, monotonically increasing.
+            y_data (float | array_like): y values.
+            label (str, optional): Name of the live series.
+        """
+        live = self.live_series.get(label, None)
+        if live is None:
+            line, = self.canvas.axes.plot([], [], label=label, animated=True)
+            live = self.live_series[label] = LiveSeries(line)
+        live.append(x_data, y_data)
+        self.__schedule_frame__()
+
+    def __schedule_frame__(self) -> None:
+        """Renders a frame as soon as the frame rate allows it. Calls in between are merged into that frame."""
+        if self.__frame_timer__.isActive():
+            return
+        wait = 1.0 / self.max_fps - (time.perf_counter() - self.__last_frame__)
+        self.__frame_timer__.start(max(int(wait * 1000), 0))
+
+    def __update_limits__(self) -> bool:
+        """Scrolls/extends the axes limits to the live data. Returns True if the limits have changed."""
+        filled = [live for live in self.live_series.values() if len(live)]
+        if not filled:
+            return False
+        axes = self.canvas.axes
+        changed = False
+        x_last = max(live.last_x for live in filled)
+        left, right = axes.get_xlim()
+        if self.__window__ is not None:
+            for live in filled:
+                live.discard_before(x_last - self.__window__)
+            if x_last > right or (left, right) != self.__window_xlim__:
+                # jump ahead by a quarter window, so the background stays valid for a while
+                right = x_last + 0.25 * self.__window__
+                axes.set_xlim(right - self.__window__, right)
+                self.__window_xlim__ = axes.get_xlim()
+                changed = True
+        elif x_last > right:
+            x_first = min(float(live.view()[0][0]) for live in filled)
+            axes.set_xlim(min(left, x_first), x_last + 0.25 * (x_last - min(left, x_first)))
+            changed = True
+        y_min = min(float(np.nanmin(live.view()[1])) for live in filled)
+        y_max = max(float(np.nanmax(live.view()[1])) for live in filled)
+        bottom, top = axes.get_ylim()
+        if y_min < bottom or y_max > top:
+            margin = 0.1 * max(y_max - y_min, 1e-12)
+            axes.set_ylim(min(bottom, y_min - margin), max(top, y_max + margin))
+            changed = True
+        return changed
+
+    def __render__(self) -> None:
+        self.__last_frame__ = time.perf_counter()
+        self.__rendering__ = True
+        try:
+            full_redraw = self.__update_limits__() or self.__background__ is None
+            x_start, x_end = self.canvas.axes.get_xlim()
+            max_points = self.__max_points__()
+            for live in self.live_series.values():
+                x, y = live.view()
+                if len(x) > max_points:
+                    x, y = MinMaxPyramid(x, y).query(x_start, x_end, max_points)
+                live.line.set_data(x, y)
+        finally:
+            self.__rendering__ = False
+        if full_redraw:
+            # the draw event caches the new background and draws the live series
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.__background__)
+        for live in self.live_series.values():
+            self.canvas.axes.draw_artist(live.line)
+        self.canvas.blit(self.canvas.axes.bbox)
+
     def plot_data(self, x_data, y_data):
+        """Adds a series to the graph. x_data has to be monotonically increasing."""
         # self.canvas.axes.clear()
-        self.canvas.axes.plot(x_data, y_data)
+        pyramid = MinMaxPyramid(x_data, y_data)
+        line, = self.canvas.axes.plot([], [])
+        self.series.append((line, pyramid))
+        if len(pyramid) > 1:
+            x_min = min(p.x[0] for _, p in self.series if len(p))
+            x_max = max(p.x[-1] for _, p in self.series if len(p))
+            self.canvas.axes.set_xlim(x_min, x_max)
+            self.__decimate__()
+            self.canvas.axes.relim()
+            self.canvas.axes.autoscale_view(scalex=False)
         # self.canvas.axes.set_title('Sample Graph')
         # self.canvas.axes.set_xlabel('X-axis')
         # self.canvas.axes.set_ylabel('Y-axis')
         # self.canvas.axes.grid(True)
-        self.canvas.draw()
\ No newline at end of file
+        self.canvas.draw_idle()
@@ -0,0 +1,46 @@
+from typing import Any
+
+import numpy as np
+
+
+class LiveSeries:
+    """Growing x/y storage of a live series. Old samples are discarded by moving the start, the arrays are compacted when they are full.
+    Attributes:
+        line (Any): The artist/curve that displays the series, owned by the graph widget.
+    """
+
+    def __init__(self, line:Any, capacity:int = 4096):
+        self.line:Any = line
+        self.x:np.ndarray = np.empty(capacity, dtype=np.float64)
+        self.y:np.ndarray = np.empty(capacity, dtype=np.float64)
+        self.start:int = 0
+        self.end:int = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def append(self, x_data, y_data) -> None:
+        x_data = np.atleast_1d(np.asarray(x_data, dtype=np.float64))
+        y_data = np.atleast_1d(np.asarray(y_data, dtype=np.float64))
+        count = len(x_data)
+        if self.end + count > len(self.x):
+            size = len(self)
+            capacity = len(self.x) if 2 * (size + count) <= len(self.x) else 2 * (size + count)
+            x, y = np.empty(capacity, dtype=np.float64), np.empty(capacity, dtype=np.float64)
+            x[:size], y[:size] = self.x[self.start:self.end], self.y[self.start:self.end]
+            self.x, self.y, self.start, self.end = x, y, 0, size
+        self.x[self.end:self.end + count] = x_data
+        self.y[self.end:self.end + count] = y_data
+        self.end += count
+
+    def discard_before(self, x_min:float) -> None:
+        """Discards all samples but the last one before `x_min`, so the line still enters the view from the left."""
+        index = int(np.searchsorted(self.x[self.start:self.end], x_min, side="left"))
+        self.start += max(index - 1, 0)
+
+    @property
+    def last_x(self) -> float:
+        return float(self.x[self.end - 1])
+
+    def view(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.x[self.start:self.end], self.y[self.start:self.end]
@@ -0,0 +1,5 @@
+from .image import IOImage, Bit
+from .device import Device, IOTask, AnalogInput, DigitalInput, DigitalOutput
+from .simulated import SimulatedDevice
+from .nidaq import NidaqmxDevice
+from .output import CoalescingOutput, OutputStats
@@ -0,0 +1,287 @@
+"""Device layer of `bff.io`: persistent, pooled I/O tasks with block reads into preallocated buffers.
+
+A `Device` hands out one task per set of lines and keeps it: asking again for the same lines with the same options
+returns the same, already configured task. Creating a driver task and adding its channels costs milliseconds, so it
+must not happen per write or per read. Analog inputs read blocks of samples into a buffer that is allocated once,
+digital ports are read and written as one integer word per port (see `bff.io.IOImage`).
+
+The backends are `SimulatedDevice` (pure Python, no hardware needed) and `NidaqmxDevice` (NI-DAQmx, requires the
+optional `nidaqmx` package). Code written against `Device` runs on both:
+
+    ```
+    device = NidaqmxDevice("Dev2") if use_hardware else SimulatedDevice("Dev2")
+    app.register_on_shutdown(device.close)
+
+    @app.register_measurement_task
+    def acquire():
+        ai = device.analog_input("ai0:3", rate=10_000, samples=1000)
+        while True:
+            block = ai.read()           # shape (4, 1000), the same buffer on every call
+            stream.push(block.T)        # the stream copies the samples
+
+    def send_outputs():
+        device.digital_output("port1/line0:3").write(outputs.value)
+    ```
+
+Digital words hold the first line of the task in bit 0. Tasks are not thread safe: a task should be used by one
+thread at a time, as a driver task would be.
+"""
+from __future__ import annotations
+import abc
+import re
+import threading
+import typing
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+
+__ANALOG_LINES__ = re.compile(r"(?P<prefix>[a-z]+)(?P<first>\d+)(?::(?P<last>\d+))?")
+__DIGITAL_LINES__ = re.compile(r"(?P<port>port\d+)(?:/line(?P<first>\d+)(?::(?P<last>\d+))?)?")
+
+T = typing.TypeVar("T", bound="IOTask")
+
+
+def parse_analog_lines(lines:str) -> int:
+    """Number of channels of an analog line spec like "ai0:3" (4 channels) or "ai2" (1 channel)."""
+    match = __ANALOG_LINES__.fullmatch(lines)
+    if match is None:
+        raise ValueError(f"Invalid analog lines {lines!r}, expected e.g. 'ai0:3'")
+    first, last = int(match["first"]), int(match["last"] or match["first"])
+    if last < first:
+        raise ValueError(f"Invalid analog lines {lines!r}, the last channel is lower than the first")
+    return last - first + 1
+
+
+def parse_digital_lines(lines:str, port_width:int) -> tuple[str, int, int]:
+    """Port, first line and number of lines of a digital line spec like "port1/line0:3" or "port0" (all lines)."""
+    match = __DIGITAL_LINES__.fullmatch(lines)
+    if match is None:
+        raise ValueError(f"Invalid digital lines {lines!r}, expected e.g. 'port0' or 'port0/line0:7'")
+    if match["first"] is None:
+        return match["port"], 0, port_width
+    first, last = int(match["first"]), int(match["last"] or match["first"])
+    if not first <= last < port_width:
+        raise ValueError(f"Invalid digital lines {lines!r} for a port of {port_width} lines")
+    return match["port"], first, last - first + 1
+
+
+class IOTask(abc.ABC):
+    """Base class of the tasks handed out by a `Device`. Backends implement the abstract hooks of its subclasses.
+    Attributes:
+        device (Device): The device the task belongs to.
+        lines (str): The lines of the task, without the device name.
+        reads (int): Number of reads (or writes) so far.
+        samples (int): Number of samples per channel read (or written) so far.
+        closed (bool): True once the task has been closed, the device creates a new one on the next request.
+    """
+    def __init__(self, device:Device, lines:str) -> None:
+        self.device:Device = device
+        self.lines:str = lines
+        self.reads:int = 0
+        self.samples:int = 0
+        self.closed:bool = False
+
+    def close(self) -> None:
+        """Releases the driver task. Called by `Device.close`."""
+        if not self.closed:
+            self.closed = True
+            self.__close__()
+
+    def __close__(self) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.device.name}/{self.lines})"
+
+
+class AnalogInput(IOTask):
+    """Continuous, hardware timed analog input of one or more channels.
+    Attributes:
+        channels (int): Number of channels.
+        rate (float): Sample rate per channel in Hz.
+        block (int): Samples per channel of one `read`.
+        buffer (np.ndarray): The preallocated buffer `read` fills, shape `(channels, block)`, float64.
+    """
+    def __init__(self, device:Device, lines:str, channels:int, rate:float, block:int) -> None:
+        super().__init__(device, lines)
+        self.channels:int = channels
+        self.rate:float = rate
+        self.block:int = block
+        self.buffer:np.ndarray = np.zeros((channels, block))
+
+    def read(self, out:np.ndarray|None = None) -> np.ndarray:
+        """Reads the next block of samples. Waits until they have been acquired.
+        Args:
+            out (np.ndarray | None, optional): Buffer of shape `(channels, block)` and dtype float64 to read into,
+                e.g. to alternate between two buffers. Defaults to `buffer`.
+        Returns:
+            np.ndarray: The filled buffer. It is overwritten by the next read into it, copy what has to be kept.
+        """
+        if out is None:
+            out = self.buffer
+        elif out.shape != self.buffer.shape or out.dtype != np.float64 or not out.flags.c_contiguous:
+            raise ValueError(f"The buffer has to be a C contiguous float64 array of shape {self.buffer.shape}")
+        self.__read_into__(out)
+        self.reads += 1
+        self.samples += self.block
+        return out
+
+    @abc.abstractmethod
+    def __read_into__(self, out:np.ndarray) -> None:
+        """Fills `out` with the next block of samples."""
+
+
+class DigitalInput(IOTask):
+    """Digital input lines of one port, read as one word. With a `rate`, blocks of words are read hardware timed.
+    Attributes:
+        port (str): The port, e.g. "port0".
+        first (int): The first line, it is bit 0 of the words.
+        count (int): Number of lines.
+        mask (int): Mask of all lines in a word.
+        rate (float | None): Sample rate in Hz for `read_block`, None for on demand reads only.
+        block (int): Words of one `read_block`.
+        buffer (np.ndarray | None): The preallocated buffer `read_block` fills, uint32, None without `rate`.
+    """
+    def __init__(self, device:Device, lines:str, port:str, first:int, count:int, rate:float|None, block:int) -> None:
+        super().__init__(device, lines)
+        self.port:str = port
+        self.first:int = first
+        self.count:int = count
+        self.mask:int = (1 << count) - 1
+        self.rate:float|None = rate
+        self.block:int = block
+        self.buffer:np.ndarray|None = np.zeros(block, dtype=np.uint32) if rate is not None else None
+
+    def read(self) -> int:
+        """Reads the current state of the lines as one word, e.g. for `IOImage.update`."""
+        word = self.__read_word__()
+        self.reads += 1
+        self.samples += 1
+        return word
+
+    def read_block(self) -> np.ndarray:
+        """Reads the next block of hardware timed words, e.g. for `IOImage.scan`. Waits until they have been acquired.
+        Returns:
+            np.ndarray: `buffer`, overwritten by the next call.
+        """
+        if self.buffer is None:
+            raise RuntimeError(f"{self!r} has no sample rate, use read()")
+        self.__read_block__(self.buffer)
+        self.reads += 1
+        self.samples += self.block
+        return self.buffer
+
+    @abc.abstractmethod
+    def __read_word__(self) -> int:
+        """Reads the lines once, the first line in bit 0."""
+
+    @abc.abstractmethod
+    def __read_block__(self, out:np.ndarray) -> None:
+        """Fills `out` with the next block of hardware timed words."""
+
+
+class DigitalOutput(IOTask):
+    """Digital output lines of one port, written as one word.
+    Attributes:
+        port (str): The port, e.g. "port1".
+        first (int): The first line, it is bit 0 of the words.
+        count (int): Number of lines.
+        mask (int): Mask of all lines in a word.
+        value (int | None): The last word written, None before the first write.
+    """
+    def __init__(self, device:Device, lines:str, port:str, first:int, count:int) -> None:
+        super().__init__(device, lines)
+        self.port:str = port
+        self.first:int = first
+        self.count:int = count
+        self.mask:int = (1 << count) - 1
+        self.value:int|None = None
+
+    def write(self, word:int) -> None:
+        """Sets the lines to the bits of `word`, bits above the lines of the task are ignored."""
+        word = int(word) & self.mask
+        self.__write_word__(word)
+        self.value = word
+        self.reads += 1
+        self.samples += 1
+
+    @abc.abstractmethod
+    def __write_word__(self, word:int) -> None:
+        """Sets the lines to `word`, the first line in bit 0."""
+
+
+class Device(abc.ABC):
+    """Base class of the devices, hands out pooled tasks. Subclasses implement the hooks that create the backend specific tasks.
+    Attributes:
+        name (str): Name of the device, e.g. "Dev1".
+        port_width (int): Number of lines of a digital port.
+    """
+    def __init__(self, name:str, port_width:int = 32) -> None:
+        self.name:str = name
+        self.port_width:int = port_width
+        self.__tasks__:dict[tuple, IOTask] = {}
+        self.__lock__ = threading.Lock()
+
+    @property
+    def tasks(self) -> list[IOTask]:
+        """The open tasks of the device."""
+        return [task for task in self.__tasks__.values() if not task.closed]
+
+    def analog_input(self, lines:str, rate:float, samples:int) -> AnalogInput:
+        """Returns the analog input task of the lines, created and started on the first request.
+        Args:
+            lines (str): Channels of the device, e.g. "ai0:3".
+            rate (float): Sample rate per channel in Hz.
+            samples (int): Samples per channel of one `read`.
+        """
+        channels = parse_analog_lines(lines)
+        return self.__pooled__(("ai", lines, rate, samples), lambda: self.__create_analog_input__(lines, channels, rate, samples))
+
+    def digital_input(self, lines:str, rate:float|None = None, samples:int = 1) -> DigitalInput:
+        """Returns the digital input task of the lines, created on the first request.
+        Args:
+            lines (str): Lines of the device, e.g. "port0" (all lines) or "port0/line0:7".
+            rate (float | None, optional): Sample rate in Hz for hardware timed block reads with `read_block`.
+            samples (int, optional): Words of one `read_block`.
+        """
+        port, first, count = parse_digital_lines(lines, self.port_width)
+        return self.__pooled__(("di", lines, rate, samples), lambda: self.__create_digital_input__(lines, port, first, count, rate, samples))
+
+    def digital_output(self, lines:str) -> DigitalOutput:
+        """Returns the digital output task of the lines, created on the first request.
+        Args:
+            lines (str): Lines of the device, e.g. "port1" (all lines) or "port1/line0:3".
+        """
+        port, first, count = parse_digital_lines(lines, self.port_width)
+        return self.__pooled__(("do", lines), lambda: self.__create_digital_output__(lines, port, first, count))
+
+    def close(self) -> None:
+        """Closes all tasks of the device."""
+        with self.__lock__:
+            tasks, self.__tasks__ = list(self.__tasks__.values()), {}
+        for task in tasks:
+            task.close()
+
+    def __enter__(self) -> Device:
+        return self
+
+    def __exit__(self, *args:Any) -> None:
+        self.close()
+
+    def __pooled__(self, key:tuple, create:Callable[[], T]) -> T:
+        with self.__lock__:
+            task = self.__tasks__.get(key, None)
+            if task is None or task.closed:
+                task = self.__tasks__[key] = create()
+            return task # type:ignore
+
+    @abc.abstractmethod
+    def __create_analog_input__(self, lines:str, channels:int, rate:float, samples:int) -> AnalogInput: ...
+
+    @abc.abstractmethod
+    def __create_digital_input__(self, lines:str, port:str, first:int, count:int, rate:float|None, samples:int) -> DigitalInput: ...
+
+    @abc.abstractmethod
+    def __create_digital_output__(self, lines:str, port:str, first:int, count:int) -> DigitalOutput: ...
@@ -0,0 +1,199 @@
+"""Bit-packed process images of digital inputs and outputs.
+
+An `IOImage` keeps all lines of a port in a single integer. Lines are declared like dataclass fields, the bit masks
+are generated once when the class is created:
+
+    ```
+    class DI(IOImage):
+        GripperLeftUnlocked: bool       # bit 0
+        GripperLeftLocked: bool         # bit 1
+        ...
+
+    inputs = DI()
+    inputs.on_change("EmergencyStop", lambda name, value: print(name, value))
+
+    with nidaqmx.Task() as task:
+        task.di_channels.add_di_chan("Dev2/port0", line_grouping=LineGrouping.CHAN_FOR_ALL_LINES)
+        while True:
+            inputs.update(task.read())  # one int per scan, no per-line conversion
+            if inputs.rising & DI.mask("HomeSwitchGripper"):
+                ...
+    ```
+
+`update` compares the new port word with the old one by XOR: unchanged scans cost one comparison, and listeners are
+only called for the bits that flipped. Blocks of port words from buffered acquisitions are handled by `scan`, which
+finds the changed samples with NumPy and replays only those.
+"""
+from __future__ import annotations
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, ClassVar
+
+import numpy as np
+
+
+Listener = Callable[[str, bool], None]
+__MASKS__ = [1 << index for index in range(64)]
+
+
+class Bit:
+    """Descriptor of a named line of an `IOImage`, created for every annotated field."""
+    __slots__ = ("name", "index", "mask")
+
+    def __init__(self, name:str, index:int) -> None:
+        self.name:str = name
+        self.index:int = index
+        self.mask:int = 1 << index
+
+    def __get__(self, image:IOImage|None, owner:type|None = None) -> Any:
+        if image is None:
+            return self
+        return image.value & self.mask != 0
+
+    def __set__(self, image:IOImage, value:bool) -> None:
+        image.update(image.value | self.mask if value else image.value & ~self.mask)
+
+
+class IOImage:
+    """Base class of bit-packed I/O images, up to 64 lines. Subclasses annotate one `bool` field per line, in bit order.
+    Attributes:
+        value (int): The packed lines, bit 0 is the first field.
+        changed (int): Bits that flipped with the last update.
+        rising (int): Bits that changed from 0 to 1 with the last update.
+        falling (int): Bits that changed from 1 to 0 with the last update.
+    Methods:
+        update(word): Sets all lines from a port word, notifies the listeners of the flipped bits.
+        scan(words): Applies a block of port words in order, `changed` then holds all bits that flipped within the block.
+        on_change(name, listener): Calls `listener(name, value)` whenever the line (or any line) flips.
+        from_array(values) / to_array(): Conversion from and to one bool per line.
+    """
+    __bits__: ClassVar[dict[str, Bit]] = {}
+    __names__: ClassVar[list[str]] = []
+    __defaults__: ClassVar[int] = 0
+    __slots__ = ("value", "changed", "__listeners__", "__any_listeners__")
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        bits = dict(cls.__bits__)
+        defaults = 0
+        for name in cls.__dict__.get("__annotations__", {}):
+            if name.startswith("_") or name in bits:
+                continue
+            bit = Bit(name, len(bits))
+            if bit.index >= 64:
+                raise ValueError(f"{cls.__name__} has more than 64 lines")
+            if cls.__dict__.get(name, False):
+                defaults |= bit.mask
+            bits[name] = bit
+            setattr(cls, name, bit)
+        cls.__bits__ = bits
+        cls.__names__ = list(bits)
+        cls.__defaults__ = defaults
+
+    def __init__(self, value:int|None = None) -> None:
+        self.value:int = self.__defaults__ if value is None else value
+        self.changed:int = 0
+        # listeners of single bits by bit index, listeners of all bits
+        self.__listeners__:dict[int, list[Listener]] = {}
+        self.__any_listeners__:list[Listener] = []
+
+    @classmethod
+    def mask(cls, *names:str) -> int:
+        """Bit mask of the given lines, e.g. to test `image.rising & DI.mask("HomeSwitchGripper")`."""
+        mask = 0
+        for name in names:
+            mask |= cls.__bits__[name].mask
+        return mask
+
+    @classmethod
+    def names(cls) -> list[str]:
+        """Names of the lines in bit order."""
+        return list(cls.__names__)
+
+    def __len__(self) -> int:
+        return len(self.__names__)
+
+    def __repr__(self) -> str:
+        lines = ", ".join(f"{name}={self.value >> bit.index & 1 == 1}" for name, bit in self.__bits__.items())
+        return f"{type(self).__name__}({lines})"
+
+    def __eq__(self, other:object) -> bool:
+        return type(other) is type(self) and other.value == self.value # type:ignore
+
+    @property
+    def rising(self) -> int:
+        return self.changed & self.value
+
+    @property
+    def falling(self) -> int:
+        return self.changed & ~self.value
+
+    def on_change(self, name:str|None, listener:Listener) -> None:
+        """Registers a listener for a line, or for all lines if `name` is None.
+        It is called as `listener(name, value)` from the thread that updates the image, once per flipped bit.
+        """
+        if name is None:
+            self.__any_listeners__.append(listener)
+        else:
+            self.__listeners__.setdefault(self.__bits__[name].index, []).append(listener)
+
+    def update(self, word:int) -> int:
+        """Sets all lines from a port word.
+        Returns:
+            int: Mask of the bits that flipped, 0 if nothing changed.
+        """
+        word = int(word)
+        changed = self.value ^ word
+        self.changed = changed
+        if not changed:
+            return 0
+        self.value = word
+        if self.__listeners__ or self.__any_listeners__:
+            self.__notify__(changed, word)
+        return changed
+
+    def __notify__(self, changed:int, word:int) -> None:
+        names = self.__names__
+        while changed:
+            low = changed & -changed
+            index = low.bit_length() - 1
+            changed ^= low
+            if index >= len(names):
+                continue # unused lines of the port
+            value = word & low != 0
+            for listener in self.__listeners__.get(index, ()):
+                listener(names[index], value)
+            for listener in self.__any_listeners__:
+                listener(names[index], value)
+
+    def scan(self, words:Sequence[int]|np.ndarray) -> np.ndarray:
+        """Applies a block of port words in order, e.g. from a buffered read of a port.
+        Changes are found vectorized, only the samples that differ from their predecessor are applied one by one.
+        Returns:
+            np.ndarray: Indices of the samples at which at least one line flipped.
+        """
+        words = np.asarray(words, dtype=np.uint64)
+        if words.size == 0:
+            return np.empty(0, dtype=np.intp)
+        diff = np.empty_like(words)
+        diff[0] = words[0] ^ np.uint64(self.value)
+        np.bitwise_xor(words[1:], words[:-1], out=diff[1:])
+        indices = np.flatnonzero(diff)
+        changed = 0
+        for index in indices.tolist():
+            changed |= self.update(int(words[index]))
+        # `changed` of a block covers all bits that flipped within it
+        self.changed = changed
+        return indices
+
+    def from_array(self, values:Iterable[bool]) -> int:
+        """Sets the lines from one bool per line (e.g. `task.read()` with `CHAN_PER_LINE`), see `update`."""
+        word = 0
+        for mask, value in zip(__MASKS__, values):
+            if value:
+                word |= mask
+        return self.update(word)
+
+    def to_array(self) -> list[bool]:
+        """One bool per line, e.g. for `task.write` with `CHAN_PER_LINE`. Writing `value` to the port is cheaper."""
+        value = self.value
+        return [value >> index & 1 == 1 for index in range(len(self.__names__))]
@@ -0,0 +1,130 @@
+"""NI-DAQmx backend of the device layer, requires the optional `nidaqmx` package.
+
+Every task of a `NidaqmxDevice` is one `nidaqmx.Task` that is created, configured and started once and kept until the
+device is closed. Reads and writes go through the stream readers and writers of `nidaqmx`, which fill the
+preallocated NumPy buffers directly instead of building Python lists:
+
+* analog inputs: continuous sample clock, `AnalogMultiChannelReader.read_many_sample` into `buffer`,
+* digital inputs: `read_one_sample_port_uint32`, or with a rate `read_many_sample_port_uint32` into `buffer`,
+* digital outputs: `write_one_sample_port_uint32`.
+
+Digital tasks use one channel for all lines. DAQmx reports port words in port layout, the words are shifted so that
+the first line of the task is bit 0, like with the other backends.
+"""
+from __future__ import annotations
+from typing import Any
+
+import numpy as np
+
+from bff.io.device import AnalogInput, Device, DigitalInput, DigitalOutput
+
+try:
+    import nidaqmx
+    from nidaqmx.constants import AcquisitionType, LineGrouping
+    from nidaqmx.stream_readers import AnalogMultiChannelReader, DigitalSingleChannelReader
+    from nidaqmx.stream_writers import DigitalSingleChannelWriter
+except ImportError:
+    nidaqmx = None
+
+
+BUFFER_BLOCKS = 10      # size of the driver buffer of timed tasks, in blocks
+TIMEOUT = 10.0          # seconds a read waits for its samples
+
+
+def __create_task__(setup:Any) -> Any:
+    """Creates a task and configures it with `setup(task)`. The task is closed if the configuration fails."""
+    task = nidaqmx.Task() # type:ignore
+    try:
+        setup(task)
+    except BaseException:
+        task.close()
+        raise
+    return task
+
+
+class NidaqmxAnalogInput(AnalogInput):
+    def __init__(self, device:NidaqmxDevice, lines:str, channels:int, rate:float, block:int) -> None:
+        super().__init__(device, lines, channels, rate, block)
+
+        def setup(task:Any) -> None:
+            task.ai_channels.add_ai_voltage_chan(f"{device.name}/{lines}")
+            task.timing.cfg_samp_clk_timing(rate, sample_mode=AcquisitionType.CONTINUOUS, samps_per_chan=block * BUFFER_BLOCKS)
+            task.start()
+
+        self.__task__ = __create_task__(setup)
+        self.__reader__ = AnalogMultiChannelReader(self.__task__.in_stream)
+
+    def __read_into__(self, out:np.ndarray) -> None:
+        self.__reader__.read_many_sample(out, number_of_samples_per_channel=self.block, timeout=self.device.timeout) # type:ignore
+
+    def __close__(self) -> None:
+        self.__task__.close()
+
+
+class NidaqmxDigitalInput(DigitalInput):
+    def __init__(self, device:NidaqmxDevice, lines:str, port:str, first:int, count:int, rate:float|None, block:int) -> None:
+        super().__init__(device, lines, port, first, count, rate, block)
+
+        def setup(task:Any) -> None:
+            task.di_channels.add_di_chan(f"{device.name}/{lines}", line_grouping=LineGrouping.CHAN_FOR_ALL_LINES)
+            if rate is not None:
+                task.timing.cfg_samp_clk_timing(rate, sample_mode=AcquisitionType.CONTINUOUS, samps_per_chan=block * BUFFER_BLOCKS)
+            task.start()
+
+        self.__task__ = __create_task__(setup)
+        self.__reader__ = DigitalSingleChannelReader(self.__task__.in_stream)
+
+    def __read_word__(self) -> int:
+        return self.__reader__.read_one_sample_port_uint32(timeout=self.device.timeout) >> self.first & self.mask # type:ignore
+
+    def __read_block__(self, out:np.ndarray) -> None:
+        self.__reader__.read_many_sample_port_uint32(out, number_of_samples_per_channel=self.block, timeout=self.device.timeout) # type:ignore
+        if self.first:
+            np.right_shift(out, self.first, out=out)
+        np.bitwise_and(out, self.mask, out=out)
+
+    def __close__(self) -> None:
+        self.__task__.close()
+
+
+class NidaqmxDigitalOutput(DigitalOutput):
+    def __init__(self, device:NidaqmxDevice, lines:str, port:str, first:int, count:int) -> None:
+        super().__init__(device, lines, port, first, count)
+
+        def setup(task:Any) -> None:
+            task.do_channels.add_do_chan(f"{device.name}/{lines}", line_grouping=LineGrouping.CHAN_FOR_ALL_LINES)
+            task.start()
+
+        self.__task__ = __create_task__(setup)
+        self.__writer__ = DigitalSingleChannelWriter(self.__task__.out_stream, auto_start=False)
+
+    def __write_word__(self, word:int) -> None:
+        self.__writer__.write_one_sample_port_uint32(word << self.first, timeout=self.device.timeout) # type:ignore
+
+    def __close__(self) -> None:
+        self.__task__.close()
+
+
+class NidaqmxDevice(Device):
+    """A device of NI-DAQmx, see the module documentation.
+    Args:
+        name (str): Name of the device in NI MAX, e.g. "Dev1".
+        port_width (int, optional): Number of lines of a digital port, 8 on most devices.
+        timeout (float, optional): Seconds a read or write waits for the driver.
+    Raises:
+        RuntimeError: If `nidaqmx` is not installed.
+    """
+    def __init__(self, name:str, port_width:int = 8, timeout:float = TIMEOUT) -> None:
+        if nidaqmx is None:
+            raise RuntimeError("NidaqmxDevice requires the nidaqmx package, install it with 'pip install nidaqmx'")
+        super().__init__(name, port_width)
+        self.timeout:float = timeout
+
+    def __create_analog_input__(self, lines:str, channels:int, rate:float, samples:int) -> AnalogInput:
+        return NidaqmxAnalogInput(self, lines, channels, rate, samples)
+
+    def __create_digital_input__(self, lines:str, port:str, first:int, count:int, rate:float|None, samples:int) -> DigitalInput:
+        return NidaqmxDigitalInput(self, lines, port, first, count, rate, samples)
+
+    def __create_digital_output__(self, lines:str, port:str, first:int, count:int) -> DigitalOutput:
+        return NidaqmxDigitalOutput(self, lines, port, first, count)
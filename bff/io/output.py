@@ -0,0 +1,219 @@
+"""Coalescing writes of digital outputs.
+
+Tasks that switch outputs call `CoalescingOutput.set` (or `write` for raw bits). The call only updates the desired
+port word and marks the touched bits dirty. A writer thread waits `window` seconds after the first dirty bit and then
+writes the word once, so outputs switched by several tasks within the window reach the hardware in a single write.
+
+Writes keep their order. A request that changes a bit that is still dirty with another value (e.g. a pulse, on and
+off within the window) seals the pending word first: both states are written, one after the other. Requests that do
+not conflict are merged. A word equal to the last written one is not written again.
+
+:Example:
+    ```
+    class DO(IOImage):
+        PCReady: bool
+        LedGripperSwitch: bool
+        ...
+
+    outputs = app.create_output("do", DO, device.digital_output("port1/line0:15"), window=0.001)
+
+    @app.register_measurement_task
+    def gripper():
+        outputs.set("CloseGripper", True)       # returns at once, written within 1 ms
+        ...
+
+    print(outputs.stats())                      # writes, merged requests, write rate and latency
+    ```
+"""
+from __future__ import annotations
+import collections
+import dataclasses
+import threading
+import time
+from collections.abc import Callable
+
+from bff.io.device import DigitalOutput
+from bff.io.image import IOImage
+
+
+@dataclasses.dataclass
+class OutputStats:
+    """Counters of a `CoalescingOutput`. Latencies are seconds from the first request of a write until it was done.
+    Attributes:
+        requests (int): Calls of `set` and `write`.
+        writes (int): Words written to the hardware.
+        merged (int): Requests that did not need a write of their own.
+        sealed (int): Pending words written early because a request changed a dirty bit again.
+        skipped (int): Words not written because they equaled the last written word.
+        rate (float): Writes per second since the start.
+        mean_latency (float): Mean latency of the writes.
+        max_latency (float): Largest latency of a write.
+        last_latency (float): Latency of the last write.
+        errors (int): Writes that raised an exception.
+        last_error (str | None): The last exception as text.
+    """
+    requests:int = 0
+    writes:int = 0
+    merged:int = 0
+    sealed:int = 0
+    skipped:int = 0
+    rate:float = 0.0
+    mean_latency:float = 0.0
+    max_latency:float = 0.0
+    last_latency:float = 0.0
+    errors:int = 0
+    last_error:str|None = None
+    total_latency:float = dataclasses.field(default=0.0, repr=False)
+
+
+class CoalescingOutput:
+    """An output image whose changes are written to the hardware in merged, ordered writes, see the module documentation.
+    Args:
+        name (str): Name of the output, also the name of the writer thread.
+        image (IOImage): Image of the lines, it holds the desired state. Listeners of the image are called by `set`.
+        output (DigitalOutput | Callable[[int], None]): The task the words are written to, or a function writing a word.
+        window (float, optional): Time in seconds the writer collects requests after the first dirty bit.
+    Attributes:
+        written (int | None): The last word written to the hardware, None before the first write.
+    """
+    def __init__(self, name:str, image:IOImage, output:DigitalOutput|Callable[[int], None], window:float = 0.001) -> None:
+        self.name:str = name
+        self.image:IOImage = image
+        self.window:float = window
+        self.written:int|None = None
+        self.__write__:Callable[[int], None] = output.write if isinstance(output, DigitalOutput) else output
+        self.__condition__ = threading.Condition()
+        # keeps `flush` and the writer thread from writing batches out of order
+        self.__write_lock__ = threading.Lock()
+        # requested state, bits changed since the last seal, time and number of the requests since then
+        self.__dirty__:int = 0
+        self.__since__:float = 0.0
+        self.__pending_requests__:int = 0
+        self.__sealed__:collections.deque[tuple[int, float, int]] = collections.deque()
+        self.__stats__ = OutputStats()
+        self.__started__:float = 0.0
+        self.__stopping__:bool = False
+        self.__thread__:threading.Thread|None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.__thread__ is not None and self.__thread__.is_alive()
+
+    def set(self, name:str, value:bool) -> None:
+        """Requests a line of the image to be set. Returns at once, the writer thread writes it within `window`."""
+        mask = self.image.mask(name)
+        self.write(mask if value else 0, mask)
+
+    def write(self, word:int, mask:int|None = None) -> None:
+        """Requests the bits of `mask` (all lines if None) to be set to the bits of `word`. Returns at once."""
+        with self.__condition__:
+            value = self.image.value
+            if mask is None:
+                mask = (1 << len(self.image)) - 1
+            word = value & ~mask | word & mask
+            self.__stats__.requests += 1
+            changed = value ^ word
+            if changed & self.__dirty__:
+                # a dirty bit changes again: its current state must reach the hardware before the new one
+                self.__sealed__.append((value, self.__since__, self.__pending_requests__))
+                self.__stats__.sealed += 1
+                self.__dirty__ = 0
+                self.__pending_requests__ = 0
+            if not self.__dirty__ and not self.__pending_requests__:
+                self.__since__ = time.perf_counter()
+            self.__dirty__ |= changed
+            self.__pending_requests__ += 1
+            self.image.update(word)
+            self.__condition__.notify()
+
+    def flush(self) -> None:
+        """Writes the pending requests right away, from the calling thread."""
+        with self.__write_lock__:
+            self.__write_batch__(self.__take__())
+
+    def start(self) -> None:
+        """Starts the writer thread."""
+        if self.is_running:
+            return
+        with self.__condition__:
+            self.__stopping__ = False
+        self.__started__ = time.perf_counter()
+        self.__thread__ = threading.Thread(target=self.__run__, name=f"Output-{self.name}", daemon=True)
+        self.__thread__.start()
+
+    def stop(self, timeout:float|None = None) -> bool:
+        """Writes the pending requests and stops the writer thread.
+        Returns:
+            bool: False if the writer has not stopped in time, e.g. because the hardware write hangs.
+        """
+        if self.__thread__ is None:
+            return True
+        with self.__condition__:
+            self.__stopping__ = True
+            self.__condition__.notify()
+        self.__thread__.join(timeout)
+        if self.__thread__.is_alive():
+            return False
+        self.__thread__ = None
+        return True
+
+    def stats(self) -> OutputStats:
+        """A copy of the counters."""
+        with self.__condition__:
+            stats = dataclasses.replace(self.__stats__)
+        elapsed = time.perf_counter() - self.__started__ if self.__started__ else 0.0
+        stats.rate = stats.writes / elapsed if elapsed > 0 else 0.0
+        stats.mean_latency = stats.total_latency / stats.writes if stats.writes else 0.0
+        stats.merged = max(0, stats.requests - stats.writes)
+        return stats
+
+    def __take__(self) -> list[tuple[int, float, int]]:
+        """Removes the sealed words and the pending one, in order."""
+        with self.__condition__:
+            batch = list(self.__sealed__)
+            self.__sealed__.clear()
+            if self.__pending_requests__:
+                batch.append((self.image.value, self.__since__, self.__pending_requests__))
+                self.__dirty__ = 0
+                self.__pending_requests__ = 0
+        return batch
+
+    def __run__(self) -> None:
+        condition = self.__condition__
+        while True:
+            with condition:
+                while not self.__stopping__ and not self.__sealed__ and not self.__pending_requests__:
+                    condition.wait()
+                # collect the requests of the window, a sealed word is written right away
+                while not self.__stopping__ and not self.__sealed__:
+                    remaining = self.__since__ + self.window - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+                stopping = self.__stopping__
+            with self.__write_lock__:
+                self.__write_batch__(self.__take__())
+            if stopping:
+                return
+
+    def __write_batch__(self, batch:list[tuple[int, float, int]]) -> None:
+        for word, since, requests in batch:
+            if word == self.written:
+                with self.__condition__:
+                    self.__stats__.skipped += 1
+                continue
+            try:
+                self.__write__(word)
+            except Exception as e:
+                with self.__condition__:
+                    self.__stats__.errors += 1
+                    self.__stats__.last_error = f"{type(e).__name__}: {e}"
+                continue
+            self.written = word
+            latency = time.perf_counter() - since
+            with self.__condition__:
+                stats = self.__stats__
+                stats.writes += 1
+                stats.total_latency += latency
+                stats.last_latency = latency
+                stats.max_latency = max(stats.max_latency, latency)
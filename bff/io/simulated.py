@@ -0,0 +1,132 @@
+"""Pure Python stand-in for a DAQ device, to build, test and benchmark without hardware.
+
+Analog inputs deliver one sine per channel (channel n at `frequency * (n + 1)` Hz) plus gaussian noise, computed in
+place into the read buffer. With `realtime=True` a read waits until its samples would have been acquired, like a
+hardware timed task, otherwise samples are produced as fast as they are read.
+
+Digital ports are plain integers. Outputs set the lines of their port, inputs read them, so a task can read back what
+another one wrote to the same port. `connect` wires an output port to an input port, `set_port` sets input lines
+from a test or a simulated machine.
+
+:Example:
+    ```
+    device = SimulatedDevice("Dev2")
+    device.connect("port1", "port0")                     # the outputs are wired back to the inputs
+    device.digital_output("port1/line0:3").write(0b0101)
+    assert device.digital_input("port0/line0:3").read() == 0b0101
+    ```
+"""
+from __future__ import annotations
+import collections
+import threading
+import time
+
+import numpy as np
+
+from bff.io.device import AnalogInput, Device, DigitalInput, DigitalOutput
+
+
+class SimulatedAnalogInput(AnalogInput):
+    def __init__(self, device:SimulatedDevice, lines:str, channels:int, rate:float, block:int) -> None:
+        super().__init__(device, lines, channels, rate, block)
+        self.__simulation__:SimulatedDevice = device
+        self.__frequencies__:np.ndarray = device.frequency * np.arange(1, channels + 1)[:, None] * 2 * np.pi / rate
+        self.__ramp__:np.ndarray = np.arange(block, dtype=np.float64)
+        self.__time__:np.ndarray = np.empty(block)
+        self.__noise__:np.ndarray = np.empty((channels, block))
+        self.__rng__ = np.random.default_rng(device.seed)
+        self.__start__:float|None = None
+
+    def __read_into__(self, out:np.ndarray) -> None:
+        if self.__simulation__.realtime:
+            if self.__start__ is None:
+                self.__start__ = time.perf_counter()
+            delay = self.__start__ + (self.samples + self.block) / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        np.add(self.__ramp__, self.samples, out=self.__time__)
+        np.multiply(self.__frequencies__, self.__time__, out=out)
+        np.sin(out, out=out)
+        if self.__simulation__.noise:
+            self.__rng__.standard_normal(out=self.__noise__)
+            self.__noise__ *= self.__simulation__.noise
+            out += self.__noise__
+
+
+class SimulatedDigitalInput(DigitalInput):
+    def __init__(self, device:SimulatedDevice, *args) -> None:
+        super().__init__(device, *args)
+        self.__simulation__:SimulatedDevice = device
+        self.__start__:float|None = None
+
+    def __read_word__(self) -> int:
+        return self.__simulation__.get_port(self.port) >> self.first & self.mask
+
+    def __read_block__(self, out:np.ndarray) -> None:
+        if self.__simulation__.realtime:
+            if self.__start__ is None:
+                self.__start__ = time.perf_counter()
+            delay = self.__start__ + (self.samples + self.block) / self.rate - time.perf_counter() # type:ignore
+            if delay > 0:
+                time.sleep(delay)
+        out.fill(self.__read_word__())
+
+
+class SimulatedDigitalOutput(DigitalOutput):
+    def __init__(self, device:SimulatedDevice, *args) -> None:
+        super().__init__(device, *args)
+        self.__simulation__:SimulatedDevice = device
+
+    def __write_word__(self, word:int) -> None:
+        self.__simulation__.set_port(self.port, word << self.first, self.mask << self.first)
+
+
+class SimulatedDevice(Device):
+    """A DAQ device simulated in Python, see the module documentation.
+    Args:
+        name (str, optional): Name of the device.
+        port_width (int, optional): Number of lines of a digital port.
+        realtime (bool, optional): If True, timed reads wait until their samples would have been acquired.
+        frequency (float, optional): Frequency of the sine of the first analog channel in Hz.
+        noise (float, optional): Standard deviation of the noise added to the analog channels.
+        seed (int | None, optional): Seed of the noise, for repeatable data.
+    """
+    def __init__(self, name:str = "Sim1", port_width:int = 32, realtime:bool = True, frequency:float = 1.0,
+                 noise:float = 0.01, seed:int|None = None) -> None:
+        super().__init__(name, port_width)
+        self.realtime:bool = realtime
+        self.frequency:float = frequency
+        self.noise:float = noise
+        self.seed:int|None = seed
+        self.__ports__:dict[str, int] = collections.defaultdict(int)
+        self.__wiring__:dict[str, list[str]] = collections.defaultdict(list)
+        self.__ports_lock__ = threading.Lock()
+
+    def get_port(self, port:str) -> int:
+        """The current word of a port."""
+        return self.__ports__[port]
+
+    def set_port(self, port:str, word:int, mask:int|None = None) -> None:
+        """Sets the lines of a port, and of the ports wired to it.
+        Args:
+            port (str): The port, e.g. "port0".
+            word (int): The new state of the lines.
+            mask (int | None, optional): The lines to set, None sets all lines.
+        """
+        with self.__ports_lock__:
+            for target in [port, *self.__wiring__.get(port, ())]:
+                old = self.__ports__[target]
+                self.__ports__[target] = word if mask is None else old & ~mask | word & mask
+
+    def connect(self, output_port:str, input_port:str) -> None:
+        """Wires the lines of an output port to an input port: every write to the output sets the input as well."""
+        self.__wiring__[output_port].append(input_port)
+
+    def __create_analog_input__(self, lines:str, channels:int, rate:float, samples:int) -> AnalogInput:
+        return SimulatedAnalogInput(self, lines, channels, rate, samples)
+
+    def __create_digital_input__(self, lines:str, port:str, first:int, count:int, rate:float|None, samples:int) -> DigitalInput:
+        return SimulatedDigitalInput(self, lines, port, first, count, rate, samples)
+
+    def __create_digital_output__(self, lines:str, port:str, first:int, count:int) -> DigitalOutput:
+        return SimulatedDigitalOutput(self, lines, port, first, count)